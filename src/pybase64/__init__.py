@@ -1,45 +1,111 @@
 from __future__ import annotations
 
-__lazy_modules__ = ["pybase64._license"]
+__lazy_modules__ = ["inspect", "mmap", "pybase64._license"]
 
+import inspect
+import mmap
+import os
+
+from pybase64._calibration import calibrate
+from pybase64._calibration import select_simd_path as _select_simd_path
 from pybase64._license import _license
+from pybase64._unspecified import _decode_options, _Unspecified
 from pybase64._version import _version
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
-    from pybase64._typing import Buffer
+    from typing import Literal
+
+    from pybase64._typing import Buffer, Explanation
 
 try:
     from pybase64._pybase64 import (
+        Codec,
+        Decoder,
+        Encoder,
+        _explain,
         _get_simd_flags_compile,  # noqa: F401
         _get_simd_flags_runtime,  # noqa: F401
         _get_simd_name,
         _get_simd_path,
+        _get_stats,
+        _reset_stats,
         _set_simd_path,  # noqa: F401
+        _set_stats_enabled,
         b64decode,
         b64decode_as_bytearray,
+        b64decode_into,
+        b64decode_many,
+        b64decode_packed,
+        b64decoded_length,
         b64encode,
         b64encode_as_string,
+        b64encode_into,
+        b64encode_many,
+        b64encode_packed,
+        b64encoded_length,
+        b64validate,
         encodebytes,
     )
 except ImportError:
     from pybase64._fallback import (
+        _explain,
         _get_simd_name,
         _get_simd_path,
+        _get_stats,
+        _reset_stats,
+        _set_stats_enabled,
         b64decode,
         b64decode_as_bytearray,
+        b64decode_into,
+        b64decode_many,
+        b64decode_packed,
+        b64decoded_length,
         b64encode,
         b64encode_as_string,
+        b64encode_into,
+        b64encode_many,
+        b64encode_packed,
+        b64encoded_length,
+        b64validate,
         encodebytes,
     )
 
+    if not TYPE_CHECKING:
+        # the C extension stubs describe the codec & incremental objects
+        from pybase64._fallback import Codec, Decoder, Encoder
+
+# user choice, cached calibration or default to the widest SIMD path
+_select_simd_path()
+
+# opt-in call & byte counters
+_set_stats_enabled(os.environ.get("PYBASE64_STATS", "0") not in {"", "0"})
 
 __all__ = (
+    "Codec",
+    "Decoder",
+    "Encoder",
     "b64decode",
     "b64decode_as_bytearray",
+    "b64decode_into",
+    "b64decode_many",
+    "b64decode_packed",
+    "b64decoded_length",
     "b64encode",
     "b64encode_as_string",
+    "b64encode_into",
+    "b64encode_many",
+    "b64encode_packed",
+    "b64encoded_length",
+    "b64validate",
+    "calibrate",
+    "decode_file",
+    "enable_stats",
+    "encode_file",
     "encodebytes",
+    "explain",
+    "get_stats",
+    "reset_stats",
     "standard_b64decode",
     "standard_b64encode",
     "urlsafe_b64decode",
@@ -69,6 +135,95 @@ def get_version() -> str:
     return f"{__version__} (C extension inactive)"
 
 
+def enable_stats(enabled: bool = True) -> bool:
+    """Enable or disable the collection of call & byte counters.
+
+    Counters are disabled by default, they can also be enabled with
+    ``PYBASE64_STATS=1`` when :mod:`pybase64` is imported. When disabled,
+    the only cost is a single branch per call.
+
+    The result is the previous state.
+    """
+    return _set_stats_enabled(enabled)
+
+
+def get_stats() -> dict[str, dict[str, dict[str, int]]]:
+    """Return the call & byte counters collected since the last :func:`reset_stats`.
+
+    The result maps each entry point (e.g. ``"b64decode"``, ``"Codec.encode"``)
+    to the internal paths it took:
+
+    - ``"fast"``: SIMD codec only.
+    - ``"translate"``: SIMD codec with an extra pass for ``altchars``.
+    - ``"slow"``: scalar decoder, handling ignored characters or missing padding.
+    - ``"wrapcol"``: encoding with line wrapping.
+    - ``"error"``: an exception was raised while encoding or decoding.
+
+    Each path reports ``"calls"``, ``"bytes_in"`` and ``"bytes_out"``. Only
+    the paths that were taken are reported.
+
+    Counters are only collected by the C extension, see :func:`enable_stats`.
+    """
+    return _get_stats()
+
+
+def reset_stats() -> None:
+    """Reset all counters reported by :func:`get_stats`."""
+    _reset_stats()
+
+
+# the wrappers call b64encode/b64decode with an alphabet & their own keyword arguments
+_EXPLAIN_ALIASES = {
+    "standard_b64encode": ("b64encode", None),
+    "standard_b64decode": ("b64decode", None),
+    "urlsafe_b64encode": ("b64encode", b"-_"),
+    "urlsafe_b64decode": ("b64decode", b"-_"),
+}
+
+
+def explain(func: object, /, *args: object, **kwargs: object) -> Explanation:
+    """Return the internal path ``func(*args, **kwargs)`` would take, without running it.
+
+    ``func`` is one of the encoding or decoding functions of this module, e.g.
+    :func:`b64encode`, :func:`urlsafe_b64decode`, :func:`b64decode_many`,
+    :func:`b64validate`, or the :meth:`~Codec.encode` and :meth:`~Codec.decode`
+    methods of a :class:`Codec` object. The arguments are checked by the same code
+    as the call and the same exceptions are raised, invalid data is only detected
+    by the call itself. An iterable passed to the ``*_many`` functions is consumed.
+
+    The result is a :class:`dict` with the following keys:
+
+    - ``"simd"``: the active SIMD path, as reported by :func:`get_version`.
+    - ``"path"``: one of the paths reported by :func:`get_stats`.
+    - ``"translate"``: whether an extra pass translates ``altchars``.
+    - ``"release_gil"``: whether the GIL is released while encoding/decoding.
+    - ``"threads"``: the number of threads encoding/decoding.
+    - ``"output_size"``: the size of the output buffer, an upper bound when decoding.
+    - ``"copies"``: temporary copies by kind with their size in bytes. ``"translate"``
+      and ``"compact"`` are stack blocks holding translated input and runs of alphabet
+      characters.
+    - ``"extra_memory"``: the sum of the copies.
+
+    With the fallback implementation, only ``"simd"`` and ``"path"`` are reported,
+    both ``"fallback"``.
+    """
+    simd = _get_simd_name(_get_simd_path())
+    name = getattr(func, "__name__", "")
+    codec = getattr(func, "__self__", None)
+    if isinstance(codec, Codec) and getattr(codec, name, None) == func:
+        return {"simd": simd, **_explain(f"Codec.{name}", codec, *args, **kwargs)}
+    if globals().get(name) is not func:
+        msg = f"{func!r} is not a pybase64 function"
+        raise ValueError(msg)
+    if name in _EXPLAIN_ALIASES:
+        bound = inspect.signature(globals()[name]).bind(*args, **kwargs)
+        bound.apply_defaults()
+        name, altchars = _EXPLAIN_ALIASES[name]
+        s = bound.arguments.pop("s")
+        return {"simd": simd, **_explain(name, s, altchars, **bound.arguments)}
+    return {"simd": simd, **_explain(name, *args, **kwargs)}
+
+
 def standard_b64encode(s: Buffer) -> bytes:
     """Encode bytes using the standard Base64 alphabet.
 
@@ -126,3 +281,107 @@ def urlsafe_b64decode(s: str | Buffer, *, padded: bool = False) -> bytes:
     The alphabet uses '-' instead of '+' and '_' instead of '/'.
     """
     return b64decode(s, b"-_", padded=padded)
+
+
+def _check_distinct_files(
+    src_path: str | os.PathLike[str],
+    dst_path: str | os.PathLike[str],
+) -> None:
+    # opening dst_path truncates it, src_path would be lost
+    if os.path.exists(dst_path) and os.path.samefile(src_path, dst_path):  # noqa: PTH110, PTH121
+        msg = "src_path and dst_path must not be the same file"
+        raise ValueError(msg)
+
+
+def encode_file(
+    src_path: str | os.PathLike[str],
+    dst_path: str | os.PathLike[str],
+    altchars: str | Buffer | None = None,
+    *,
+    padded: bool = True,
+    wrapcol: int = 0,
+) -> int:
+    """Encode the content of a file using the standard Base64 alphabet.
+
+    Argument ``src_path`` is the path of the file to encode, ``dst_path`` is
+    the path of the file receiving the encoded data.
+
+    Optional ``altchars``, ``padded`` and ``wrapcol`` have the same meaning
+    as in :func:`b64encode`.
+
+    Both files are memory-mapped, the output file is created with its final
+    size before encoding.
+
+    The result is the number of bytes written to ``dst_path``.
+
+    A :exc:`ValueError` is raised if ``src_path`` and ``dst_path`` are the
+    same file.
+    """
+    _check_distinct_files(src_path, dst_path)
+    with open(src_path, "rb") as src, open(dst_path, "wb+") as dst:  # noqa: PTH123
+        size = os.fstat(src.fileno()).st_size
+        out_len = b64encoded_length(size, padded=padded, wrapcol=wrapcol)
+        if out_len == 0:
+            # an empty file can't be memory-mapped
+            return 0
+        dst.truncate(out_len)
+        with (
+            mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as src_map,
+            mmap.mmap(dst.fileno(), out_len) as dst_map,
+        ):
+            b64encode_into(src_map, dst_map, altchars, padded=padded, wrapcol=wrapcol)
+    return out_len
+
+
+def decode_file(
+    src_path: str | os.PathLike[str],
+    dst_path: str | os.PathLike[str],
+    altchars: str | Buffer | None = None,
+    validate: bool | Literal[_Unspecified.UNSPECIFIED] = _Unspecified.UNSPECIFIED,
+    *,
+    padded: bool = True,
+    ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = _Unspecified.UNSPECIFIED,
+    canonical: bool = False,
+) -> int:
+    """Decode the content of a file encoded with the standard Base64 alphabet.
+
+    Argument ``src_path`` is the path of the file to decode, ``dst_path`` is
+    the path of the file receiving the decoded data.
+
+    Optional ``altchars``, ``validate``, ``padded``, ``ignorechars`` and
+    ``canonical`` have the same meaning as in :func:`b64decode`.
+
+    Both files are memory-mapped, the output file is created with an upper
+    bound of the decoded size then truncated to the decoded size.
+
+    The result is the number of bytes written to ``dst_path``.
+
+    A :exc:`binascii.Error` is raised if the data is incorrectly padded, the
+    output file is removed in this case. A :exc:`ValueError` is raised if
+    ``src_path`` and ``dst_path`` are the same file.
+    """
+    kwargs = _decode_options(
+        validate=validate,
+        padded=padded,
+        ignorechars=ignorechars,
+        canonical=canonical,
+    )
+    _check_distinct_files(src_path, dst_path)
+    with open(src_path, "rb") as src, open(dst_path, "wb+") as dst:  # noqa: PTH123
+        try:
+            size = os.fstat(src.fileno()).st_size
+            if size == 0:
+                # an empty file can't be memory-mapped
+                return b64decode_into(b"", bytearray(), altchars, **kwargs)
+            dst.truncate((size // 4) * 3 + 3)
+            with (
+                mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as src_map,
+                mmap.mmap(dst.fileno(), 0) as dst_map,
+            ):
+                out_len = b64decode_into(src_map, dst_map, altchars, **kwargs)
+            dst.truncate(out_len)
+        except BaseException:
+            dst.close()
+            os.unlink(dst_path)  # noqa: PTH108
+            raise
+    return out_len
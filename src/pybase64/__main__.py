@@ -1,20 +1,277 @@
 from __future__ import annotations
 
-__lazy_modules__ = ["base64", "pathlib", "timeit"]
+__lazy_modules__ = [
+    "base64",
+    "concurrent.futures",
+    "contextlib",
+    "csv",
+    "functools",
+    "json",
+    "pathlib",
+    "random",
+    "re",
+    "threading",
+    "timeit",
+]
 
 import argparse
 import base64
+import csv
+import functools
+import json
+import os
+import random
+import re
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
+from timeit import Timer
 from timeit import default_timer as timer
 
 import pybase64
+from pybase64._calibration import get_cpu_model, get_simd_paths
+
+try:
+    from pybase64._pybase64 import _get_simd_name, _get_simd_path
+except ImportError:
+    from pybase64._fallback import _get_simd_name, _get_simd_path
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import Callable, Sequence
+    from contextlib import AbstractContextManager
     from types import ModuleType
-    from typing import Any
+    from typing import Any, BinaryIO, Final, Literal, NoReturn, TypeVar
+
+    _T = TypeVar("_T")
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+SIZE_UNITS: Final = {"": 1, "K": 1024, "M": 1024 * 1024, "G": 1024 * 1024 * 1024}
+LOG_SIZES: Final = [4**i for i in range(14)]  # 1 byte to 64 MiB
+
+
+class BenchmarkReport:
+    """Collects the benchmark results and writes them in the requested format."""
+
+    FIELDS: Final = (
+        "function",
+        "module",
+        "simd",
+        "altchars",
+        "validate",
+        "ignorechars",
+        "padded",
+        "wrapcol",
+        "size",
+        "iterations",
+        "elapsed",
+        "ns_per_call",
+        "bytes_in",
+        "bytes_out",
+        "gbps",
+        "speedup_plain",
+        "speedup_base64",
+        "threads",
+        "shared",
+        "efficiency",
+    )
+
+    def __init__(self, output_format: str, *, compare: bool, per_call: bool) -> None:
+        self.format = output_format
+        self.compare = compare
+        self.per_call = per_call
+        self.info = {
+            "version": pybase64.get_version(),
+            "cpu": get_cpu_model(),
+            "simd_flags_runtime": getattr(pybase64, "_get_simd_flags_runtime", lambda: 0)(),
+        }
+        self.plain = _get_simd_name(0)
+        self.current_title = ""
+        self.results: list[tuple[str, dict[str, Any]]] = []
+        if self.format == "text":
+            print(__package__ + " " + pybase64.get_version())
+
+    def title(self, title: str) -> None:
+        self.current_title = title
+        if self.format == "text":
+            print(title)
+
+    def add(
+        self,
+        name: str,
+        module: ModuleType,
+        options: dict[str, Any],
+        measure: tuple[int, float] | None,
+        bytes_in: int,
+        bytes_out: int,
+        size: int,
+    ) -> None:
+        simd = None
+        wrapcol = options.get("wrapcol", 0)
+        label = module.__name__ + "." + name + (f"(wrapcol={wrapcol:d})" if wrapcol else "")
+        if module is pybase64:
+            simd = _get_simd_name(_get_simd_path())
+            if self.compare:
+                label = f"{label} ({simd})"
+        label += ":"
+        width = 48 if self.compare else 36
+        if measure is None:
+            # combination unsupported by the module
+            if self.format == "text":
+                print(f"{label:<{width}s}       N/A")
+            return
+        iterations, elapsed = measure
+        if self.format == "text":
+            per_call = f" {elapsed * 1e9 / iterations:10.1f} ns/call" if self.per_call else ""
+            efficiency = ""
+            if "efficiency" in options:
+                efficiency = f", {options['efficiency']:.0%} efficiency"
+            speed = ((iterations * size) / (1024.0 * 1024.0)) / elapsed
+            print(
+                f"{label:<{width}s} {speed:5.0f} MB/s{per_call} "
+                f"({bytes_in:,d} bytes -> {bytes_out:,d} bytes{efficiency})",
+            )
+        altchars = options.get("altchars")
+        ignorechars = options.get("ignorechars")
+        result = {
+            "function": name,
+            "module": module.__name__,
+            "simd": simd,
+            "altchars": None if altchars is None else altchars.decode("ascii"),
+            "validate": options.get("validate"),
+            "ignorechars": None if ignorechars is None else ignorechars.decode("ascii"),
+            "padded": options.get("padded", True),
+            "wrapcol": wrapcol,
+            "size": size,
+            "iterations": iterations,
+            "elapsed": elapsed,
+            "ns_per_call": elapsed * 1e9 / iterations,
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "gbps": (iterations * size) / elapsed / 1e9,
+            "threads": options.get("threads", 1),
+            "shared": options.get("shared"),
+            "efficiency": options.get("efficiency"),
+        }
+        self.results.append((self.current_title, result))
+
+    def compute_speedups(self) -> None:
+        references: dict[tuple[str, str, int], dict[str, float]] = {}
+        for title, result in self.results:
+            key = (title, result["function"], result["wrapcol"])
+            reference = references.setdefault(key, {})
+            if result["module"] == "base64":
+                reference["base64"] = result["gbps"]
+            elif result["simd"] == self.plain:
+                reference["plain"] = result["gbps"]
+        for title, result in self.results:
+            reference = references[(title, result["function"], result["wrapcol"])]
+            result["speedup_plain"] = None
+            result["speedup_base64"] = None
+            if result["module"] != "base64":
+                if reference.get("plain"):
+                    result["speedup_plain"] = result["gbps"] / reference["plain"]
+                if reference.get("base64"):
+                    result["speedup_base64"] = result["gbps"] / reference["base64"]
+
+    def print_comparison(self) -> None:
+        def speedup(value: float | None, width: int) -> str:
+            return f"{'N/A':>{width}s}" if value is None else f"{value:{width - 1}.2f}x"
+
+        rows: dict[tuple[str, str], dict[str, str]] = {}
+        for title, result in self.results:
+            if result["module"] != "base64":
+                function = result["function"]
+                if result["wrapcol"]:
+                    function += f"(wrapcol={result['wrapcol']:d})"
+                rows.setdefault((title, function), {})[result["simd"]] = (
+                    speedup(result["speedup_plain"], 6)
+                    + " /"
+                    + speedup(result["speedup_base64"], 7)
+                )
+        simd_names = list(dict.fromkeys(name for row in rows.values() for name in row))
+        print(f"comparison: speedup over {self.plain} / over base64")
+        current_title = None
+        for (title, function), row in rows.items():
+            if title != current_title:
+                current_title = title
+                print(title)
+                print(f"{'':<36s}" + "".join(f"{name:>17s}" for name in simd_names))
+            cells = [row.get(name, "N/A") for name in simd_names]
+            print(f"{function + ':':<36s}" + "".join(f"{cell:>17s}" for cell in cells))
+
+    def finish(self) -> None:
+        self.compute_speedups()
+        try:
+            if self.format == "text":
+                if self.compare:
+                    self.print_comparison()
+            elif self.format == "json":
+                results = [result for _, result in self.results]
+                json.dump({**self.info, "results": results}, sys.stdout, indent=2)
+                print()
+            else:
+                writer = csv.DictWriter(sys.stdout, fieldnames=(*self.info, *self.FIELDS))
+                writer.writeheader()
+                for _, result in self.results:
+                    writer.writerow({**self.info, **result})
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # the reader went away, e.g. `pybase64 benchmark -f json | head`
+            exit_broken_pipe(sys.stdout.fileno())
+
+
+def exit_broken_pipe(fd: int) -> NoReturn:
+    # remaining output is flushed at exit, redirect it to devnull
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, fd)
+    sys.exit(1)
+
+
+def get_timer(func: Callable[..., object], *args: object, **kwargs: object) -> Timer:
+    # the loop is run by timeit, with the arguments spelled out in the call, in order to keep
+    # the per-call overhead of the benchmark itself low for small inputs
+    names = {f"arg{i:d}": arg for i, arg in enumerate(args)}
+    arguments = ", ".join([*names, *(f"{key}={key}" for key in kwargs)])
+    stmt = f"func({arguments})"
+    return Timer(stmt, globals={"func": func, **names, **kwargs})
+
+
+def measure(
+    duration: float,
+    func: Callable[..., _T],
+    *args: object,
+    **kwargs: object,
+) -> tuple[int, float, _T]:
+    timer_ = get_timer(func, *args, **kwargs)
+    # calibrate the number of iterations then time them
+    number = 1
+    while True:
+        elapsed = timer_.timeit(number)
+        if elapsed >= duration / 8.0:
+            break
+        number *= 2
+    number = max(1, round(number * duration / elapsed))
+    return number, timer_.timeit(number), func(*args, **kwargs)
+
+
+def measure_threads(number: int, timers: list[Timer]) -> float:
+    # each thread runs its own timer for the same number of iterations, all starting together
+    barrier = threading.Barrier(len(timers) + 1)
+
+    def run(timer_: Timer) -> None:
+        barrier.wait()
+        timer_.timeit(number)
+
+    with ThreadPoolExecutor(len(timers)) as executor:
+        futures = [executor.submit(run, timer_) for timer_ in timers]
+        barrier.wait()
+        start = timer()
+        for future in futures:
+            future.result()
+        return timer() - start
 
 
 def bench_one(
@@ -23,115 +280,169 @@ def bench_one(
     module: ModuleType,
     altchars: bytes | None,
     kwargs: dict[str, bool | bytes],
+    report: BenchmarkReport,
 ) -> None:
     duration = duration / 2.0
-    combination_unsupported = all(
-        [
-            module is base64,
-            "ignorechars" in kwargs or "padded" in kwargs,
-            sys.version_info < (3, 15),
-        ],
-    )
+
+    def unsupported(options: dict[str, Any]) -> bool:
+        return all(
+            [
+                module is base64,
+                "ignorechars" in options or "padded" in options or "wrapcol" in options,
+                sys.version_info < (3, 15),
+            ],
+        )
+
     validate = kwargs["validate"]
     if validate and altchars is None and "ignorechars" not in kwargs and "padded" not in kwargs:
         encbytes = module.encodebytes
-        number = 0
-        time = timer()
-        while True:
-            encodedcontent = encbytes(data)
-            number += 1
-            if timer() - time > duration:
-                break
-        iter_ = number
-        time = timer()
-        while iter_ > 0:
-            encodedcontent = encbytes(data)
-            iter_ -= 1
-        time = timer() - time
-        print(
-            "{:<24s} {:5.0f} MB/s ({:,d} bytes -> {:,d} bytes)".format(
-                module.__name__ + "." + encbytes.__name__ + ":",
-                ((number * len(data)) / (1024.0 * 1024.0)) / time,
-                len(data),
-                len(encodedcontent),
-            ),
+        number, time, encodedcontent = measure(duration, encbytes, data)
+        report.add(
+            encbytes.__name__,
+            module,
+            {},
+            (number, time),
+            len(data),
+            len(encodedcontent),
+            len(data),
         )
 
     if validate and "ignorechars" not in kwargs:
-        enc = module.b64encode
-        if combination_unsupported:
-            print("{:<24s}       N/A".format(module.__name__ + "." + enc.__name__ + ":"))
-        else:
-            number = 0
-            time = timer()
-            while True:
-                encodedcontent = enc(data, altchars=altchars)
-                number += 1
-                if timer() - time > duration:
-                    break
-            iter_ = number
-            time = timer()
-            while iter_ > 0:
-                encodedcontent = enc(data, altchars=altchars)
-                iter_ -= 1
-            time = timer() - time
-            print(
-                "{:<24s} {:5.0f} MB/s ({:,d} bytes -> {:,d} bytes)".format(
-                    module.__name__ + "." + enc.__name__ + ":",
-                    ((number * len(data)) / (1024.0 * 1024.0)) / time,
-                    len(data),
-                    len(encodedcontent),
-                ),
+        enc_kwargs: dict[str, Any] = {"altchars": altchars}
+        if "padded" in kwargs:
+            enc_kwargs["padded"] = kwargs["padded"]
+        encoders = [(module.b64encode, enc_kwargs)]
+        if module is pybase64:
+            encoders.append((pybase64.b64encode_as_string, enc_kwargs))
+        encoders.append((module.b64encode, {**enc_kwargs, "wrapcol": 76}))
+        for enc, options in encoders:
+            if unsupported(options):
+                report.add(enc.__name__, module, options, None, 0, 0, 0)
+                continue
+            number, time, encodedcontent = measure(duration, enc, data, **options)
+            report.add(
+                enc.__name__,
+                module,
+                options,
+                (number, time),
+                len(data),
+                len(encodedcontent),
+                len(data),
             )
 
+    padded = bool(kwargs.get("padded", True))
     if kwargs.get("ignorechars") == b"\n" or not validate:
-        encodedcontent = pybase64.b64encode(data, altchars=altchars, wrapcol=76)
-    else:
-        encodedcontent = pybase64.b64encode(data, altchars=altchars)
-    dec = module.b64decode
-    if combination_unsupported:
-        print("{:<24s}       N/A".format(module.__name__ + "." + dec.__name__ + ":"))
+        encodedcontent = pybase64.b64encode(data, altchars=altchars, padded=padded, wrapcol=76)
     else:
-        number = 0
-        time = timer()
-        while True:
-            decodedcontent = dec(encodedcontent, altchars=altchars, **kwargs)
-            number += 1
-            if timer() - time > duration:
-                break
-        iter_ = number
-        time = timer()
-        while iter_ > 0:
-            decodedcontent = dec(encodedcontent, altchars=altchars, **kwargs)
-            iter_ -= 1
-        time = timer() - time
-        print(
-            "{:<24s} {:5.0f} MB/s ({:,d} bytes -> {:,d} bytes)".format(
-                module.__name__ + "." + dec.__name__ + ":",
-                ((number * len(data)) / (1024.0 * 1024.0)) / time,
-                len(encodedcontent),
-                len(data),
-            ),
+        encodedcontent = pybase64.b64encode(data, altchars=altchars, padded=padded)
+    options = {"altchars": altchars, **kwargs}
+    decoders = [module.b64decode]
+    if module is pybase64:
+        decoders.append(pybase64.b64decode_as_bytearray)
+    for dec in decoders:
+        if unsupported(options):
+            report.add(dec.__name__, module, options, None, 0, 0, 0)
+            continue
+        number, time, decodedcontent = measure(duration, dec, encodedcontent, **options)
+        report.add(
+            dec.__name__,
+            module,
+            options,
+            (number, time),
+            len(encodedcontent),
+            len(data),
+            len(data),
         )
         assert decodedcontent == data  # noqa: S101
 
 
+def get_sized_data(data: bytes | None, size: int) -> bytes:
+    if not data:
+        # synthesize reproducible data
+        return random.Random(size).randbytes(size)  # noqa: S311
+    # slice the input, repeating it as needed
+    return (data * (size // len(data) + 1))[:size]
+
+
 def readall(file: str) -> bytes:
     if file == "-":
         return sys.stdin.buffer.read()
     return Path(file).read_bytes()
 
 
-def writeall(file: str, data: bytes) -> None:
+def open_file(file: str, mode: Literal["rb", "wb"]) -> AbstractContextManager[BinaryIO]:
     if file == "-":
-        sys.stdout.buffer.write(data)
-    else:
-        Path(file).write_bytes(data)
+        return nullcontext(sys.stdin.buffer if mode == "rb" else sys.stdout.buffer)
+    return Path(file).open(mode)
+
+
+def transcode(
+    input: str,  # noqa: A002
+    output: str,
+    coder: pybase64.Encoder | pybase64.Decoder,
+    buffer_size: int,
+) -> None:
+    # chunks of whole groups for both encoding & decoding when the input allows it
+    buffer = bytearray(max(12, buffer_size - buffer_size % 12))
+    view = memoryview(buffer)
+    with open_file(input, "rb") as file_in, open_file(output, "wb") as file_out:
+        try:
+            while True:
+                # do not wait for a full buffer, output is written as soon as possible for pipes
+                size = file_in.readinto1(buffer)  # type: ignore[attr-defined]
+                if size == 0:
+                    break
+                file_out.write(coder.update(view[:size]))
+                file_out.flush()
+            file_out.write(coder.finalize())
+        except BrokenPipeError:
+            # the reader went away, e.g. `pybase64 encode file | head`
+            exit_broken_pipe(file_out.fileno())
+
+
+def benchmark(
+    *,
+    duration: float,
+    input: str | None,  # noqa: A002
+    output_format: str,
+    simd_paths: list[int] | None,
+    sizes: list[int] | None,
+    threads: list[int] | None,
+) -> None:
+    report = BenchmarkReport(
+        output_format,
+        compare=simd_paths is not None,
+        per_call=sizes is not None,
+    )
+    data = None if input is None else readall(input)
+    if simd_paths is None:
+        simd_paths = [_get_simd_path()]
+    set_simd_path = getattr(pybase64, "_set_simd_path", lambda _: None)
+    active_simd_path = _get_simd_path()
+    run = benchmark_paths
+    if threads is not None:
+        run = functools.partial(benchmark_threads, threads=[1, *(n for n in threads if n != 1)])
+    try:
+        if sizes is None:
+            assert data is not None  # noqa: S101
+            run(duration, data, "bench:", simd_paths, set_simd_path, report)
+        else:
+            for size in sizes:
+                title = f"bench: size={size:d},"
+                run(duration, get_sized_data(data, size), title, simd_paths, set_simd_path, report)
+    finally:
+        set_simd_path(active_simd_path)
+    report.finish()
 
 
-def benchmark(*, duration: float, input: str) -> None:  # noqa: A002
-    print(__package__ + " " + pybase64.get_version())
-    data = readall(input)
+def benchmark_paths(
+    duration: float,
+    data: bytes,
+    title_prefix: str,
+    simd_paths: list[int],
+    set_simd_path: Callable[[int], None],
+    report: BenchmarkReport,
+) -> None:
     for altchars in [None, b"-_"]:
         for validate in [True, False]:
             for ignorechars in [None, b"", b"\n"]:
@@ -148,26 +459,173 @@ def benchmark(*, duration: float, input: str) -> None:  # noqa: A002
                         kwargs["ignorechars"] = ignorechars
                     if not padded:
                         kwargs["padded"] = padded
-                    title = f"bench: altchars={altchars!r:s}"
+                    title = f"{title_prefix} altchars={altchars!r:s}"
                     if ignorechars is None:
                         title = f"{title}, validate={validate!r:s}"
                     else:
                         title = f"{title}, ignorechars={ignorechars!r:s}"
-                    print(f"{title}, padded={padded!r:s}")
-                    for module in [pybase64, base64]:
-                        bench_one(duration, data, module, altchars, kwargs)
+                    report.title(f"{title}, padded={padded!r:s}")
+                    for simd_path in simd_paths:
+                        set_simd_path(simd_path)
+                        bench_one(duration, data, pybase64, altchars, kwargs, report)
+                    bench_one(duration, data, base64, altchars, kwargs, report)
+
 
+def benchmark_threads(
+    duration: float,
+    data: bytes,
+    title_prefix: str,
+    simd_paths: list[int],
+    set_simd_path: Callable[[int], None],
+    report: BenchmarkReport,
+    threads: list[int],
+) -> None:
+    encoded = pybase64.b64encode(data)
+    cases: list[tuple[Callable[..., Any], bytes, dict[str, Any]]] = [
+        (pybase64.b64encode, data, {}),
+        (pybase64.b64decode, encoded, {"validate": True}),
+    ]
+    # single-threaded references, each thread then does the same work
+    references: dict[tuple[int, int], tuple[int, float, int]] = {}
+    for simd_path in simd_paths:
+        set_simd_path(simd_path)
+        for i, (func, input_, kwargs) in enumerate(cases):
+            number, _, output = measure(duration / 2.0, func, input_, **kwargs)
+            elapsed = measure_threads(number, [get_timer(func, input_, **kwargs)])
+            references[(simd_path, i)] = (number, elapsed, len(output))
+    for count in threads:
+        for shared in [True, False]:
+            if count == 1 and not shared:
+                continue
+            input_kind = "shared" if shared else "unshared"
+            report.title(f"{title_prefix} threads={count:d}, input={input_kind}")
+            for simd_path in simd_paths:
+                set_simd_path(simd_path)
+                for i, (func, input_, kwargs) in enumerate(cases):
+                    number, reference, output_size = references[(simd_path, i)]
+                    elapsed = reference
+                    if count > 1:
+                        inputs = [input_] * count
+                        if not shared:
+                            inputs = [bytes(bytearray(input_)) for _ in range(count)]
+                        timers = [get_timer(func, item, **kwargs) for item in inputs]
+                        elapsed = measure_threads(number, timers)
+                    options = {
+                        **kwargs,
+                        "threads": count,
+                        "shared": shared,
+                        "efficiency": reference / elapsed,
+                    }
+                    report.add(
+                        func.__name__,
+                        pybase64,
+                        options,
+                        (number * count, elapsed),
+                        len(input_),
+                        output_size,
+                        len(data),
+                    )
 
-def encode(*, input: str, altchars: bytes | None, output: str) -> None:  # noqa: A002
-    data = readall(input)
-    data = pybase64.b64encode(data, altchars)
-    writeall(output, data)
 
+def use_file_api(input: str, output: str) -> bool:  # noqa: A002
+    # regular files are memory-mapped, other files are streamed
+    if input == "-" or output == "-":
+        return False
+    output_path = Path(output)
+    return Path(input).is_file() and (output_path.is_file() or not output_path.exists())
 
-def decode(*, input: str, altchars: bytes | None, validate: bool, output: str) -> None:  # noqa: A002
-    data = readall(input)
-    data = pybase64.b64decode(data, altchars, validate)
-    writeall(output, data)
+
+def encode_file(input: str, output: str, *, altchars: bytes | None, buffer_size: int) -> None:  # noqa: A002
+    if use_file_api(input, output):
+        pybase64.encode_file(input, output, altchars)
+    else:
+        transcode(input, output, pybase64.Encoder(altchars), buffer_size)
+
+
+def decode_file(
+    input: str,  # noqa: A002
+    output: str,
+    *,
+    altchars: bytes | None,
+    validate: bool,
+    buffer_size: int,
+) -> None:
+    if use_file_api(input, output):
+        pybase64.decode_file(input, output, altchars, validate)
+    else:
+        transcode(input, output, pybase64.Decoder(altchars, validate), buffer_size)
+
+
+def process_files(
+    command: str,
+    func: Callable[[str, str], None],
+    files: list[tuple[str, str]],
+    jobs: int,
+) -> None:
+    def process_file(file: tuple[str, str]) -> Exception | None:
+        try:
+            func(*file)
+        except Exception as exc:  # noqa: BLE001
+            return exc
+        return None
+
+    time = timer()
+    # the C extension releases the GIL while encoding/decoding
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        errors = list(executor.map(process_file, files))
+    time = timer() - time
+    failed = []
+    size = 0
+    for (input_, _), error in zip(files, errors):
+        if error is None:
+            size += Path(input_).stat().st_size
+        else:
+            failed.append(input_)
+            print(f"{__package__} {command}: error: {input_}: {error}", file=sys.stderr)
+    count = len(files) - len(failed)
+    speed = (size / (1024.0 * 1024.0)) / max(time, 1e-9)
+    print(
+        f"{command}d {count:,d} files, {size:,d} bytes in {time:.3f} s ({speed:.0f} MB/s)",
+        file=sys.stderr,
+    )
+    if failed:
+        msg = f"{__package__} {command}: failed: {', '.join(failed)}"
+        raise SystemExit(msg)
+
+
+def encode(
+    *,
+    files: list[tuple[str, str]],
+    batch: bool,
+    altchars: bytes | None,
+    jobs: int,
+    buffer_size: int,
+) -> None:
+    def func(input_: str, output: str) -> None:
+        encode_file(input_, output, altchars=altchars, buffer_size=buffer_size)
+
+    if batch:
+        process_files("encode", func, files, jobs)
+    else:
+        func(*files[0])
+
+
+def decode(
+    *,
+    files: list[tuple[str, str]],
+    batch: bool,
+    altchars: bytes | None,
+    validate: bool,
+    jobs: int,
+    buffer_size: int,
+) -> None:
+    def func(input_: str, output: str) -> None:
+        decode_file(input_, output, altchars=altchars, validate=validate, buffer_size=buffer_size)
+
+    if batch:
+        process_files("decode", func, files, jobs)
+    else:
+        func(*files[0])
 
 
 class LicenseAction(argparse.Action):
@@ -207,6 +665,150 @@ def check_file(value: str, *, is_input: bool) -> str:
     return str(path.parent.resolve(strict=True) / path.name)
 
 
+def check_positive_int(value: str) -> int:
+    result = int(value)
+    if result < 1:
+        msg = f"invalid positive integer: {value!r}"
+        raise argparse.ArgumentTypeError(msg)
+    return result
+
+
+def check_simd_paths(value: str) -> list[int]:
+    if not hasattr(pybase64, "_set_simd_path"):
+        msg = "SIMD paths can only be selected with the C extension"
+        raise argparse.ArgumentTypeError(msg)
+    names = get_simd_paths()
+    if value == "all":
+        return list(names.values())
+    result: list[int] = []
+    for name in value.split(","):
+        flag = names.get(name.strip().lower())
+        if flag is None:
+            msg = f"SIMD path not available: {name!r} (choose from {', '.join(names)})"
+            raise argparse.ArgumentTypeError(msg)
+        if flag not in result:
+            result.append(flag)
+    return result
+
+
+def check_sizes(value: str) -> list[int]:
+    if value == "log":
+        return LOG_SIZES
+    result: list[int] = []
+    for item in value.split(","):
+        match = re.fullmatch(r"(\d+)([KMG]?)", item.strip().upper())
+        if match is None or int(match.group(1)) < 1:
+            msg = f"invalid size: {item!r}"
+            raise argparse.ArgumentTypeError(msg)
+        size = int(match.group(1)) * SIZE_UNITS[match.group(2)]
+        if size not in result:
+            result.append(size)
+    return result
+
+
+def check_threads(value: str) -> list[int]:
+    result: list[int] = []
+    for item in value.split(","):
+        count = check_positive_int(item)
+        if count not in result:
+            result.append(count)
+    return result
+
+
+def check_directory(value: str) -> str:
+    path = Path(value).resolve(strict=True)
+    if not path.is_dir():
+        msg = f"not a directory: {value!r}"
+        raise argparse.ArgumentTypeError(msg)
+    return str(path)
+
+
+def add_files_arguments(parser: argparse.ArgumentParser, action: str) -> None:
+    parser.register("type", "input file", lambda s: check_file(s, is_input=True))
+    parser.register("type", "output file", lambda s: check_file(s, is_input=False))
+    parser.add_argument(
+        "inputs",
+        metavar="input",
+        type="input file",
+        nargs="+",
+        help=f"input file to be {action}",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        dest="output",
+        type="output file",
+        default=None,
+        help=f"{action} output file for a single input (default to stdout)",
+    )
+    parser.add_argument(
+        "-O",
+        "--output-dir",
+        metavar="DIR",
+        dest="output_dir",
+        type=check_directory,
+        default=None,
+        help=f"directory of the {action} output files (default to the input file directory)",
+    )
+    parser.add_argument(
+        "-s",
+        "--suffix",
+        dest="suffix",
+        default=None,
+        help=f"suffix appended to the input file name to get the {action} output file name",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        dest="jobs",
+        type=check_positive_int,
+        default=1,
+        help="number of files processed in parallel with --output-dir or --suffix (default to 1)",
+    )
+    parser.add_argument(
+        "-b",
+        "--buffer-size",
+        metavar="N",
+        dest="buffer_size",
+        type=check_positive_int,
+        default=DEFAULT_BUFFER_SIZE,
+        help=(
+            "size of the chunks read from the input when not using regular files "
+            f"(default to {DEFAULT_BUFFER_SIZE:d} bytes)"
+        ),
+    )
+
+
+def get_files(
+    parser: argparse.ArgumentParser,
+    inputs: list[str],
+    output: str | None,
+    output_dir: str | None,
+    suffix: str | None,
+) -> list[tuple[str, str]]:
+    if output_dir is None and suffix is None:
+        if len(inputs) > 1:
+            parser.error("multiple inputs require --output-dir or --suffix")
+        files = [(inputs[0], "-" if output is None else output)]
+    else:
+        if output is not None:
+            parser.error("--output can't be used with --output-dir or --suffix")
+        if "-" in inputs:
+            parser.error("stdin can't be used with --output-dir or --suffix")
+        files = []
+        for input_ in inputs:
+            input_path = Path(input_)
+            directory = input_path.parent if output_dir is None else Path(output_dir)
+            files.append((input_, str(directory / (input_path.name + (suffix or "")))))
+        if len({output for _, output in files}) != len(files):
+            parser.error("multiple inputs have the same output file")
+    for input_, output_ in files:
+        if output_ != "-" and output_ in inputs:
+            parser.error(f"input and output must be different files: {input_}")
+    return files
+
+
 def main(argv: Sequence[str] | None = None) -> None:
     # main parser
     parser = argparse.ArgumentParser(
@@ -233,18 +835,61 @@ def main(argv: Sequence[str] | None = None) -> None:
         default=1.0,
         help="expected duration for a single encode or decode test",
     )
+    benchmark_parser.add_argument(
+        "-f",
+        "--format",
+        dest="output_format",
+        choices=["text", "json", "csv"],
+        default="text",
+        help="output format (default to text)",
+    )
+    benchmark_parser.add_argument(
+        "--simd",
+        metavar="PATHS",
+        dest="simd_paths",
+        type=check_simd_paths,
+        default=None,
+        help=(
+            "benchmark each of the comma-separated SIMD paths (e.g. plain,avx2) or all "
+            "the paths available on this CPU and compare them (default to the active path)"
+        ),
+    )
+    benchmark_parser.add_argument(
+        "-s",
+        "--sizes",
+        metavar="SIZES",
+        dest="sizes",
+        type=check_sizes,
+        default=None,
+        help=(
+            "benchmark each of the comma-separated input sizes (e.g. 1,16,4K,1M) or "
+            "a log sweep from 1 byte to 64 MiB with 'log', slicing the input file "
+            "or synthesizing data when there is none"
+        ),
+    )
+    benchmark_parser.add_argument(
+        "-t",
+        "--threads",
+        metavar="COUNTS",
+        dest="threads",
+        type=check_threads,
+        default=None,
+        help=(
+            "measure how b64encode and b64decode scale with each of the comma-separated "
+            "thread counts (e.g. 1,2,4,8), on shared and unshared inputs"
+        ),
+    )
     benchmark_parser.register("type", "input file", lambda s: check_file(s, is_input=True))
     benchmark_parser.add_argument(
         "input",
         type="input file",
-        help="input file used for the benchmark",
+        nargs="?",
+        default=None,
+        help="input file used for the benchmark (optional with --sizes)",
     )
     benchmark_parser.set_defaults(func=benchmark)
     # encode parser
     encode_parser = subparsers.add_parser("encode", help="-h for usage")
-    encode_parser.register("type", "input file", lambda s: check_file(s, is_input=True))
-    encode_parser.register("type", "output file", lambda s: check_file(s, is_input=False))
-    encode_parser.add_argument("input", type="input file", help="input file to be encoded")
     group = encode_parser.add_mutually_exclusive_group()
     group.add_argument(
         "-u",
@@ -260,20 +905,10 @@ def main(argv: Sequence[str] | None = None) -> None:
         dest="altchars",
         help="use alternative characters for encoding",
     )
-    encode_parser.add_argument(
-        "-o",
-        "--output",
-        dest="output",
-        type="output file",
-        default="-",
-        help="encoded output file (default to stdout)",
-    )
+    add_files_arguments(encode_parser, "encoded")
     encode_parser.set_defaults(func=encode)
     # decode parser
     decode_parser = subparsers.add_parser("decode", help="-h for usage")
-    decode_parser.register("type", "input file", lambda s: check_file(s, is_input=True))
-    decode_parser.register("type", "output file", lambda s: check_file(s, is_input=False))
-    decode_parser.add_argument("input", type="input file", help="input file to be decoded")
     group = decode_parser.add_mutually_exclusive_group()
     group.add_argument(
         "-u",
@@ -289,20 +924,13 @@ def main(argv: Sequence[str] | None = None) -> None:
         dest="altchars",
         help="use alternative characters for decoding",
     )
-    decode_parser.add_argument(
-        "-o",
-        "--output",
-        dest="output",
-        type="output file",
-        default="-",
-        help="decoded output file (default to stdout)",
-    )
     decode_parser.add_argument(
         "--no-validation",
         dest="validate",
         action="store_false",
         help="disable validation of the input data",
     )
+    add_files_arguments(decode_parser, "decoded")
     decode_parser.set_defaults(func=decode)
     # ready, parse
     if argv is None:
@@ -310,6 +938,19 @@ def main(argv: Sequence[str] | None = None) -> None:
     if len(argv) == 0:
         argv = ["-h"]
     args = vars(parser.parse_args(args=argv))
+    if args.get("func") is benchmark and args["input"] is None and args["sizes"] is None:
+        benchmark_parser.error("an input file or --sizes is required")
+    if "inputs" in args:
+        output_dir = args.pop("output_dir")
+        suffix = args.pop("suffix")
+        args["batch"] = output_dir is not None or suffix is not None
+        args["files"] = get_files(
+            parser,
+            args.pop("inputs"),
+            args.pop("output"),
+            output_dir,
+            suffix,
+        )
     func = args.pop("func")
     func(**args)
 
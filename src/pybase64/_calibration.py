@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import os
+import sys
+from time import perf_counter
+
+try:
+    from pybase64._pybase64 import (
+        _get_simd_flags_compile,
+        _get_simd_flags_runtime,
+        _get_simd_name,
+        _set_simd_path,
+        b64decode,
+        b64encode,
+    )
+
+    _has_extension = True
+except ImportError:
+    _has_extension = False
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Final
+
+
+_CACHE_FILE: Final = "simd-calibration.txt"
+_SIZES: Final = (64, 4 * 1024, 64 * 1024)  # mixed workload, from tokens to payloads
+_WORKLOAD_BYTES: Final = 256 * 1024  # bytes processed per size and per round
+
+
+def get_cpu_model() -> str:
+    # no subprocess, this is called at import when a cache file exists
+    try:
+        with open("/proc/cpuinfo") as f:  # noqa: PTH123
+            for line in f:
+                key, _, value = line.partition(":")
+                if key.strip() in {"model name", "Processor", "cpu model"}:
+                    return value.strip()
+    except OSError:
+        pass
+    if sys.platform == "win32":
+        return os.environ.get("PROCESSOR_IDENTIFIER", "")
+    # the CPU flags in the cache key tell the other CPUs apart
+    return os.uname().machine
+
+
+def get_simd_paths() -> dict[str, int]:
+    """Return the SIMD paths available on this CPU, by name, from the narrowest."""
+    if not _has_extension:
+        return {}
+    flags = _get_simd_flags_runtime() & _get_simd_flags_compile()
+    paths = {"plain": 0}
+    for i in range(32):
+        if flags & (1 << i):
+            paths[_get_simd_name(1 << i).lower()] = 1 << i
+    return paths
+
+
+def get_cache_path() -> str:
+    # os.path rather than pathlib, this is called at import
+    cache_dir = os.environ.get("PYBASE64_CACHE_DIR")
+    if cache_dir:
+        return os.path.join(cache_dir, _CACHE_FILE)  # noqa: PTH118
+    if sys.platform == "win32":
+        local = os.environ.get("LOCALAPPDATA")
+        base = local or os.path.expanduser("~/AppData/Local")  # noqa: PTH111
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")  # noqa: PTH111
+    return os.path.join(base, "pybase64", _CACHE_FILE)  # noqa: PTH118
+
+
+def _get_cache_key() -> str:
+    from pybase64._version import _version  # noqa: PLC0415
+
+    flags = _get_simd_flags_runtime()
+    return f"{_version:s} {flags:d} {get_cpu_model():s}"
+
+
+def _load_cache(path: str) -> dict[str, str]:
+    entries = {}
+    try:
+        with open(path, encoding="utf-8") as f:  # noqa: PTH123
+            for line in f:
+                key, sep, name = line.rstrip("\n").rpartition("\t")
+                if sep:
+                    entries[key] = name
+    except (OSError, ValueError):
+        # unreadable or corrupted cache, calibrated again on request
+        pass
+    return entries
+
+
+def _save_cache(path: str, key: str, name: str) -> None:
+    entries = _load_cache(path)
+    entries[key] = name
+    # write then rename, concurrent readers see either the old or the new cache
+    tmp_path = f"{path:s}.{os.getpid():d}"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)  # noqa: PTH103, PTH120
+        with open(tmp_path, "w", encoding="utf-8") as f:  # noqa: PTH123
+            f.writelines(f"{k:s}\t{v:s}\n" for k, v in entries.items())
+        os.replace(tmp_path, path)  # noqa: PTH105
+    except OSError:
+        # the calibration is only lost for later imports, it is not an error
+        pass
+
+
+def _measure(data: list[tuple[bytes, bytes, int]]) -> float:
+    encode = b64encode
+    decode = b64decode
+    start = perf_counter()
+    for raw, encoded, number in data:
+        for _ in range(number):
+            encode(raw)
+            decode(encoded, validate=True)
+    return perf_counter() - start
+
+
+def calibrate(*, rounds: int = 5, save: bool = True) -> str:
+    """Select the fastest SIMD path for this CPU with a short micro-benchmark.
+
+    Each SIMD path available on this CPU is timed on a mix of small and large
+    encoding/decoding calls, ``rounds`` times, interleaved. The fastest one is
+    made active.
+
+    When ``save`` is :data:`True`, the result is saved in a cache per CPU model
+    and loaded by later imports of :mod:`pybase64` without re-running the
+    micro-benchmark. The cache lives in ``$PYBASE64_CACHE_DIR`` when set, or in
+    the user cache directory otherwise.
+
+    The result is the name of the selected SIMD path, as reported by
+    :func:`get_version`.
+    """
+    if rounds < 1:
+        msg = "rounds must be a positive integer"
+        raise ValueError(msg)
+    if not _has_extension:
+        return "fallback"
+    data = []
+    for size in _SIZES:
+        raw = bytes(i % 256 for i in range(size))
+        data.append((raw, b64encode(raw), _WORKLOAD_BYTES // size))
+    paths = get_simd_paths()
+    timings = dict.fromkeys(paths.values(), float("inf"))
+    try:
+        for _ in range(rounds):
+            for flag in timings:
+                _set_simd_path(flag)
+                timings[flag] = min(timings[flag], _measure(data))
+    finally:
+        best = min(timings, key=timings.__getitem__)
+        _set_simd_path(best)
+    name = _get_simd_name(best)
+    if save:
+        _save_cache(get_cache_path(), _get_cache_key(), name)
+    return name
+
+
+def select_simd_path() -> None:
+    """Select the SIMD path at import.
+
+    ``$PYBASE64_SIMD`` takes precedence, then a cached calibration for this CPU. When
+    there is none and ``$PYBASE64_CALIBRATE`` is set, the calibration is run and saved.
+    The widest path selected by the extension is kept otherwise.
+    """
+    if not _has_extension:
+        return
+    override = os.environ.get("PYBASE64_SIMD", "").strip().lower()
+    if override not in {"", "auto"}:
+        paths = get_simd_paths()
+        if override not in paths:
+            import warnings  # noqa: PLC0415
+
+            msg = (
+                f"PYBASE64_SIMD={override!r} is not available on this CPU, "
+                f"expected one of auto, {', '.join(paths)}"
+            )
+            warnings.warn(msg, RuntimeWarning, stacklevel=3)
+            return
+        _set_simd_path(paths[override])
+        return
+    path = get_cache_path()
+    if os.path.exists(path):  # noqa: PTH110
+        name = _load_cache(path).get(_get_cache_key())
+        paths = get_simd_paths()
+        # "No SIMD" is reported for the plain path
+        paths[_get_simd_name(0).lower()] = 0
+        if name is not None and name.lower() in paths:
+            _set_simd_path(paths[name.lower()])
+            return
+        # a stale or unknown name is ignored, the default path is kept
+    if os.environ.get("PYBASE64_CALIBRATE", "0") not in {"", "0"}:
+        calibrate()
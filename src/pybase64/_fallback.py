@@ -1,18 +1,23 @@
 from __future__ import annotations
 
+__lazy_modules__ = ["inspect"]
+
+import inspect
 import sys
+from array import array
 from base64 import b64decode as builtin_decode
 from base64 import b64encode as builtin_encode
 from base64 import encodebytes as builtin_encodebytes
 from binascii import Error as BinAsciiError
 
-from pybase64._unspecified import _Unspecified
+from pybase64._unspecified import _decode_options, _Unspecified
 
 TYPE_CHECKING = False
 if TYPE_CHECKING:
+    from collections.abc import Iterable
     from typing import Final, Literal
 
-    from pybase64._typing import Buffer
+    from pybase64._typing import Buffer, Explanation
 
 
 _SLOW_VALIDATION: Final = sys.version_info[:2] < (3, 13)  # fast/correct validation in CPython 3.13+
@@ -20,6 +25,24 @@ _PYTHON_3_15_API: Final = sys.version_info[:2] >= (3, 15)
 _BYTES_TYPES: Final = (bytes, bytearray)  # Types acceptable as binary data
 _EQUAL_ASCII: Final = 61  # '='
 _UNSPECIFIED: Final = _Unspecified.UNSPECIFIED
+# name of the argument holding the data, for the functions supported by explain()
+_EXPLAIN_DATA: Final = {
+    "b64encode": "s",
+    "b64encode_as_string": "s",
+    "b64encode_into": "s",
+    "b64encode_many": "items",
+    "b64encode_packed": "data",
+    "encodebytes": "s",
+    "b64decode": "s",
+    "b64decode_as_bytearray": "s",
+    "b64decode_into": "s",
+    "b64decode_many": "items",
+    "b64decode_packed": "items",
+    "b64decoded_length": "s",
+    "b64validate": "s",
+    "Codec.encode": "s",
+    "Codec.decode": "s",
+}
 
 if not _PYTHON_3_15_API:
     # we consider '=' part of the alphabet, it will be handled separately
@@ -37,6 +60,75 @@ def _get_simd_path() -> int:
     return 0
 
 
+def _get_stats() -> dict[str, dict[str, dict[str, int]]]:
+    # statistics are only collected by the C extension
+    return {}
+
+
+def _reset_stats() -> None:
+    pass
+
+
+def _set_stats_enabled(enabled: bool) -> bool:  # noqa: ARG001
+    return False
+
+
+def _explain(name: str, /, *args: object, **kwargs: object) -> Explanation:
+    # base64/binascii do the work, there is no internal path to report
+    if name not in _EXPLAIN_DATA:
+        msg = f"{name:s} is not supported"
+        raise ValueError(msg)
+    if name.startswith("Codec."):
+        if not args or not isinstance(args[0], Codec):
+            msg = "expected a Codec"
+            raise TypeError(msg)
+        func = getattr(args[0], name[6:])
+        args = args[1:]
+    else:
+        func = globals()[name]
+    # as in the C extension, arguments are checked but the data is only checked for its type
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    decode = "decode" in name or name == "b64validate"
+    data = bound.arguments[_EXPLAIN_DATA[name]]
+    if name == "b64encode_packed":
+        _get_offsets(bound.arguments["offsets"], _check_data(data, allow_str=False))
+        bound.arguments["offsets"] = array("q", [0])
+        bound.arguments["data"] = b""
+    elif _EXPLAIN_DATA[name] == "items":
+        sequence = list(data)
+        try:
+            for index in range(len(sequence)):
+                _check_data(sequence[index], allow_str=decode)
+        except (BufferError, TypeError, ValueError) as e:
+            msg = f"item {index:d}: {e!s}"
+            raise type(e)(msg) from None
+        bound.arguments["items"] = []
+    else:
+        size = _check_data(data, allow_str=decode)
+        bound.arguments["s"] = b""
+    func(*bound.args, **bound.kwargs)
+    if name == "b64encode_into":
+        arguments = bound.arguments
+        out_len = b64encoded_length(size, padded=arguments["padded"], wrapcol=arguments["wrapcol"])
+        _check_output_size(out_len, len(_get_writable_view(arguments["out"], arguments["offset"])))
+    return {"path": "fallback"}
+
+
+def _check_data(s: object, *, allow_str: bool) -> int:
+    # same checks as _get_bytes without a copy, returns the length of the data
+    if isinstance(s, str) and allow_str:
+        if not s.isascii():
+            msg = "string argument should contain only ASCII characters"
+            raise ValueError(msg)
+        return len(s)
+    mv = memoryview(s)  # type: ignore[arg-type]
+    if not mv.c_contiguous:
+        msg = f"{s.__class__.__name__!r:s}: underlying buffer is not C-contiguous"
+        raise BufferError(msg)
+    return mv.nbytes
+
+
 def _get_bytes(s: str | Buffer, *, allow_str: bool = True) -> bytes | bytearray:
     if isinstance(s, str):
         if not allow_str:
@@ -63,6 +155,72 @@ def _get_bytes(s: str | Buffer, *, allow_str: bool = True) -> bytes | bytearray:
         raise TypeError(msg) from None
 
 
+def _get_writable_view(b: Buffer, offset: int) -> memoryview:
+    mv = memoryview(b)
+    if mv.readonly:
+        msg = f"{b.__class__.__name__!r:s}: underlying buffer is not writable"
+        raise BufferError(msg)
+    if not mv.c_contiguous:
+        msg = f"{b.__class__.__name__!r:s}: underlying buffer is not C-contiguous"
+        raise BufferError(msg)
+    mv = mv.cast("B")
+    if offset < 0 or offset > len(mv):
+        msg = f"offset {offset:d} out of range for a buffer of {len(mv):d} bytes"
+        raise ValueError(msg)
+    return mv[offset:]
+
+
+def _check_output_size(size: int, available: int) -> None:
+    if size > available:
+        msg = f"output buffer too small, {size:d} bytes needed, {available:d} available"
+        raise ValueError(msg)
+
+
+def _write_into(data: bytes, mv: memoryview) -> int:
+    _check_output_size(len(data), len(mv))
+    mv[: len(data)] = data
+    return len(data)
+
+
+def _check_threads(threads: int) -> None:
+    # the fallback implementation is single-threaded
+    if threads < 1:
+        msg = "threads must be >= 1"
+        raise ValueError(msg)
+
+
+def _get_offsets(offsets: Buffer, len_: int) -> memoryview:
+    mv = memoryview(offsets)
+    if mv.itemsize != 8 or mv.format.lstrip("@=") not in {"q", "l"}:
+        msg = "offsets must be a buffer of int64 values"
+        raise TypeError(msg)
+    if not mv.c_contiguous:
+        msg = f"{offsets.__class__.__name__!r:s}: underlying buffer is not C-contiguous"
+        raise BufferError(msg)
+    mv = mv.cast("B").cast("q")
+    if len(mv) == 0:
+        msg = "offsets must contain at least one value"
+        raise ValueError(msg)
+    if mv[0] < 0:
+        msg = "offsets must be non-negative"
+        raise ValueError(msg)
+    for i in range(len(mv) - 1):
+        if mv[i + 1] < mv[i]:
+            msg = f"offsets must be non-decreasing, offsets[{i:d}] > offsets[{i + 1:d}]"
+            raise ValueError(msg)
+    if mv[-1] > len_:
+        msg = f"offsets[{len(mv) - 1:d}] out of range for data of {len_:d} bytes"
+        raise ValueError(msg)
+    return mv
+
+
+def _pack(items: list[bytes]) -> tuple[bytearray, array[int]]:
+    offsets = array("q", [0])
+    for item in items:
+        offsets.append(offsets[-1] + len(item))
+    return bytearray().join(items), offsets
+
+
 def _validate_altchars(altchars: bytes | bytearray) -> bytes | bytearray | None:
     if len(altchars) != 2:
         msg = "len(altchars) != 2"
@@ -80,6 +238,7 @@ def b64decode(  # noqa: C901
     padded: bool = True,
     ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
     canonical: bool = False,
+    threads: int = 1,
 ) -> bytes:
     """Decode bytes encoded with the standard Base64 alphabet.
 
@@ -110,11 +269,15 @@ def b64decode(  # noqa: C901
 
     If ``canonical`` is ``True``, non-zero padding bits are rejected.
 
+    Optional ``threads`` specifies the maximum number of threads used to decode
+    large inputs when ``validate`` is ``True`` and ``ignorechars`` is not specified.
+
     The result is returned as a :class:`bytes` object.
 
     A :exc:`binascii.Error` is raised if ``s`` is incorrectly padded.
     """
     s = _get_bytes(s)
+    _check_threads(threads)
     has_bad_chars = False
     if altchars is not None:
         altchars = _validate_altchars(_get_bytes(altchars))
@@ -258,6 +421,7 @@ def b64decode_as_bytearray(
     padded: bool = True,
     ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
     canonical: bool = False,
+    threads: int = 1,
 ) -> bytearray:
     """Decode bytes encoded with the standard Base64 alphabet.
 
@@ -288,6 +452,9 @@ def b64decode_as_bytearray(
 
     If ``canonical`` is ``True``, non-zero padding bits are rejected.
 
+    Optional ``threads`` specifies the maximum number of threads used to decode
+    large inputs when ``validate`` is ``True`` and ``ignorechars`` is not specified.
+
     The result is returned as a :class:`bytearray` object.
 
     A :exc:`binascii.Error` is raised if ``s`` is incorrectly padded.
@@ -300,16 +467,199 @@ def b64decode_as_bytearray(
             padded=padded,
             ignorechars=ignorechars,
             canonical=canonical,
+            threads=threads,
         ),
     )
 
 
+def b64decode_into(
+    s: str | Buffer,
+    out: Buffer,
+    altchars: str | Buffer | None = None,
+    validate: bool | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+    *,
+    padded: bool = True,
+    ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+    canonical: bool = False,
+    offset: int = 0,
+) -> int:
+    """Decode bytes encoded with the standard Base64 alphabet into a writable buffer.
+
+    Argument ``s`` is a :term:`bytes-like object` or ASCII string to
+    decode.
+
+    Argument ``out`` is a writable :term:`bytes-like object` receiving the
+    decoded data starting at byte ``offset``.
+
+    Optional ``altchars``, ``validate``, ``padded``, ``ignorechars`` and
+    ``canonical`` have the same meaning as in :func:`b64decode`.
+
+    The result is the number of bytes written to ``out``.
+
+    A :exc:`binascii.Error` is raised if ``s`` is incorrectly padded.
+
+    A :exc:`ValueError` is raised if the decoded data does not fit in ``out``.
+    """
+    kwargs = _decode_options(
+        validate=validate,
+        padded=padded,
+        ignorechars=ignorechars,
+        canonical=canonical,
+    )
+    # decode first, no view on out is kept alive by a decoding error
+    data = b64decode(s, altchars, **kwargs)
+    return _write_into(data, _get_writable_view(out, offset))
+
+
+def b64decoded_length(
+    s: str | Buffer,
+    altchars: str | Buffer | None = None,
+    validate: bool | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+    *,
+    padded: bool = True,
+    ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+    canonical: bool = False,
+) -> int:
+    """Compute the exact length of the data decoded from ``s``.
+
+    Argument ``s`` is a :term:`bytes-like object` or ASCII string to
+    decode.
+
+    Optional ``altchars``, ``validate``, ``padded``, ``ignorechars`` and
+    ``canonical`` have the same meaning as in :func:`b64decode`.
+
+    The result is the number of bytes :func:`b64decode` would return, the
+    decoded data is not kept.
+
+    A :exc:`binascii.Error` is raised if ``s`` is incorrectly padded.
+    """
+    kwargs = _decode_options(
+        validate=validate,
+        padded=padded,
+        ignorechars=ignorechars,
+        canonical=canonical,
+    )
+    return len(b64decode(s, altchars, **kwargs))
+
+
+def b64validate(
+    s: str | Buffer,
+    altchars: str | Buffer | None = None,
+    validate: bool | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+    *,
+    padded: bool = True,
+    ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+    canonical: bool = False,
+) -> bool:
+    """Check if ``s`` can be decoded.
+
+    Argument ``s`` is a :term:`bytes-like object` or ASCII string to
+    check.
+
+    Optional ``altchars``, ``validate``, ``padded``, ``ignorechars`` and
+    ``canonical`` have the same meaning as in :func:`b64decode`.
+
+    The result is ``True`` if :func:`b64decode` would succeed, ``False`` if
+    it would raise a :exc:`binascii.Error`. The decoded data is not kept.
+    """
+    try:
+        b64decoded_length(
+            s,
+            altchars,
+            validate,
+            padded=padded,
+            ignorechars=ignorechars,
+            canonical=canonical,
+        )
+    except BinAsciiError:
+        return False
+    return True
+
+
+def b64decode_many(
+    items: Iterable[str | Buffer],
+    altchars: str | Buffer | None = None,
+    validate: bool | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+    *,
+    padded: bool = True,
+    ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+    canonical: bool = False,
+) -> list[bytes]:
+    """Decode each item of an iterable encoded with the standard Base64 alphabet.
+
+    Argument ``items`` is an iterable of :term:`bytes-like objects <bytes-like object>`
+    or ASCII strings to decode.
+
+    Optional ``altchars``, ``validate``, ``padded``, ``ignorechars`` and
+    ``canonical`` have the same meaning as in :func:`b64decode`.
+
+    The result is returned as a :class:`list` of :class:`bytes` objects.
+
+    A :exc:`binascii.Error` is raised if an item is incorrectly padded, the
+    message starts with the index of the failing item.
+    """
+    kwargs = _decode_options(
+        validate=validate,
+        padded=padded,
+        ignorechars=ignorechars,
+        canonical=canonical,
+    )
+    # checks arguments once
+    b64decode(b"", altchars, **kwargs)
+    # the iterable is consumed before encoding/decoding, as in the C extension
+    sequence = list(items)
+    result = [b""] * len(sequence)
+    try:
+        for index, s in enumerate(sequence):
+            result[index] = b64decode(s, altchars, **kwargs)
+    except (BufferError, TypeError, ValueError) as e:
+        msg = f"item {index:d}: {e!s}"
+        raise type(e)(msg) from None
+    return result
+
+
+def b64decode_packed(
+    items: Iterable[str | Buffer],
+    altchars: str | Buffer | None = None,
+    validate: bool | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+    *,
+    padded: bool = True,
+    ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+    canonical: bool = False,
+) -> tuple[bytearray, array[int]]:
+    """Decode the items of an iterable using the standard Base64 alphabet into a packed buffer.
+
+    Argument ``items`` is an iterable of :term:`bytes-like objects <bytes-like object>`
+    or ASCII strings to decode.
+
+    Optional ``altchars``, ``validate``, ``padded``, ``ignorechars`` and
+    ``canonical`` have the same meaning as in :func:`b64decode`.
+
+    The result is returned as a tuple ``(data, offsets)`` where ``data`` is a
+    :class:`bytearray` object and ``offsets`` an :class:`array.array` of type
+    ``'q'`` with one more element than ``items``. The decoded item ``i`` is
+    ``data[offsets[i]:offsets[i + 1]]``.
+
+    A :exc:`binascii.Error` is raised if an item is incorrectly padded, the
+    message starts with the index of the failing item.
+    """
+    kwargs = _decode_options(
+        validate=validate,
+        padded=padded,
+        ignorechars=ignorechars,
+        canonical=canonical,
+    )
+    decoded = b64decode_many(items, altchars, **kwargs)
+    return _pack(decoded)
+
+
 def b64encode(
     s: Buffer,
     altchars: str | Buffer | None = None,
     *,
     padded: bool = True,
     wrapcol: int = 0,
+    threads: int = 1,
 ) -> bytes:
     r"""Encode bytes using the standard Base64 alphabet.
 
@@ -327,6 +677,9 @@ def b64encode(
     to the nearest multiple of 4.  If ``wrapcol`` is 0 (the default), no
     newlines are added.
 
+    Optional ``threads`` specifies the maximum number of threads used to encode
+    large inputs.
+
     The result is returned as a :class:`bytes` object.
     """
     mv = memoryview(s)
@@ -338,6 +691,7 @@ def b64encode(
     if wrapcol < 0:
         msg = "wrapcol must be >= 0"
         raise ValueError(msg)
+    _check_threads(threads)
     if _PYTHON_3_15_API:
         return builtin_encode(s, altchars, padded=padded, wrapcol=wrapcol)  # type: ignore[call-arg]
     encoded = builtin_encode(s, altchars)
@@ -361,6 +715,7 @@ def b64encode_as_string(
     *,
     padded: bool = True,
     wrapcol: int = 0,
+    threads: int = 1,
 ) -> str:
     r"""Encode bytes using the standard Base64 alphabet.
 
@@ -378,9 +733,129 @@ def b64encode_as_string(
     to the nearest multiple of 4.  If ``wrapcol`` is 0 (the default), no
     newlines are added.
 
+    Optional ``threads`` specifies the maximum number of threads used to encode
+    large inputs.
+
     The result is returned as a :class:`str` object.
     """
-    return b64encode(s, altchars, padded=padded, wrapcol=wrapcol).decode("ascii")
+    return b64encode(s, altchars, padded=padded, wrapcol=wrapcol, threads=threads).decode("ascii")
+
+
+def b64encode_into(
+    s: Buffer,
+    out: Buffer,
+    altchars: str | Buffer | None = None,
+    *,
+    padded: bool = True,
+    wrapcol: int = 0,
+    offset: int = 0,
+) -> int:
+    """Encode bytes using the standard Base64 alphabet into a writable buffer.
+
+    Argument ``s`` is a :term:`bytes-like object` to encode.
+
+    Argument ``out`` is a writable :term:`bytes-like object` receiving the
+    encoded data starting at byte ``offset``.
+
+    Optional ``altchars``, ``padded`` and ``wrapcol`` have the same meaning
+    as in :func:`b64encode`.
+
+    The result is the number of bytes written to ``out``.
+
+    A :exc:`ValueError` is raised if the encoded data does not fit in ``out``.
+    """
+    mv = _get_writable_view(out, offset)
+    return _write_into(b64encode(s, altchars, padded=padded, wrapcol=wrapcol), mv)
+
+
+def b64encoded_length(n: int, *, padded: bool = True, wrapcol: int = 0) -> int:
+    """Compute the length of the data encoded from ``n`` bytes.
+
+    Optional ``padded`` and ``wrapcol`` have the same meaning as in
+    :func:`b64encode`.
+
+    The result is the length of the output of :func:`b64encode`.
+    """
+    if n < 0:
+        msg = "n must be >= 0"
+        raise ValueError(msg)
+    if wrapcol < 0:
+        msg = "wrapcol must be >= 0"
+        raise ValueError(msg)
+    length = ((n + 2) // 3) * 4 if padded else (n * 4 + 2) // 3
+    if wrapcol == 0 or length == 0:
+        return length
+    effective_wrapcol = (wrapcol // 4) * 4 or 4
+    return length + (length - 1) // effective_wrapcol
+
+
+def b64encode_many(
+    items: Iterable[Buffer],
+    altchars: str | Buffer | None = None,
+    *,
+    padded: bool = True,
+    wrapcol: int = 0,
+) -> list[bytes]:
+    """Encode each item of an iterable using the standard Base64 alphabet.
+
+    Argument ``items`` is an iterable of
+    :term:`bytes-like objects <bytes-like object>` to encode.
+
+    Optional ``altchars``, ``padded`` and ``wrapcol`` have the same meaning
+    as in :func:`b64encode`.
+
+    The result is returned as a :class:`list` of :class:`bytes` objects.
+    """
+    # checks arguments once
+    b64encode(b"", altchars, padded=padded, wrapcol=wrapcol)
+    # the iterable is consumed before encoding/decoding, as in the C extension
+    sequence = list(items)
+    result = [b""] * len(sequence)
+    try:
+        for index, s in enumerate(sequence):
+            result[index] = b64encode(s, altchars, padded=padded, wrapcol=wrapcol)
+    except (BufferError, TypeError, ValueError) as e:
+        msg = f"item {index:d}: {e!s}"
+        raise type(e)(msg) from None
+    return result
+
+
+def b64encode_packed(
+    data: Buffer,
+    offsets: Buffer,
+    altchars: str | Buffer | None = None,
+    *,
+    padded: bool = True,
+    wrapcol: int = 0,
+) -> tuple[bytearray, array[int]]:
+    """Encode the items of a packed buffer using the standard Base64 alphabet.
+
+    Argument ``data`` is a :term:`bytes-like object` holding the items to encode.
+
+    Argument ``offsets`` is a :term:`bytes-like object` of int64 values, e.g. an
+    :class:`array.array` of type ``'q'``. Item ``i`` is
+    ``data[offsets[i]:offsets[i + 1]]``.
+
+    Optional ``altchars``, ``padded`` and ``wrapcol`` have the same meaning
+    as in :func:`b64encode`.
+
+    The result is returned as a tuple ``(data, offsets)`` with the same layout
+    as the arguments, ``data`` is a :class:`bytearray` object and ``offsets``
+    an :class:`array.array` of type ``'q'``.
+    """
+    mv = memoryview(data)
+    if not mv.c_contiguous:
+        msg = f"{data.__class__.__name__!r:s}: underlying buffer is not C-contiguous"
+        raise BufferError(msg)
+    mv = mv.cast("B")
+    offsets_ = _get_offsets(offsets, len(mv))
+    encoded = b64encode_many(
+        (mv[offsets_[i] : offsets_[i + 1]] for i in range(len(offsets_) - 1)),
+        altchars,
+        padded=padded,
+        wrapcol=wrapcol,
+    )
+    return _pack(encoded)
 
 
 def encodebytes(s: Buffer) -> bytes:
@@ -397,3 +872,222 @@ def encodebytes(s: Buffer) -> bytes:
         msg = f"{s.__class__.__name__!r:s}: underlying buffer is not C-contiguous"
         raise BufferError(msg)
     return builtin_encodebytes(s)
+
+
+class Encoder:
+    r"""Incremental encoder using the standard Base64 alphabet.
+
+    Optional ``altchars``, ``padded`` and ``wrapcol`` have the same meaning
+    as in :func:`b64encode`.
+
+    Data is fed with :meth:`update` and the encoding is completed with
+    :meth:`finalize`. The concatenation of all outputs is equal to the output
+    of :func:`b64encode` applied to the concatenation of all inputs.
+    """
+
+    def __init__(
+        self,
+        altchars: str | Buffer | None = None,
+        *,
+        padded: bool = True,
+        wrapcol: int = 0,
+    ) -> None:
+        if altchars is not None:
+            altchars = _validate_altchars(_get_bytes(altchars))
+        if wrapcol < 0:
+            msg = "wrapcol must be >= 0"
+            raise ValueError(msg)
+        self._altchars = altchars
+        self._padded = padded
+        self._wrapcol = ((wrapcol // 4) * 4 or 4) if wrapcol else 0
+        self._column = 0
+        self._pending = b""
+
+    def _wrap(self, encoded: bytes) -> bytes:
+        if self._wrapcol == 0 or not encoded:
+            return encoded
+        # a new line is only written before the next character
+        first = self._wrapcol - self._column
+        if len(encoded) <= first:
+            self._column += len(encoded)
+            return encoded
+        lines = [encoded[:first]]
+        lines.extend(
+            encoded[i : i + self._wrapcol] for i in range(first, len(encoded), self._wrapcol)
+        )
+        self._column = len(lines[-1])
+        return b"\n".join(lines)
+
+    def update(self, s: Buffer) -> bytes:
+        """Encode ``s``, a :term:`bytes-like object`.
+
+        The result is returned as a :class:`bytes` object.
+        """
+        mv = memoryview(s)
+        if not mv.c_contiguous:
+            msg = f"{s.__class__.__name__!r:s}: underlying buffer is not C-contiguous"
+            raise BufferError(msg)
+        data = self._pending + mv.tobytes()
+        len_ = len(data) - len(data) % 3
+        self._pending = data[len_:]
+        return self._wrap(builtin_encode(data[:len_], self._altchars))
+
+    def finalize(self) -> bytes:
+        """Complete the encoding, the encoder can then be reused.
+
+        The result is returned as a :class:`bytes` object.
+        """
+        encoded = b64encode(self._pending, self._altchars, padded=self._padded)
+        result = self._wrap(encoded)
+        self._pending = b""
+        self._column = 0
+        return result
+
+
+class Decoder:
+    """Incremental decoder using the standard Base64 alphabet.
+
+    Optional ``altchars``, ``validate``, ``padded``, ``ignorechars`` and
+    ``canonical`` have the same meaning as in :func:`b64decode`.
+
+    Data is fed with :meth:`update` and the decoding is completed with
+    :meth:`finalize`. The concatenation of all outputs is equal to the output
+    of :func:`b64decode` applied to the concatenation of all inputs.
+
+    A :exc:`binascii.Error` is raised as soon as invalid data is found, the
+    decoder is then reset and can be reused.
+    """
+
+    def __init__(
+        self,
+        altchars: str | Buffer | None = None,
+        validate: bool | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+        *,
+        padded: bool = True,
+        ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+        canonical: bool = False,
+    ) -> None:
+        kwargs = _decode_options(
+            validate=validate,
+            padded=padded,
+            ignorechars=ignorechars,
+            canonical=canonical,
+        )
+        # checks arguments
+        b64decode(b"", altchars, **kwargs)
+        if ignorechars is not _UNSPECIFIED:
+            # as in the C extension, a mutable ignorechars is copied
+            kwargs["ignorechars"] = bytes(memoryview(ignorechars))
+        significant = set(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789")
+        significant.update(b"+/" if altchars is None else _get_bytes(altchars))
+        if ignorechars is _UNSPECIFIED:
+            significant.update(b"+/")
+        self._significant = frozenset(significant)
+        self._insignificant = bytes(i for i in range(256) if i not in significant)
+        self._altchars = altchars
+        self._kwargs = kwargs
+        self._pending = b""
+
+    def _prefix_len(self, data: bytes) -> int:
+        # padding needs look-ahead
+        limit = data.find(b"=")
+        if limit < 0:
+            limit = len(data)
+        count = len(data[:limit].translate(None, delete=self._insignificant))
+        # the last complete quad is kept, it gives context to the remaining data
+        keep = count % 4 + 4
+        if count <= keep:
+            return 0
+        prefix_len = limit
+        while keep > 0:
+            prefix_len -= 1
+            if data[prefix_len] in self._significant:
+                keep -= 1
+        return prefix_len
+
+    def update(self, s: str | Buffer) -> bytes:
+        """Decode ``s``, a :term:`bytes-like object` or ASCII string.
+
+        The result is returned as a :class:`bytes` object.
+        """
+        data = self._pending + _get_bytes(s)
+        prefix_len = self._prefix_len(data)
+        self._pending = data[prefix_len:]
+        if prefix_len == 0:
+            return b""
+        try:
+            return b64decode(data[:prefix_len], self._altchars, **self._kwargs)
+        except BaseException:
+            self._pending = b""
+            raise
+
+    def finalize(self) -> bytes:
+        """Complete the decoding, the decoder can then be reused.
+
+        The result is returned as a :class:`bytes` object.
+
+        A :exc:`binascii.Error` is raised if the data is incorrectly padded.
+        """
+        data = self._pending
+        self._pending = b""
+        return b64decode(data, self._altchars, **self._kwargs)
+
+
+class Codec:
+    """Encoder and decoder with options parsed once.
+
+    Optional ``altchars``, ``validate``, ``padded``, ``ignorechars`` and
+    ``canonical`` have the same meaning as in :func:`b64decode`, optional
+    ``wrapcol`` has the same meaning as in :func:`b64encode`.
+
+    ``codec.encode(s)`` is equivalent to ``b64encode(s, altchars,
+    padded=padded, wrapcol=wrapcol)`` and ``codec.decode(s)`` is equivalent to
+    ``b64decode(s, altchars, validate, padded=padded, ignorechars=ignorechars,
+    canonical=canonical)`` without parsing the options on each call.
+
+    A codec does not hold any state between calls and can be shared between
+    threads.
+    """
+
+    def __init__(
+        self,
+        altchars: str | Buffer | None = None,
+        validate: bool | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+        *,
+        padded: bool = True,
+        ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = _UNSPECIFIED,
+        canonical: bool = False,
+        wrapcol: int = 0,
+    ) -> None:
+        kwargs = _decode_options(
+            validate=validate,
+            padded=padded,
+            ignorechars=ignorechars,
+            canonical=canonical,
+        )
+        # checks arguments
+        b64encode(b"", altchars, padded=padded, wrapcol=wrapcol)
+        b64decode(b"", altchars, **kwargs)
+        if ignorechars is not _UNSPECIFIED:
+            # as in the C extension, a mutable ignorechars is copied
+            kwargs["ignorechars"] = bytes(memoryview(ignorechars))
+        self._altchars = altchars
+        self._padded = padded
+        self._wrapcol = wrapcol
+        self._kwargs = kwargs
+
+    def encode(self, s: Buffer) -> bytes:
+        """Encode ``s``, a :term:`bytes-like object`.
+
+        The result is returned as a :class:`bytes` object.
+        """
+        return b64encode(s, self._altchars, padded=self._padded, wrapcol=self._wrapcol)
+
+    def decode(self, s: str | Buffer) -> bytes:
+        """Decode ``s``, a :term:`bytes-like object` or ASCII string.
+
+        The result is returned as a :class:`bytes` object.
+
+        A :exc:`binascii.Error` is raised if ``s`` is incorrectly padded.
+        """
+        return b64decode(s, self._altchars, **self._kwargs)
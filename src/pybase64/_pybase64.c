@@ -7,6 +7,7 @@
 #include <codecs.h>
 #include <tables/tables.h>
 #include <string.h> /* memset */
+#include <stdarg.h>
 #include <assert.h>
 
 #ifdef __SSE2__
@@ -14,6 +15,16 @@
 #elif BASE64_WITH_NEON64
 #include <arm_neon.h>
 #endif
+#if BASE64_WITH_AVX2 || BASE64_WITH_AVX512
+#include <immintrin.h>
+#endif
+
+/* allows to compile functions for a SIMD extension selected at runtime */
+#if defined(__GNUC__) || defined(__clang__)
+#define PYBASE64_TARGET(x) __attribute__((target(x)))
+#else
+#define PYBASE64_TARGET(x)
+#endif
 
 #if defined(__x86_64__) || defined(__i386__) || defined(_M_IX86) || defined(_M_X64) || BASE64_WITH_NEON64
 #define HAVE_FAST_UNALIGNED_ACCESS 1
@@ -35,13 +46,101 @@
 #define PYBASE64_DECODE_SLOW_INVALID_DATA 8
 #define PYBASE64_DECODE_SLOW_PADDING_NOT_ALLOWED 9
 #define PYBASE64_DECODE_SLOW_PADDING_BITS_NOT_ALLOWED 10
+#define PYBASE64_DECODE_SLOW_NO_MEMORY 11
+
+/* tables used by decode_slow, indexed by character */
+/* url-safe tables decode '-' & '_' directly without translating the input */
+typedef struct pybase64_decode_tables {
+    uint32_t dec_32bit[4][256];
+    uint8_t dec_8bit[256];
+} pybase64_decode_tables;
+
+#define PYBASE64_DECODE_TABLES_STANDARD 0
+#define PYBASE64_DECODE_TABLES_URLSAFE 1 /* '+' & '/' are decoded but reported as bad characters */
+#define PYBASE64_DECODE_TABLES_URLSAFE_STRICT 2 /* '+' & '/' are invalid */
+#define PYBASE64_DECODE_TABLES_COUNT 3
+
+/* keyword arguments, names are interned once in pybase64_state */
+enum pybase64_keyword {
+    PYBASE64_KW_NONE = -1, /* positional-only */
+    PYBASE64_KW_ALTCHARS,
+    PYBASE64_KW_VALIDATE,
+    PYBASE64_KW_PADDED,
+    PYBASE64_KW_IGNORECHARS,
+    PYBASE64_KW_CANONICAL,
+    PYBASE64_KW_WRAPCOL,
+    PYBASE64_KW_THREADS,
+    PYBASE64_KW_OFFSET,
+    PYBASE64_KW_COUNT
+};
+
+static const char* const pybase64_keyword_names[PYBASE64_KW_COUNT] = {
+    "altchars", "validate", "padded", "ignorechars", "canonical", "wrapcol", "threads", "offset"
+};
+
+/* flags a deprecated character in pybase64_decode_tables.dec_8bit */
+#define PYBASE64_DECODE_BAD_CHAR 0x40U
+
+/* opt-in statistics, calls & bytes per entry point and per internal path */
+enum pybase64_stats_entry {
+    PYBASE64_STATS_B64ENCODE,
+    PYBASE64_STATS_B64ENCODE_AS_STRING,
+    PYBASE64_STATS_B64ENCODE_INTO,
+    PYBASE64_STATS_B64ENCODE_MANY,
+    PYBASE64_STATS_B64ENCODE_PACKED,
+    PYBASE64_STATS_ENCODEBYTES,
+    PYBASE64_STATS_B64DECODE,
+    PYBASE64_STATS_B64DECODE_AS_BYTEARRAY,
+    PYBASE64_STATS_B64DECODE_INTO,
+    PYBASE64_STATS_B64DECODE_MANY,
+    PYBASE64_STATS_B64DECODE_PACKED,
+    PYBASE64_STATS_ENCODER,
+    PYBASE64_STATS_DECODER,
+    PYBASE64_STATS_CODEC_ENCODE,
+    PYBASE64_STATS_CODEC_DECODE,
+    PYBASE64_STATS_ENTRY_COUNT
+};
+
+static const char* const pybase64_stats_entry_names[PYBASE64_STATS_ENTRY_COUNT] = {
+    "b64encode", "b64encode_as_string", "b64encode_into", "b64encode_many", "b64encode_packed", "encodebytes",
+    "b64decode", "b64decode_as_bytearray", "b64decode_into", "b64decode_many", "b64decode_packed",
+    "Encoder", "Decoder", "Codec.encode", "Codec.decode"
+};
+
+enum pybase64_stats_path {
+    PYBASE64_STATS_FAST, /* libbase64 codec only */
+    PYBASE64_STATS_TRANSLATE, /* libbase64 codec & alphabet translation */
+    PYBASE64_STATS_SLOW, /* decode_slow, ignored characters & padding checks */
+    PYBASE64_STATS_WRAPCOL, /* encoding with line wrapping */
+    PYBASE64_STATS_ERROR, /* an exception was raised while encoding/decoding */
+    PYBASE64_STATS_PATH_COUNT
+};
+
+static const char* const pybase64_stats_path_names[PYBASE64_STATS_PATH_COUNT] = {
+    "fast", "translate", "slow", "wrapcol", "error"
+};
+
+typedef struct pybase64_stats_counters {
+    uint64_t calls;
+    uint64_t bytes_in;
+    uint64_t bytes_out;
+} pybase64_stats_counters;
 
 typedef struct pybase64_state {
     PyObject *binAsciiError;
     PyObject *ignoreCharsValidateFalse;
+    PyObject *ignoreCharsValidateFalseUrlSafe;
     PyObject *ignoreCharsNoPadding;
+    PyObject *encoderType;
+    PyObject *decoderType;
+    PyObject *codecType;
+    PyObject *arrayType;
     uint32_t active_simd_flag;
     uint32_t simd_flags;
+    int stats_enabled;
+    pybase64_stats_counters stats[PYBASE64_STATS_ENTRY_COUNT][PYBASE64_STATS_PATH_COUNT];
+    pybase64_decode_tables decode_tables[PYBASE64_DECODE_TABLES_COUNT];
+    PyObject *keywords[PYBASE64_KW_COUNT];
 } pybase64_state;
 
 #if defined(PY_VERSION_HEX) && PY_VERSION_HEX >= 0x030d0000
@@ -50,6 +149,261 @@ typedef struct pybase64_state {
 #define KW_CONST_CAST (char**)
 #endif
 
+/* inputs smaller than this are encoded/decoded without releasing the GIL */
+#ifndef PYBASE64_ALLOW_THREADS_MIN_SIZE
+#define PYBASE64_ALLOW_THREADS_MIN_SIZE 4096
+#endif
+
+#define PYBASE64_RELEASE_GIL(len) ((size_t)(len) >= (size_t)PYBASE64_ALLOW_THREADS_MIN_SIZE)
+
+/* same as Py_BEGIN_ALLOW_THREADS/Py_END_ALLOW_THREADS, the GIL is kept for small inputs */
+#define PYBASE64_BEGIN_ALLOW_THREADS(len) \
+    { \
+        PyThreadState* _save = PYBASE64_RELEASE_GIL(len) ? PyEval_SaveThread() : NULL;
+#define PYBASE64_END_ALLOW_THREADS \
+        if (_save != NULL) { \
+            PyEval_RestoreThread(_save); \
+        } \
+    }
+
+#ifdef Py_GIL_DISABLED
+/* free-threaded build, counters are updated concurrently */
+#define PYBASE64_STATS_ENABLED(state) _Py_atomic_load_int_relaxed(&(state)->stats_enabled)
+#define PYBASE64_STATS_SET_ENABLED(state, value) _Py_atomic_store_int_relaxed(&(state)->stats_enabled, (value))
+#define PYBASE64_STATS_LOAD(counter) _Py_atomic_load_uint64_relaxed(&(counter))
+#define PYBASE64_STATS_STORE(counter, value) _Py_atomic_store_uint64_relaxed(&(counter), (value))
+#define PYBASE64_STATS_ADD(counter, value) (void)_Py_atomic_add_uint64(&(counter), (value))
+#else
+/* counters are only accessed with the GIL held, the state is per interpreter */
+#define PYBASE64_STATS_ENABLED(state) ((state)->stats_enabled)
+#define PYBASE64_STATS_SET_ENABLED(state, value) ((state)->stats_enabled = (value))
+#define PYBASE64_STATS_LOAD(counter) (counter)
+#define PYBASE64_STATS_STORE(counter, value) ((counter) = (value))
+#define PYBASE64_STATS_ADD(counter, value) ((counter) += (value))
+#endif
+
+/* counts a call when statistics are enabled, a single predictable branch otherwise */
+#define PYBASE64_STATS_RECORD(state, entry, path, bytes_in, bytes_out) \
+    if (PYBASE64_STATS_ENABLED(state)) { \
+        pybase64_stats_record((state), (entry), (path), (size_t)(bytes_in), (size_t)(bytes_out)); \
+    }
+
+static void pybase64_stats_record(pybase64_state* state, enum pybase64_stats_entry entry, enum pybase64_stats_path path, size_t bytes_in, size_t bytes_out)
+{
+    pybase64_stats_counters* counters = &state->stats[entry][path];
+
+    PYBASE64_STATS_ADD(counters->calls, 1U);
+    PYBASE64_STATS_ADD(counters->bytes_in, (uint64_t)bytes_in);
+    PYBASE64_STATS_ADD(counters->bytes_out, (uint64_t)bytes_out);
+}
+
+static enum pybase64_stats_path pybase64_stats_encode_path(char const* alphabet, Py_ssize_t wrapcol)
+{
+    if (wrapcol) {
+        return PYBASE64_STATS_WRAPCOL;
+    }
+    return (alphabet != NULL) ? PYBASE64_STATS_TRANSLATE : PYBASE64_STATS_FAST;
+}
+
+/* decisions taken by a call, reported by pybase64.explain() instead of encoding/decoding */
+typedef struct pybase64_explain {
+    enum pybase64_stats_path path;
+    int translate; /* alphabet translation pass */
+    int release_gil;
+    Py_ssize_t threads;
+    size_t output_size; /* upper bound when decoding */
+    size_t translate_block; /* stack block holding translated input, per thread */
+    size_t compact_block; /* stack block gathering alphabet runs for libbase64 */
+} pybase64_explain;
+
+static void pybase64_explain_init(pybase64_explain* explain, enum pybase64_stats_path path, int translate, size_t output_size)
+{
+    memset(explain, 0, sizeof(*explain));
+    explain->path = path;
+    explain->translate = translate;
+    explain->threads = 1;
+    explain->output_size = output_size;
+}
+
+static PyObject* pybase64_explain_result(pybase64_explain const* explain)
+{
+    static const char* const copy_names[] = { "translate", "compact" };
+    size_t copies[2];
+    size_t extra_memory = 0U;
+    PyObject* copies_object;
+    size_t i;
+
+    copies[0] = explain->translate_block;
+    copies[1] = explain->compact_block;
+
+    copies_object = PyDict_New();
+    if (copies_object == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    for (i = 0U; i < sizeof(copies) / sizeof(copies[0]); ++i) {
+        PyObject* value;
+        int error;
+
+        if (copies[i] == 0U) {
+            continue;
+        }
+        extra_memory += copies[i];
+        value = PyLong_FromSize_t(copies[i]);
+        if (value == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            Py_DECREF(copies_object); /* GCOVR_EXCL_LINE */
+            return NULL; /* GCOVR_EXCL_LINE */
+        }
+        error = PyDict_SetItemString(copies_object, copy_names[i], value);
+        Py_DECREF(value);
+        if (error != 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            Py_DECREF(copies_object); /* GCOVR_EXCL_LINE */
+            return NULL; /* GCOVR_EXCL_LINE */
+        }
+    }
+    return Py_BuildValue(
+        "{sssOsOsnsnsNsn}",
+        "path", pybase64_stats_path_names[explain->path],
+        "translate", explain->translate ? Py_True : Py_False,
+        "release_gil", explain->release_gil ? Py_True : Py_False,
+        "threads", explain->threads,
+        "output_size", (Py_ssize_t)explain->output_size,
+        "copies", copies_object,
+        "extra_memory", (Py_ssize_t)extra_memory
+    );
+}
+
+#define PYBASE64_MAX_PARAMS 8
+
+/* parameters of a METH_FASTCALL | METH_KEYWORDS function */
+typedef struct pybase64_params {
+    /* same meaning as PyArg_ParseTupleAndKeywords, only 'O', 'p', 'n', '|' & '$' are supported */
+    const char* format;
+    enum pybase64_keyword keywords[PYBASE64_MAX_PARAMS];
+} pybase64_params;
+
+/* returns 0 on success, same as PyArg_ParseTupleAndKeywords for METH_FASTCALL | METH_KEYWORDS */
+static int parse_fastcall_args(pybase64_state const* state, pybase64_params const* params, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames, ...)
+{
+    PyObject* values[PYBASE64_MAX_PARAMS] = { NULL };
+    Py_ssize_t count = 0;
+    Py_ssize_t required = -1;
+    Py_ssize_t positional = -1;
+    Py_ssize_t nkwargs = (kwnames == NULL) ? 0 : PyTuple_GET_SIZE(kwnames);
+    Py_ssize_t i;
+    const char* format;
+    va_list va;
+
+    for (format = params->format; *format != '\0'; ++format) {
+        if (*format == '|') {
+            required = count;
+        }
+        else if (*format == '$') {
+            /* keyword-only arguments are optional */
+            if (required < 0) {
+                required = count;
+            }
+            positional = count;
+        }
+        else {
+            ++count;
+        }
+    }
+    assert(count <= PYBASE64_MAX_PARAMS);
+    if (required < 0) {
+        required = count;
+    }
+    if (positional < 0) {
+        positional = count;
+    }
+
+    if (nargs > positional) {
+        PyErr_Format(PyExc_TypeError, "function takes at most %zd positional arguments (%zd given)", positional, nargs);
+        return -1;
+    }
+    for (i = 0; i < nargs; ++i) {
+        values[i] = args[i];
+    }
+    for (i = 0; i < nkwargs; ++i) {
+        PyObject* key = PyTuple_GET_ITEM(kwnames, i);
+        Py_ssize_t j;
+
+        for (j = 0; j < count; ++j) {
+            if (params->keywords[j] != PYBASE64_KW_NONE) {
+                PyObject* name = state->keywords[params->keywords[j]];
+                /* keyword names are usually interned */
+                if ((key == name) || (PyUnicode_Compare(key, name) == 0)) {
+                    break;
+                }
+            }
+        }
+        if (j == count) {
+            PyErr_Format(PyExc_TypeError, "'%U' is an invalid keyword argument for this function", key);
+            return -1;
+        }
+        if (values[j] != NULL) {
+            PyErr_Format(PyExc_TypeError, "argument for function given by name ('%U') and position (%zd)", key, j + 1);
+            return -1;
+        }
+        values[j] = args[nargs + i];
+    }
+    for (i = 0; i < required; ++i) {
+        if (values[i] == NULL) {
+            /* required arguments are positional-only */
+            PyErr_Format(PyExc_TypeError, "function takes at least %zd positional arguments (%zd given)", required, nargs);
+            return -1;
+        }
+    }
+
+    va_start(va, kwnames);
+    i = 0;
+    for (format = params->format; *format != '\0'; ++format) {
+        PyObject* value;
+
+        if ((*format == '|') || (*format == '$')) {
+            continue;
+        }
+        value = values[i++];
+        if (*format == 'O') {
+            PyObject** out = va_arg(va, PyObject**);
+            if (value != NULL) {
+                *out = value;
+            }
+        }
+        else if (*format == 'p') {
+            int* out = va_arg(va, int*);
+            if (value != NULL) {
+                int result = PyObject_IsTrue(value);
+                if (result < 0) {
+                    va_end(va);
+                    return -1;
+                }
+                *out = result;
+            }
+        }
+        else {
+            Py_ssize_t* out = va_arg(va, Py_ssize_t*);
+            assert(*format == 'n');
+            if (value != NULL) {
+                Py_ssize_t result;
+                PyObject* index = PyNumber_Index(value);
+                if (index == NULL) {
+                    va_end(va);
+                    return -1;
+                }
+                result = PyLong_AsSsize_t(index);
+                Py_DECREF(index);
+                if ((result == -1) && PyErr_Occurred()) {
+                    va_end(va);
+                    return -1;
+                }
+                *out = result;
+            }
+        }
+    }
+    va_end(va);
+    return 0;
+}
+
 /* returns 0 on success */
 static int get_buffer(PyObject* object, Py_buffer* buffer, int bytes_like)
 {
@@ -80,6 +434,76 @@ static int get_buffer(PyObject* object, Py_buffer* buffer, int bytes_like)
 }
 
 
+/* returns 0 on success, offset is checked against the buffer length */
+static int get_writable_buffer(PyObject* object, Py_buffer* buffer, Py_ssize_t offset)
+{
+    if (PyObject_GetBuffer(object, buffer, PyBUF_WRITABLE | PyBUF_C_CONTIGUOUS) != 0) {
+        return -1;
+    }
+#if defined(PYPY_VERSION)
+    /* PyPy does not respect PyBUF_C_CONTIGUOUS */
+    if (!PyBuffer_IsContiguous(buffer, 'C')) {
+        PyBuffer_Release(buffer);
+        PyErr_Format(PyExc_BufferError, "%R: underlying buffer is not C-contiguous", Py_TYPE(object));
+        return -1;
+    }
+#endif
+    if ((offset < 0) || (offset > buffer->len)) {
+        PyBuffer_Release(buffer);
+        PyErr_Format(PyExc_ValueError, "offset %zd out of range for a buffer of %zd bytes", offset, buffer->len);
+        return -1;
+    }
+    return 0;
+}
+
+
+/* returns 0 on success, offsets must be native int64 values */
+static int get_offsets_buffer(PyObject* object, Py_buffer* buffer)
+{
+    const char* format;
+
+    if (PyObject_GetBuffer(object, buffer, PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) != 0) {
+        return -1;
+    }
+    format = (buffer->format != NULL) ? buffer->format : "B";
+    if ((format[0] == '@') || (format[0] == '=')) {
+        format++;
+    }
+    if ((buffer->itemsize != 8) || ((strcmp(format, "q") != 0) && (strcmp(format, "l") != 0))) {
+        PyErr_SetString(PyExc_TypeError, "offsets must be a buffer of int64 values");
+        PyBuffer_Release(buffer);
+        return -1;
+    }
+    if (buffer->len < 8) {
+        PyErr_SetString(PyExc_ValueError, "offsets must contain at least one value");
+        PyBuffer_Release(buffer);
+        return -1;
+    }
+    return 0;
+}
+
+/* returns 0 on success */
+static int check_offsets(const int64_t* offsets, Py_ssize_t count, Py_ssize_t len)
+{
+    Py_ssize_t i;
+
+    if (offsets[0] < 0) {
+        PyErr_SetString(PyExc_ValueError, "offsets must be non-negative");
+        return -1;
+    }
+    for (i = 0; i < count; ++i) {
+        if (offsets[i + 1] < offsets[i]) {
+            PyErr_Format(PyExc_ValueError, "offsets must be non-decreasing, offsets[%zd] > offsets[%zd]", i, i + 1);
+            return -1;
+        }
+    }
+    if (offsets[count] > (int64_t)len) {
+        PyErr_Format(PyExc_ValueError, "offsets[%zd] out of range for data of %zd bytes", count, len);
+        return -1;
+    }
+    return 0;
+}
+
 /* returns 0 on success */
 static int parse_alphabet(PyObject* alphabetObject, char* alphabet, int* useAlphabet)
 {
@@ -131,7 +555,7 @@ static int parse_alphabet(PyObject* alphabetObject, char* alphabet, int* useAlph
     return 0;
 }
 
-static void translate_inplace(char* pSrcDst, size_t len, const char* alphabet)
+static void translate_inplace_default(char* pSrcDst, size_t len, const char* alphabet)
 {
     size_t i = 0U;
     const char c0 = alphabet[0];
@@ -187,6 +611,171 @@ static void translate_inplace(char* pSrcDst, size_t len, const char* alphabet)
     }
 }
 
+#if BASE64_WITH_AVX2
+PYBASE64_TARGET("avx2")
+static void translate_inplace_avx2(char* pSrcDst, size_t len, const char* alphabet)
+{
+    size_t i = 0U;
+    const __m256i plus  = _mm256_set1_epi8('+');
+    const __m256i slash = _mm256_set1_epi8('/');
+    const __m256i c0_ = _mm256_set1_epi8(alphabet[0]);
+    const __m256i c1_ = _mm256_set1_epi8(alphabet[1]);
+
+    for (; i < (len & ~(size_t)31U); i += 32) {
+        __m256i srcDst = _mm256_loadu_si256((const __m256i*)(pSrcDst + i));
+        __m256i m0     = _mm256_cmpeq_epi8(srcDst, plus);
+        __m256i m1     = _mm256_cmpeq_epi8(srcDst, slash);
+
+        srcDst = _mm256_blendv_epi8(srcDst, c0_, m0);
+        srcDst = _mm256_blendv_epi8(srcDst, c1_, m1);
+
+        _mm256_storeu_si256((__m256i*)(pSrcDst + i), srcDst);
+    }
+    translate_inplace_default(pSrcDst + i, len - i, alphabet);
+}
+#endif
+
+#if BASE64_WITH_AVX512
+PYBASE64_TARGET("avx512f,avx512bw")
+static void translate_inplace_avx512(char* pSrcDst, size_t len, const char* alphabet)
+{
+    size_t i = 0U;
+    const __m512i plus  = _mm512_set1_epi8('+');
+    const __m512i slash = _mm512_set1_epi8('/');
+    const __m512i c0_ = _mm512_set1_epi8(alphabet[0]);
+    const __m512i c1_ = _mm512_set1_epi8(alphabet[1]);
+
+    for (; i < (len & ~(size_t)63U); i += 64) {
+        __m512i srcDst = _mm512_loadu_si512((const void*)(pSrcDst + i));
+        __mmask64 m0   = _mm512_cmpeq_epi8_mask(srcDst, plus);
+        __mmask64 m1   = _mm512_cmpeq_epi8_mask(srcDst, slash);
+
+        srcDst = _mm512_mask_blend_epi8(m0, srcDst, c0_);
+        srcDst = _mm512_mask_blend_epi8(m1, srcDst, c1_);
+
+        _mm512_storeu_si512((void*)(pSrcDst + i), srcDst);
+    }
+    translate_inplace_default(pSrcDst + i, len - i, alphabet);
+}
+#endif
+
+#if BASE64_WITH_AVX2
+/* x must not be 0 */
+static unsigned int count_trailing_zeros(uint32_t x)
+{
+#if defined(__GNUC__) || defined(__clang__)
+    return (unsigned int)__builtin_ctz(x);
+#else
+    unsigned int n = 0U;
+    while ((x & 1U) == 0U) {
+        x >>= 1;
+        ++n;
+    }
+    return n;
+#endif
+}
+
+/* copies the leading characters of src in the standard alphabet to dst, returns their number */
+/* up to len bytes might be written to dst, same classification as the libbase64 AVX2 decoder */
+PYBASE64_TARGET("avx2")
+static size_t copy_alphabet_prefix_avx2(const char* src, size_t len, char* dst)
+{
+    size_t i = 0U;
+    const __m256i lut_lo = _mm256_setr_epi8(
+        0x15, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x13, 0x1A, 0x1B, 0x1B, 0x1B, 0x1A,
+        0x15, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x13, 0x1A, 0x1B, 0x1B, 0x1B, 0x1A);
+    const __m256i lut_hi = _mm256_setr_epi8(
+        0x10, 0x10, 0x01, 0x02, 0x04, 0x08, 0x04, 0x08, 0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x10,
+        0x10, 0x10, 0x01, 0x02, 0x04, 0x08, 0x04, 0x08, 0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x10);
+    const __m256i mask_2F = _mm256_set1_epi8(0x2F);
+
+    for (; i < (len & ~(size_t)31U); i += 32) {
+        const __m256i str = _mm256_loadu_si256((const __m256i*)(src + i));
+        const __m256i hi = _mm256_shuffle_epi8(lut_hi, _mm256_and_si256(_mm256_srli_epi32(str, 4), mask_2F));
+        const __m256i lo = _mm256_shuffle_epi8(lut_lo, _mm256_and_si256(str, mask_2F));
+        const __m256i valid = _mm256_cmpeq_epi8(_mm256_and_si256(lo, hi), _mm256_setzero_si256());
+        const uint32_t invalid = ~(uint32_t)_mm256_movemask_epi8(valid);
+
+        _mm256_storeu_si256((__m256i*)(dst + i), str);
+        if (invalid != 0U) {
+            return i + count_trailing_zeros(invalid);
+        }
+    }
+    for (; i < len; ++i) {
+        if (base64_table_dec_8bit[(uint8_t)src[i]] >= 64U) {
+            break;
+        }
+        dst[i] = src[i];
+    }
+    return i;
+}
+
+/* same as copy_alphabet_prefix_avx2 for the url-safe alphabet, '-' & '_' are written to dst */
+/* as '+' & '/' for libbase64, '+' & '/' in src are not part of the prefix */
+PYBASE64_TARGET("avx2")
+static size_t copy_urlsafe_prefix_avx2(const char* src, size_t len, char* dst)
+{
+    size_t i = 0U;
+    /* one bit per class of high nibble, set in lut_lo for the invalid low nibbles of the class */
+    /* 0x2_: only '-', 0x3_: digits, 0x4_ & 0x6_: letters, 0x5_: letters & '_', 0x7_: letters */
+    const __m256i lut_lo = _mm256_setr_epi8(
+        0x25, 0x21, 0x21, 0x21, 0x21, 0x21, 0x21, 0x21, 0x21, 0x21, 0x23, 0x3B, 0x3B, 0x3A, 0x3B, 0x33,
+        0x25, 0x21, 0x21, 0x21, 0x21, 0x21, 0x21, 0x21, 0x21, 0x21, 0x23, 0x3B, 0x3B, 0x3A, 0x3B, 0x33);
+    const __m256i lut_hi = _mm256_setr_epi8(
+        0x20, 0x20, 0x01, 0x02, 0x04, 0x08, 0x04, 0x10, 0x20, 0x20, 0x20, 0x20, 0x20, 0x20, 0x20, 0x20,
+        0x20, 0x20, 0x01, 0x02, 0x04, 0x08, 0x04, 0x10, 0x20, 0x20, 0x20, 0x20, 0x20, 0x20, 0x20, 0x20);
+    const __m256i mask_2F = _mm256_set1_epi8(0x2F);
+    const __m256i minus = _mm256_set1_epi8('-');
+    const __m256i underscore = _mm256_set1_epi8('_');
+    const __m256i plus = _mm256_set1_epi8('+');
+    const __m256i slash = _mm256_set1_epi8('/');
+
+    for (; i < (len & ~(size_t)31U); i += 32) {
+        const __m256i str = _mm256_loadu_si256((const __m256i*)(src + i));
+        const __m256i hi = _mm256_shuffle_epi8(lut_hi, _mm256_and_si256(_mm256_srli_epi32(str, 4), mask_2F));
+        const __m256i lo = _mm256_shuffle_epi8(lut_lo, _mm256_and_si256(str, mask_2F));
+        const __m256i valid = _mm256_cmpeq_epi8(_mm256_and_si256(lo, hi), _mm256_setzero_si256());
+        const uint32_t invalid = ~(uint32_t)_mm256_movemask_epi8(valid);
+        __m256i out = _mm256_blendv_epi8(str, plus, _mm256_cmpeq_epi8(str, minus));
+
+        out = _mm256_blendv_epi8(out, slash, _mm256_cmpeq_epi8(str, underscore));
+        _mm256_storeu_si256((__m256i*)(dst + i), out);
+        if (invalid != 0U) {
+            return i + count_trailing_zeros(invalid);
+        }
+    }
+    for (; i < len; ++i) {
+        char c = src[i];
+
+        if (c == '-') {
+            c = '+';
+        }
+        else if (c == '_') {
+            c = '/';
+        }
+        else if ((c == '+') || (c == '/') || (base64_table_dec_8bit[(uint8_t)c] >= 64U)) {
+            break;
+        }
+        dst[i] = c;
+    }
+    return i;
+}
+#endif
+
+/* selected by set_simd_path, like the libbase64 codec */
+/* set_simd_path is the only writer: encoding/decoding only read these pointers (and the */
+/* libbase64 codec, initialized once), so concurrent calls never contend on shared state */
+static void (*translate_inplace_impl)(char*, size_t, const char*) = &translate_inplace_default;
+
+static void translate_inplace(char* pSrcDst, size_t len, const char* alphabet)
+{
+    translate_inplace_impl(pSrcDst, len, alphabet);
+}
+
+/* selected by set_simd_path, NULL when no SIMD classification is available */
+static size_t (*copy_alphabet_prefix_impl)(const char*, size_t, char*) = NULL;
+static size_t (*copy_urlsafe_prefix_impl)(const char*, size_t, char*) = NULL;
+
 static void translate(const char* pSrc, char* pDst, size_t len, const char* alphabet, int* has_bad_char)
 {
     size_t i = 0U;
@@ -413,9 +1002,27 @@ static int next_valid_padding(uint8_t const** pSrc, size_t* pSrclen, Py_buffer c
     return ret;
 }
 
-static int decode_slow(const uint8_t *src, size_t srclen, uint8_t* out, size_t* outlen, Py_buffer const* ignorechars, int padded, int canonical)
+/* returns the 6-bit value of c or 254 for padding, 255 for invalid characters */
+static uint8_t decode_slow_lookup(pybase64_decode_tables const* tables, uint8_t c, int* has_bad_char)
+{
+    uint8_t q = tables->dec_8bit[c];
+
+    if ((q & 0xC0U) == PYBASE64_DECODE_BAD_CHAR) {
+        *has_bad_char = 1;
+        q &= 0x3FU;
+    }
+    return q;
+}
+
+/* has_output tells if data was already decoded before src (streaming) */
+/* consumed is NULL for the last chunk of data, otherwise decoding stops before an incomplete */
+/* group or padding which need to know what comes next & consumed is set to the bytes decoded */
+static int decode_slow(const uint8_t *src, size_t srclen, uint8_t* out, size_t* outlen, pybase64_decode_tables const* tables, Py_buffer const* ignorechars, int padded, int canonical, int has_output, size_t* consumed, int* has_bad_char)
 {
+    const uint8_t* src_start = src;
+    const uint8_t* group_src = src;
     uint8_t* out_start = out;
+    uint8_t* group_out = out;
     uint8_t carry = 0U;
     uint32_t ignorecache[8];
 
@@ -431,10 +1038,10 @@ static int decode_slow(const uint8_t *src, size_t srclen, uint8_t* out, size_t*
                 uint8_t  aschar[4];
             } x;
 
-            x.asint = base64_table_dec_32bit_d0[src[0]]
-                    | base64_table_dec_32bit_d1[src[1]]
-                    | base64_table_dec_32bit_d2[src[2]]
-                    | base64_table_dec_32bit_d3[src[3]];
+            x.asint = tables->dec_32bit[0][src[0]]
+                    | tables->dec_32bit[1][src[1]]
+                    | tables->dec_32bit[2][src[2]]
+                    | tables->dec_32bit[3][src[3]];
 #if BASE64_LITTLE_ENDIAN
             /* LUTs for little-endian set Most Significant Bit
                in case of invalid character */
@@ -462,15 +1069,20 @@ static int decode_slow(const uint8_t *src, size_t srclen, uint8_t* out, size_t*
             srclen -= 4;
         }
         /* case bytes == 0, remainder */
+        group_src = src;
+        group_out = out;
         {
             uint8_t c = *src++; srclen--;
             uint8_t q;
-            if ((q = base64_table_dec_8bit[c]) >= 254) {
+            if ((q = decode_slow_lookup(tables, c, has_bad_char)) >= 254) {
                 if (check_ignore(c, ignorechars, ignorecache)) {
                     continue;
                 }
                 if (q == 254) {
-                    if((out - out_start) == 0) {
+                    if (consumed != NULL) {
+                        goto PARTIAL;
+                    }
+                    if(!has_output && ((out - out_start) == 0)) {
                         return PYBASE64_DECODE_SLOW_LEADING_PADDING;
                     }
                     return PYBASE64_DECODE_SLOW_EXCESS_PADDING;
@@ -483,11 +1095,14 @@ static int decode_slow(const uint8_t *src, size_t srclen, uint8_t* out, size_t*
         for(;;)
         {
             if (srclen-- == 0) {
+                if (consumed != NULL) {
+                    goto PARTIAL;
+                }
                 return PYBASE64_DECODE_SLOW_INVALID_LEN;
             }
             uint8_t c = *src++;
             uint8_t q;
-            if ((q = base64_table_dec_8bit[c]) >= 254) {
+            if ((q = decode_slow_lookup(tables, c, has_bad_char)) >= 254) {
                 if (check_ignore(c, ignorechars, ignorecache)) {
                     continue;
                 }
@@ -501,6 +1116,9 @@ static int decode_slow(const uint8_t *src, size_t srclen, uint8_t* out, size_t*
         for(;;)
         {
             if (srclen-- == 0) {
+                if (consumed != NULL) {
+                    goto PARTIAL;
+                }
                 if (!padded) {
                     goto END;
                 }
@@ -508,7 +1126,10 @@ static int decode_slow(const uint8_t *src, size_t srclen, uint8_t* out, size_t*
             }
             uint8_t c = *src++;
             uint8_t q;
-            if ((q = base64_table_dec_8bit[c]) >= 254) {
+            if ((q = decode_slow_lookup(tables, c, has_bad_char)) >= 254) {
+                if ((q == 254) && (consumed != NULL)) {
+                    goto PARTIAL;
+                }
                 if (q == 254) {  /* padding */
                     /* if the next valid byte is '=' => end or skip depending on '=' being in ignorechars */
                     uint8_t const* src_next = src;
@@ -554,6 +1175,9 @@ static int decode_slow(const uint8_t *src, size_t srclen, uint8_t* out, size_t*
         for(;;)
         {
             if (srclen-- == 0) {
+                if (consumed != NULL) {
+                    goto PARTIAL;
+                }
                 if (!padded) {
                     goto END;
                 }
@@ -561,7 +1185,10 @@ static int decode_slow(const uint8_t *src, size_t srclen, uint8_t* out, size_t*
             }
             uint8_t c = *src++;
             uint8_t q;
-            if ((q = base64_table_dec_8bit[c]) >= 254) {
+            if ((q = decode_slow_lookup(tables, c, has_bad_char)) >= 254) {
+                if ((q == 254) && (consumed != NULL)) {
+                    goto PARTIAL;
+                }
                 if (q == 254) {  /* padding */
                     if (!padded && !check_ignore('=', ignorechars, ignorecache)) {
                         return PYBASE64_DECODE_SLOW_PADDING_NOT_ALLOWED;
@@ -592,8 +1219,15 @@ END:
     if (canonical && (carry != 0U)) {
         return PYBASE64_DECODE_SLOW_PADDING_BITS_NOT_ALLOWED;
     }
+    if (consumed != NULL) {
+        *consumed = (size_t)(src - src_start);
+    }
     *outlen = out - out_start;
     return PYBASE64_DECODE_SLOW_SUCCESS;
+PARTIAL:
+    *consumed = (size_t)(group_src - src_start);
+    *outlen = group_out - out_start;
+    return PYBASE64_DECODE_SLOW_SUCCESS;
 }
 
 static void pybase64_stream_encode_final(struct base64_state* state, char* out, size_t* outlen, int nopadding)
@@ -624,97 +1258,108 @@ static void pybase64_stream_encode_final(struct base64_state* state, char* out,
 	*outlen = 0;
 }
 
-static PyObject* pybase64_encode_impl_core(PyObject* self, Py_buffer const* buffer, char const* alphabet, Py_ssize_t wrapcol, unsigned int flags)
+/* returns 0 on success, normalizes wrapcol & flags */
+static int pybase64_encode_length(Py_ssize_t len, Py_ssize_t* wrapcol, unsigned int* flags, size_t* out_len)
 {
     size_t groups;
     size_t groups_remainder;
-    size_t out_len;
-    PyObject* out_object;
-#if PY_VERSION_HEX >= 0x030f0000
-    PyBytesWriter* writer;
-#endif
-    char* dst;
+    size_t len_ = 0U;
 
-    if (wrapcol < 0) {
+    if (*wrapcol < 0) {
         PyErr_SetString(PyExc_ValueError, "wrapcol must be >= 0");
-        return NULL;
+        return -1;
     }
-    if (wrapcol > 0) {
+    if (*wrapcol > 0) {
         /* round down except for low value which are rounded up */
-        wrapcol = (wrapcol < 4) ? 4U : (((size_t)wrapcol / 4U) * 4U);
+        *wrapcol = (*wrapcol < 4) ? 4U : (((size_t)*wrapcol / 4U) * 4U);
     }
 
-    if (buffer->len > (3 * (PY_SSIZE_T_MAX / 4))) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-        return PyErr_NoMemory(); /* GCOVR_EXCL_LINE */
+    if (len > (3 * (PY_SSIZE_T_MAX / 4))) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        PyErr_NoMemory(); /* GCOVR_EXCL_LINE */
+        return -1; /* GCOVR_EXCL_LINE */
     }
 
-    groups = (size_t)(buffer->len / 3);
-    groups_remainder = (size_t)buffer->len - groups * 3U;
-    out_len = groups * 4;
+    groups = (size_t)(len / 3);
+    groups_remainder = (size_t)len - groups * 3U;
+    len_ = groups * 4;
     switch (groups_remainder)
     {
     case 1:
-        out_len += (flags & PYBASE64_FLAGS_NO_PADDING) ? 2U : 4U;
+        len_ += (*flags & PYBASE64_FLAGS_NO_PADDING) ? 2U : 4U;
         break;
     case 2:
-        out_len += (flags & PYBASE64_FLAGS_NO_PADDING) ? 3U : 4U;
+        len_ += (*flags & PYBASE64_FLAGS_NO_PADDING) ? 3U : 4U;
         break;
     default:
         break;
     }
-    if (wrapcol > 0 && out_len > 0) {
-        size_t newlines = (out_len - 1U) / (size_t)wrapcol;
-        if (newlines > ((size_t)PY_SSIZE_T_MAX - out_len)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-            return PyErr_NoMemory(); /* GCOVR_EXCL_LINE */
+    if (*wrapcol > 0 && len_ > 0) {
+        size_t newlines = (len_ - 1U) / (size_t)*wrapcol;
+        if (newlines > ((size_t)PY_SSIZE_T_MAX - len_)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            PyErr_NoMemory(); /* GCOVR_EXCL_LINE */
+            return -1; /* GCOVR_EXCL_LINE */
         }
-        out_len += newlines;
+        len_ += newlines;
         if (newlines == 0) {
-            wrapcol = 0;
+            *wrapcol = 0;
         }
     }
-    if (out_len == 0U) {
-        flags &= ~PYBASE64_FLAGS_APPEND_NEW_LINE;
+    if (len_ == 0U) {
+        *flags &= ~PYBASE64_FLAGS_APPEND_NEW_LINE;
     }
-    if (flags & PYBASE64_FLAGS_APPEND_NEW_LINE) {
-        if (out_len > ((size_t)PY_SSIZE_T_MAX - 1U)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-            return PyErr_NoMemory(); /* GCOVR_EXCL_LINE */
+    if (*flags & PYBASE64_FLAGS_APPEND_NEW_LINE) {
+        if (len_ > ((size_t)PY_SSIZE_T_MAX - 1U)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            PyErr_NoMemory(); /* GCOVR_EXCL_LINE */
+            return -1; /* GCOVR_EXCL_LINE */
         }
-        out_len++;
+        len_++;
     }
+    *out_len = len_;
+    return 0;
+}
 
-    if (flags & PYBASE64_FLAGS_ENCODE_AS_STRING) {
-        out_object = PyUnicode_New((Py_ssize_t)out_len, 127);
-        if (out_object == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-            return NULL; /* GCOVR_EXCL_LINE */
+/* number of new lines needed to wrap n characters starting at column, no trailing new line */
+static size_t wrap_lines_count(size_t column, size_t n, size_t wrapcol)
+{
+    if (n == 0U) {
+        return 0U;
+    }
+    return (column + n - 1U) / wrapcol;
+}
+
+/* expands n characters from src to dst inserting new lines, dst <= src, returns the end of dst */
+static char* wrap_lines(char* dst, const char* src, size_t n, size_t wrapcol, size_t* column)
+{
+    size_t col = *column;
+
+    while (n > 0U) {
+        size_t len;
+
+        if (col == wrapcol) {
+            *dst++ = '\n';
+            col = 0U;
         }
-        if (PyUnicode_KIND(out_object) != PyUnicode_1BYTE_KIND) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-            /* GCOVR_EXCL_START */
-            Py_DECREF(out_object);
-            PyErr_SetString(PyExc_RuntimeError, "Not a PyUnicode_1BYTE_KIND object");
-            return NULL;
-            /* GCOVR_EXCL_STOP */
+        len = wrapcol - col;
+        if (len > n) {
+            len = n;
         }
-        dst = (char*)PyUnicode_DATA(out_object);
-    }
-    else {
-#if PY_VERSION_HEX >= 0x030f0000
-        writer = PyBytesWriter_Create((Py_ssize_t)out_len);
-        if (writer == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-            return NULL; /* GCOVR_EXCL_LINE */
-        }
-        dst = PyBytesWriter_GetData(writer);
-#else
-        out_object = PyBytes_FromStringAndSize(NULL, (Py_ssize_t)out_len);
-        if (out_object == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-            return NULL; /* GCOVR_EXCL_LINE */
-        }
-        dst = PyBytes_AS_STRING(out_object);
-#endif
+        memmove(dst, src, len);
+        dst += len;
+        src += len;
+        n -= len;
+        col += len;
     }
+    *column = col;
+    return dst;
+}
 
-    /* not interacting with Python objects from here, release the GIL */
-    Py_BEGIN_ALLOW_THREADS
+/* output size of a block of lines encoded at once when wrapping */
+#define PYBASE64_WRAP_BLOCK_SIZE (16U * 1024U)
 
+/* wrapcol & flags must have been normalized by pybase64_encode_length */
+/* does not interact with Python objects, can be called without the GIL */
+static char* pybase64_encode_core(const char* src, Py_ssize_t src_len, char* dst, size_t out_len, char const* alphabet, Py_ssize_t wrapcol, unsigned int flags)
+{
     int const nopadding = (flags & PYBASE64_FLAGS_NO_PADDING);
     int const b64_flags = 0;
     struct base64_state b64_state;
@@ -726,56 +1371,58 @@ static PyObject* pybase64_encode_impl_core(PyObject* self, Py_buffer const* buff
     }
 
     if (wrapcol) {
-        const size_t dst_slice = (size_t)wrapcol + 1U;
-        const Py_ssize_t src_slice = (Py_ssize_t)((dst_slice / 4U) * 3U);
-        Py_ssize_t len = buffer->len;
-        const char* src = (const char*)buffer->buf;
-
-        if (alphabet) {
-            size_t remainder;
-
-            while (out_len > dst_slice) {
-                size_t dst_len = (size_t)wrapcol;
+        /*
+         * encode blocks of whole lines at once, the encoded block is written
+         * at the end of the output region then expanded in place to add the
+         * new lines. This avoids a codec call per line.
+         */
+        const size_t line_len = (size_t)wrapcol;
+        const size_t block_lines = (PYBASE64_WRAP_BLOCK_SIZE > line_len) ? (PYBASE64_WRAP_BLOCK_SIZE / line_len) : 1U;
+        const size_t block_enc = block_lines * line_len;
+        const size_t block_dst = block_enc + block_lines;
+        const Py_ssize_t block_src = (Py_ssize_t)((block_enc / 4U) * 3U);
+        Py_ssize_t len = src_len;
+        size_t newlines;
+        size_t enc_len;
+        size_t remainder;
+        size_t column = 0U;
 
-                base64_stream_encode(&b64_state, src, src_slice, dst, &dst_len);
-                translate_inplace(dst, dst_len, alphabet);
-                dst[dst_len] = '\n';
+        while (out_len > block_dst) {
+            char* enc = dst + block_lines;
+            char* end;
 
-                len -= src_slice;
-                src += src_slice;
-                out_len -= dst_slice;
-                dst += dst_slice;
+            enc_len = block_enc;
+            base64_stream_encode(&b64_state, src, block_src, enc, &enc_len);
+            if (alphabet) {
+                translate_inplace(enc, enc_len, alphabet);
             }
-            base64_stream_encode(&b64_state, src, len, dst, &out_len);
-            remainder = out_len;
-            pybase64_stream_encode_final(&b64_state, dst + out_len, &out_len, nopadding);
-            remainder += out_len;
-            translate_inplace(dst, remainder, alphabet);
-            dst += remainder;
+            column = 0U;
+            end = wrap_lines(dst, enc, enc_len, line_len, &column);
+            *end = '\n';
+
+            len -= block_src;
+            src += block_src;
+            out_len -= block_dst;
+            dst += block_dst;
         }
-        else {
-            while (out_len > dst_slice) {
-                size_t dst_len = (size_t)wrapcol;
-                base64_stream_encode(&b64_state, src, src_slice, dst, &dst_len);
-                dst[dst_len] = '\n';
-
-                len -= src_slice;
-                src += src_slice;
-                out_len -= dst_slice;
-                dst += dst_slice;
-            }
-            base64_stream_encode(&b64_state, src, len, dst, &out_len);
-            dst += out_len;
-            pybase64_stream_encode_final(&b64_state, dst, &out_len, nopadding);
-            dst += out_len;
+        /* out_len = encoded + (encoded - 1) / wrapcol */
+        newlines = out_len / (line_len + 1U);
+        enc_len = out_len - newlines;
+        base64_stream_encode(&b64_state, src, len, dst + newlines, &enc_len);
+        remainder = enc_len;
+        pybase64_stream_encode_final(&b64_state, dst + newlines + enc_len, &enc_len, nopadding);
+        remainder += enc_len;
+        if (alphabet) {
+            translate_inplace(dst + newlines, remainder, alphabet);
         }
+        column = 0U;
+        dst = wrap_lines(dst, dst + newlines, remainder, line_len, &column);
     }
     else if (alphabet) {
         /* TODO, make this more efficient */
         const size_t dst_slice = 16U * 1024U;
         const Py_ssize_t src_slice = (Py_ssize_t)((dst_slice / 4U) * 3U);
-        Py_ssize_t len = buffer->len;
-        const char* src = (const char*)buffer->buf;
+        Py_ssize_t len = src_len;
         size_t remainder;
 
         while (out_len > dst_slice) {
@@ -797,7 +1444,7 @@ static PyObject* pybase64_encode_impl_core(PyObject* self, Py_buffer const* buff
         dst += remainder;
     }
     else {
-        base64_stream_encode(&b64_state, buffer->buf, buffer->len, dst, &out_len);
+        base64_stream_encode(&b64_state, src, src_len, dst, &out_len);
         dst += out_len;
         pybase64_stream_encode_final(&b64_state, dst, &out_len, nopadding);
         dst += out_len;
@@ -805,9 +1452,229 @@ static PyObject* pybase64_encode_impl_core(PyObject* self, Py_buffer const* buff
     if (flags & PYBASE64_FLAGS_APPEND_NEW_LINE) {
         *dst++ = '\n';
     }
+    return dst;
+}
+
+/* returns 0 on success */
+static int check_threads(Py_ssize_t threads)
+{
+    if (threads < 1) {
+        PyErr_SetString(PyExc_ValueError, "threads must be >= 1");
+        return -1;
+    }
+    return 0;
+}
+
+/* inputs smaller than this are never split between threads */
+#define PYBASE64_THREADS_MIN_CHUNK (1024 * 1024)
+#define PYBASE64_THREADS_MAX 64
+
+typedef struct pybase64_thread {
+    void (*fn)(void*);
+    void* arg;
+    PyThread_type_lock done;
+} pybase64_thread;
+
+static void pybase64_thread_main(void* arg)
+{
+    pybase64_thread* thread = (pybase64_thread*)arg;
+    thread->fn(thread->arg);
+    PyThread_release_lock(thread->done);
+}
+
+/* runs fn on count tasks of task_size bytes, task 0 runs on the calling thread */
+/* does not interact with Python objects, can be called without the GIL */
+static void pybase64_run_tasks(void (*fn)(void*), void* tasks, size_t task_size, Py_ssize_t count)
+{
+    pybase64_thread threads[PYBASE64_THREADS_MAX];
+    Py_ssize_t i;
+
+    assert(count <= PYBASE64_THREADS_MAX);
+    for (i = 1; i < count; ++i) {
+        pybase64_thread* thread = &threads[i];
+
+        thread->fn = fn;
+        thread->arg = (char*)tasks + (size_t)i * task_size;
+        thread->done = PyThread_allocate_lock();
+        if (thread->done != NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            PyThread_acquire_lock(thread->done, 1);
+            if (PyThread_start_new_thread(pybase64_thread_main, thread) != PYTHREAD_INVALID_THREAD_ID) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+                continue;
+            }
+            /* GCOVR_EXCL_START */
+            PyThread_release_lock(thread->done);
+            PyThread_free_lock(thread->done);
+            thread->done = NULL;
+            /* GCOVR_EXCL_STOP */
+        }
+        /* unable to start a thread, run the task on the calling thread */
+        fn(thread->arg); /* GCOVR_EXCL_LINE */
+    }
+    fn(tasks);
+    for (i = 1; i < count; ++i) {
+        if (threads[i].done != NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            PyThread_acquire_lock(threads[i].done, 1);
+            PyThread_release_lock(threads[i].done);
+            PyThread_free_lock(threads[i].done);
+        }
+    }
+}
+
+/* returns the number of tasks to use for len bytes split in chunks multiple of unit, chunk is set accordingly */
+static Py_ssize_t pybase64_split_tasks(Py_ssize_t len, Py_ssize_t threads, size_t unit, size_t* chunk)
+{
+    size_t count = (size_t)threads;
+
+    if (count > PYBASE64_THREADS_MAX) {
+        count = PYBASE64_THREADS_MAX;
+    }
+    if (count > (size_t)len / PYBASE64_THREADS_MIN_CHUNK) {
+        count = (size_t)len / PYBASE64_THREADS_MIN_CHUNK;
+    }
+    if (count <= 1U) {
+        return 1;
+    }
+    *chunk = (((size_t)len / count) / unit) * unit;
+    if (*chunk == 0U) {
+        return 1;
+    }
+    return (Py_ssize_t)count;
+}
+
+typedef struct pybase64_encode_task {
+    const char* src;
+    Py_ssize_t src_len;
+    char* dst;
+    size_t out_len;
+    char const* alphabet;
+    Py_ssize_t wrapcol;
+    unsigned int flags;
+    int append_new_line;
+} pybase64_encode_task;
+
+static void pybase64_encode_task_run(void* arg)
+{
+    pybase64_encode_task* task = (pybase64_encode_task*)arg;
+    char* dst = pybase64_encode_core(task->src, task->src_len, task->dst, task->out_len, task->alphabet, task->wrapcol, task->flags);
+    if (task->append_new_line) {
+        *dst = '\n';
+    }
+}
+
+/* input bytes per encoding task unit, chunks are made of complete lines when wrapping */
+static size_t pybase64_encode_unit(Py_ssize_t wrapcol)
+{
+    return (wrapcol > 0) ? (((size_t)wrapcol / 4U) * 3U) : 3U;
+}
+
+/* same as pybase64_encode_core, splits the work between threads for large inputs */
+/* does not interact with Python objects, can be called without the GIL */
+static char* pybase64_encode_core_threads(const char* src, Py_ssize_t src_len, char* dst, size_t out_len, char const* alphabet, Py_ssize_t wrapcol, unsigned int flags, Py_ssize_t threads)
+{
+    pybase64_encode_task tasks[PYBASE64_THREADS_MAX];
+    size_t unit = pybase64_encode_unit(wrapcol);
+    size_t chunk = 0U;
+    size_t dst_chunk;
+    Py_ssize_t count = pybase64_split_tasks(src_len, threads, unit, &chunk);
+    Py_ssize_t i;
+
+    if (count == 1) {
+        return pybase64_encode_core(src, src_len, dst, out_len, alphabet, wrapcol, flags);
+    }
+
+    dst_chunk = (chunk / 3U) * 4U;
+    if (wrapcol > 0) {
+        dst_chunk += chunk / unit;
+    }
+    for (i = 0; i < count; ++i) {
+        pybase64_encode_task* task = &tasks[i];
+
+        task->src = src + (size_t)i * chunk;
+        task->dst = dst + (size_t)i * dst_chunk;
+        task->alphabet = alphabet;
+        task->wrapcol = wrapcol;
+        if (i == count - 1) {
+            task->src_len = src_len - (Py_ssize_t)((size_t)i * chunk);
+            task->out_len = out_len - (size_t)i * dst_chunk;
+            task->flags = flags;
+            task->append_new_line = 0;
+        }
+        else {
+            /* the new line ending the last line of the chunk is appended by the task */
+            task->src_len = (Py_ssize_t)chunk;
+            task->out_len = (wrapcol > 0) ? (dst_chunk - 1U) : dst_chunk;
+            task->flags = flags & ~PYBASE64_FLAGS_APPEND_NEW_LINE;
+            task->append_new_line = (wrapcol > 0);
+        }
+    }
+    pybase64_run_tasks(pybase64_encode_task_run, tasks, sizeof(tasks[0]), count);
+    return dst + out_len;
+}
+
+/* returns what pybase64.explain() reports instead of the encoded data when explain is not 0 */
+static PyObject* pybase64_encode_impl_core(pybase64_state* state, enum pybase64_stats_entry entry, Py_buffer const* buffer, char const* alphabet, Py_ssize_t wrapcol, unsigned int flags, Py_ssize_t threads, int explain)
+{
+    size_t out_len;
+    PyObject* out_object;
+#if PY_VERSION_HEX >= 0x030f0000
+    PyBytesWriter* writer;
+#endif
+    char* dst;
+
+    if (pybase64_encode_length(buffer->len, &wrapcol, &flags, &out_len) != 0) {
+        PYBASE64_STATS_RECORD(state, entry, PYBASE64_STATS_ERROR, buffer->len, 0U)
+        return NULL;
+    }
+
+    if (explain) {
+        pybase64_explain info;
+        size_t chunk = 0U;
+
+        pybase64_explain_init(&info, pybase64_stats_encode_path(alphabet, wrapcol), alphabet != NULL, out_len);
+        info.release_gil = PYBASE64_RELEASE_GIL(out_len);
+        info.threads = pybase64_split_tasks(buffer->len, threads, pybase64_encode_unit(wrapcol), &chunk);
+        return pybase64_explain_result(&info);
+    }
+
+    if (flags & PYBASE64_FLAGS_ENCODE_AS_STRING) {
+        out_object = PyUnicode_New((Py_ssize_t)out_len, 127);
+        if (out_object == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            return NULL; /* GCOVR_EXCL_LINE */
+        }
+        if (PyUnicode_KIND(out_object) != PyUnicode_1BYTE_KIND) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            /* GCOVR_EXCL_START */
+            Py_DECREF(out_object);
+            PyErr_SetString(PyExc_RuntimeError, "Not a PyUnicode_1BYTE_KIND object");
+            return NULL;
+            /* GCOVR_EXCL_STOP */
+        }
+        dst = (char*)PyUnicode_DATA(out_object);
+    }
+    else {
+#if PY_VERSION_HEX >= 0x030f0000
+        writer = PyBytesWriter_Create((Py_ssize_t)out_len);
+        if (writer == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            return NULL; /* GCOVR_EXCL_LINE */
+        }
+        dst = PyBytesWriter_GetData(writer);
+#else
+        out_object = PyBytes_FromStringAndSize(NULL, (Py_ssize_t)out_len);
+        if (out_object == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            return NULL; /* GCOVR_EXCL_LINE */
+        }
+        dst = PyBytes_AS_STRING(out_object);
+#endif
+    }
+
+    /* not interacting with Python objects from here, release the GIL */
+    PYBASE64_BEGIN_ALLOW_THREADS(out_len)
+
+    dst = pybase64_encode_core_threads((const char*)buffer->buf, buffer->len, dst, out_len, alphabet, wrapcol, flags, threads);
 
     /* restore the GIL */
-    Py_END_ALLOW_THREADS
+    PYBASE64_END_ALLOW_THREADS
+
+    PYBASE64_STATS_RECORD(state, entry, pybase64_stats_encode_path(alphabet, wrapcol), buffer->len, out_len)
 
 #if PY_VERSION_HEX >= 0x030f0000
     if (!(flags & PYBASE64_FLAGS_ENCODE_AS_STRING)) {
@@ -818,9 +1685,9 @@ static PyObject* pybase64_encode_impl_core(PyObject* self, Py_buffer const* buff
     return out_object;
 }
 
-static PyObject* pybase64_encode_impl(PyObject* self, PyObject* args, PyObject *kwds, unsigned int flags)
+static PyObject* pybase64_encode_impl(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames, unsigned int flags, int explain)
 {
-    static const char *kwlist[] = { "", "altchars", "padded", "wrapcol", NULL };
+    static const pybase64_params params = { "O|O$pnn", { PYBASE64_KW_NONE, PYBASE64_KW_ALTCHARS, PYBASE64_KW_PADDED, PYBASE64_KW_WRAPCOL, PYBASE64_KW_THREADS } };
 
     int use_alphabet = 0;
     char alphabet[2];
@@ -830,9 +1697,18 @@ static PyObject* pybase64_encode_impl(PyObject* self, PyObject* args, PyObject *
     PyObject* in_alphabet = NULL;
     int padded = 1;
     Py_ssize_t wrapcol = 0;
+    Py_ssize_t threads = 1;
+    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
 
-    /* Parse the input tuple */
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|O$pn", KW_CONST_CAST kwlist, &in_object, &in_alphabet, &padded, &wrapcol)) {
+    /* Parse the arguments */
+    if (parse_fastcall_args(state, &params, args, nargs, kwnames, &in_object, &in_alphabet, &padded, &wrapcol, &threads) != 0) {
+        return NULL;
+    }
+
+    if (check_threads(threads) != 0) {
         return NULL;
     }
 
@@ -848,21 +1724,141 @@ static PyObject* pybase64_encode_impl(PyObject* self, PyObject* args, PyObject *
         flags |= PYBASE64_FLAGS_NO_PADDING;
     }
 
-    out_object = pybase64_encode_impl_core(self, &buffer, use_alphabet ? alphabet : NULL, wrapcol, flags);
+    out_object = pybase64_encode_impl_core(state, (flags & PYBASE64_FLAGS_ENCODE_AS_STRING) ? PYBASE64_STATS_B64ENCODE_AS_STRING : PYBASE64_STATS_B64ENCODE, &buffer, use_alphabet ? alphabet : NULL, wrapcol, flags, threads, explain);
 
     PyBuffer_Release(&buffer);
 
     return out_object;
 }
 
-static PyObject* pybase64_encode(PyObject* self, PyObject* args, PyObject *kwds)
+static PyObject* pybase64_encode_into_impl(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames, int explain)
+{
+    static const pybase64_params params = { "OO|O$pnn", { PYBASE64_KW_NONE, PYBASE64_KW_NONE, PYBASE64_KW_ALTCHARS, PYBASE64_KW_PADDED, PYBASE64_KW_WRAPCOL, PYBASE64_KW_OFFSET } };
+
+    int use_alphabet = 0;
+    char alphabet[2];
+    Py_buffer buffer;
+    Py_buffer out_buffer;
+    PyObject* in_object;
+    PyObject* out_object;
+    PyObject* in_alphabet = NULL;
+    int padded = 1;
+    Py_ssize_t wrapcol = 0;
+    Py_ssize_t offset = 0;
+    unsigned int flags = 0U;
+    size_t out_len;
+    PyObject* result = NULL;
+    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+
+    /* Parse the arguments */
+    if (parse_fastcall_args(state, &params, args, nargs, kwnames, &in_object, &out_object, &in_alphabet, &padded, &wrapcol, &offset) != 0) {
+        return NULL;
+    }
+
+    if (parse_alphabet(in_alphabet, alphabet, &use_alphabet) != 0) {
+        return NULL;
+    }
+
+    if (get_buffer(in_object, &buffer, 0) != 0) {
+        return NULL;
+    }
+
+    if (get_writable_buffer(out_object, &out_buffer, offset) != 0) {
+        PyBuffer_Release(&buffer);
+        return NULL;
+    }
+
+    if ((buffer.len > 0) && !padded) {
+        flags |= PYBASE64_FLAGS_NO_PADDING;
+    }
+
+    if (pybase64_encode_length(buffer.len, &wrapcol, &flags, &out_len) != 0) {
+        PYBASE64_STATS_RECORD(state, PYBASE64_STATS_B64ENCODE_INTO, PYBASE64_STATS_ERROR, buffer.len, 0U)
+        goto END;
+    }
+    if (out_len > (size_t)(out_buffer.len - offset)) {
+        PyErr_Format(PyExc_ValueError, "output buffer too small, %zu bytes needed, %zd available", out_len, out_buffer.len - offset);
+        PYBASE64_STATS_RECORD(state, PYBASE64_STATS_B64ENCODE_INTO, PYBASE64_STATS_ERROR, buffer.len, 0U)
+        goto END;
+    }
+
+    if (explain) {
+        pybase64_explain info;
+
+        pybase64_explain_init(&info, pybase64_stats_encode_path(use_alphabet ? alphabet : NULL, wrapcol), use_alphabet, out_len);
+        info.release_gil = PYBASE64_RELEASE_GIL(out_len);
+        result = pybase64_explain_result(&info);
+        goto END;
+    }
+
+    /* not interacting with Python objects from here, release the GIL */
+    PYBASE64_BEGIN_ALLOW_THREADS(out_len)
+
+    pybase64_encode_core((const char*)buffer.buf, buffer.len, (char*)out_buffer.buf + offset, out_len, use_alphabet ? alphabet : NULL, wrapcol, flags);
+
+    /* restore the GIL */
+    PYBASE64_END_ALLOW_THREADS
+
+    PYBASE64_STATS_RECORD(state, PYBASE64_STATS_B64ENCODE_INTO, pybase64_stats_encode_path(use_alphabet ? alphabet : NULL, wrapcol), buffer.len, out_len)
+
+    result = PyLong_FromSize_t(out_len);
+END:
+    PyBuffer_Release(&out_buffer);
+    PyBuffer_Release(&buffer);
+
+    return result;
+}
+
+static PyObject* pybase64_encode_into(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
+{
+    return pybase64_encode_into_impl(self, args, nargs, kwnames, 0);
+}
+
+static PyObject* pybase64_encode(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
 {
-    return pybase64_encode_impl(self, args, kwds, 0U);
+    return pybase64_encode_impl(self, args, nargs, kwnames, 0U, 0);
 }
 
-static PyObject* pybase64_encode_as_string(PyObject* self, PyObject* args, PyObject *kwds)
+static PyObject* pybase64_encode_as_string(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
 {
-    return pybase64_encode_impl(self, args, kwds, PYBASE64_FLAGS_ENCODE_AS_STRING);
+    return pybase64_encode_impl(self, args, nargs, kwnames, PYBASE64_FLAGS_ENCODE_AS_STRING, 0);
+}
+
+static PyObject* pybase64_encoded_length(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
+{
+    static const pybase64_params params = { "n$pn", { PYBASE64_KW_NONE, PYBASE64_KW_PADDED, PYBASE64_KW_WRAPCOL } };
+
+    Py_ssize_t len;
+    int padded = 1;
+    Py_ssize_t wrapcol = 0;
+    unsigned int flags = 0U;
+    size_t out_len;
+    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+
+    /* Parse the arguments */
+    if (parse_fastcall_args(state, &params, args, nargs, kwnames, &len, &padded, &wrapcol) != 0) {
+        return NULL;
+    }
+
+    if (len < 0) {
+        PyErr_SetString(PyExc_ValueError, "n must be >= 0");
+        return NULL;
+    }
+
+    if ((len > 0) && !padded) {
+        flags |= PYBASE64_FLAGS_NO_PADDING;
+    }
+
+    if (pybase64_encode_length(len, &wrapcol, &flags, &out_len) != 0) {
+        return NULL;
+    }
+    return PyLong_FromSize_t(out_len);
 }
 
 static PyObject* get_ignorechars_buffer(PyObject* object, Py_buffer* buffer, char const* alphabet)
@@ -916,186 +1912,852 @@ END:
     return result;
 }
 
-static PyObject* pybase64_decode_impl(PyObject* self, PyObject* args, PyObject *kwds, int return_bytearray)
+static void set_decode_slow_error(pybase64_state* state, int result)
 {
-    static const char *kwlist[] = { "", "altchars", "validate", "padded", "ignorechars", "canonical", NULL };
+    switch(result) /* GCOVR_EXCL_BR_WITHOUT_HIT: 2/11 */
+    {
+    case PYBASE64_DECODE_SLOW_INCORRECT_PADDING:
+        PyErr_SetString(state->binAsciiError, "Incorrect padding");
+        break;
+    case PYBASE64_DECODE_SLOW_EXCESS_DATA:
+        PyErr_SetString(state->binAsciiError, "Excess data after padding");
+        break;
+    case PYBASE64_DECODE_SLOW_LEADING_PADDING:
+        PyErr_SetString(state->binAsciiError, "Leading padding");
+        break;
+    case PYBASE64_DECODE_SLOW_DISCONTINUOUS_PADDING:
+        PyErr_SetString(state->binAsciiError, "Discontinuous padding");
+        break;
+    case PYBASE64_DECODE_SLOW_EXCESS_PADDING:
+        PyErr_SetString(state->binAsciiError, "Excess padding");
+        break;
+    case PYBASE64_DECODE_SLOW_INVALID_LEN:
+        PyErr_SetString(state->binAsciiError, "Invalid number of data characters");
+        break;
+    case PYBASE64_DECODE_SLOW_INVALID_DATA:
+        PyErr_SetString(state->binAsciiError, "Non-base64 digit found");
+        break;
+    case PYBASE64_DECODE_SLOW_PADDING_NOT_ALLOWED:
+        PyErr_SetString(state->binAsciiError, "Padding not allowed");
+        break;
+    case PYBASE64_DECODE_SLOW_PADDING_BITS_NOT_ALLOWED:
+        PyErr_SetString(state->binAsciiError, "Non-zero padding bits");
+        break;
+    case PYBASE64_DECODE_SLOW_NO_MEMORY:
+        PyErr_NoMemory(); /* GCOVR_EXCL_LINE */
+        break; /* GCOVR_EXCL_LINE */
+    }
+}
 
-    int use_alphabet = 0;
-    int use_alphabet_for_ignore_chars;
-    int has_bad_char = 0;
-    char alphabet[2];
-    int validation;
-    Py_buffer buffer;
+typedef struct pybase64_decode_options {
+    PyObject* altchars_object; /* borrowed, only used for warnings */
+    PyObject* ignorechars_object;
     Py_buffer ignorechars_buffer;
-    size_t out_len;
-    PyObject* in_alphabet = NULL;
-    PyObject* in_object;
-    PyObject* validation_object = NULL;
-    PyObject* ignorechars_object = NULL;
-    int canonical = 0;
-    int padded = 1;
+    void (*translate_fn)(const char*, char*, size_t, const char*, int*);
+    pybase64_decode_tables const* tables;
+    int use_alphabet;
+    int translate_slow; /* slow path needs the input to be translated */
+    int validation;
+    int padded;
+    int canonical;
     int fast_path;
-    PyObject* out_object = NULL;
-#if PY_VERSION_HEX >= 0x030f0000
-    PyBytesWriter* writer = NULL;
-#endif
-    const void* source = NULL;
-    Py_ssize_t source_len;
-    int source_use_buffer = 0;
-    void* dest;
-    void (*translate_fn)(const char*, char*, size_t, const char*, int*) = &translate_deprecated;
-    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
-    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-        return NULL; /* GCOVR_EXCL_LINE */
+    char alphabet[2];
+} pybase64_decode_options;
+
+static enum pybase64_stats_path pybase64_stats_decode_path(pybase64_decode_options const* options)
+{
+    if (!options->fast_path) {
+        return PYBASE64_STATS_SLOW;
     }
-    /* Parse the input tuple */
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|OO$pOp", KW_CONST_CAST kwlist, &in_object, &in_alphabet, &validation_object, &padded, &ignorechars_object, &canonical)) {
-        return NULL;
+    return options->use_alphabet ? PYBASE64_STATS_TRANSLATE : PYBASE64_STATS_FAST;
+}
+
+static void pybase64_decode_options_release(pybase64_decode_options* options)
+{
+    if (options->ignorechars_object != NULL) {
+        PyBuffer_Release(&options->ignorechars_buffer);
+        Py_CLEAR(options->ignorechars_object);
     }
+}
+
+/* returns 0 on success, pybase64_decode_options_release must be called on success */
+static int pybase64_decode_options_init(pybase64_state* state, pybase64_decode_options* options, PyObject* in_alphabet, PyObject* validation_object, int padded, PyObject* ignorechars_object, int canonical)
+{
+    int use_alphabet_for_ignore_chars;
+
+    options->altchars_object = in_alphabet;
+    options->ignorechars_object = NULL;
+    options->translate_fn = &translate_deprecated;
+    options->padded = padded;
+    options->canonical = canonical;
 
     if (validation_object == NULL) {
-        validation = (ignorechars_object != NULL);
+        options->validation = (ignorechars_object != NULL);
     }
     else {
-        validation = PyObject_IsTrue(validation_object);
-        if (validation < 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-            return NULL; /* GCOVR_EXCL_LINE */
+        options->validation = PyObject_IsTrue(validation_object);
+        if (options->validation < 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            return -1; /* GCOVR_EXCL_LINE */
         }
-        if ((ignorechars_object != NULL) && !validation ) {
+        if ((ignorechars_object != NULL) && !options->validation ) {
             PyErr_SetString(PyExc_ValueError, "validate must be True or unspecified when ignorechars is specified");
-            return NULL;
+            return -1;
         }
     }
 
-    if (parse_alphabet(in_alphabet, alphabet, &use_alphabet) != 0) {
-        return NULL;
+    if (parse_alphabet(in_alphabet, options->alphabet, &options->use_alphabet) != 0) {
+        return -1;
     }
 
     /* default to fast path when validation is true */
-    fast_path = validation;
+    options->fast_path = options->validation;
+
+    options->tables = &state->decode_tables[PYBASE64_DECODE_TABLES_STANDARD];
+    options->translate_slow = options->use_alphabet;
+    if (options->use_alphabet && (options->alphabet[0] == '-') && (options->alphabet[1] == '_')) {
+        /* the slow path decodes the url-safe alphabet in a single pass */
+        options->tables = &state->decode_tables[options->validation ? PYBASE64_DECODE_TABLES_URLSAFE_STRICT : PYBASE64_DECODE_TABLES_URLSAFE];
+        options->translate_slow = 0;
+    }
 
-    use_alphabet_for_ignore_chars = use_alphabet;
-    if (!validation) {
+    use_alphabet_for_ignore_chars = options->translate_slow;
+    if (!options->validation) {
         assert(ignorechars_object == NULL);
-        ignorechars_object = state->ignoreCharsValidateFalse;
+        if (options->tables == &state->decode_tables[PYBASE64_DECODE_TABLES_URLSAFE]) {
+            ignorechars_object = state->ignoreCharsValidateFalseUrlSafe;
+        }
+        else {
+            ignorechars_object = state->ignoreCharsValidateFalse;
+        }
         use_alphabet_for_ignore_chars = 0;
     }
 
     if ((ignorechars_object == NULL) && !padded) {
-        assert(validation);
+        assert(options->validation);
         ignorechars_object = state->ignoreCharsNoPadding;
         use_alphabet_for_ignore_chars = 0;
     }
 
     if (ignorechars_object != NULL) {
-        ignorechars_object = get_ignorechars_buffer(ignorechars_object, &ignorechars_buffer, use_alphabet_for_ignore_chars ? alphabet : NULL);
+        ignorechars_object = get_ignorechars_buffer(ignorechars_object, &options->ignorechars_buffer, use_alphabet_for_ignore_chars ? options->alphabet : NULL);
         if (ignorechars_object == NULL) {
-            return NULL;
+            return -1;
         }
-        if (validation) {
-            translate_fn = &translate;
+        options->ignorechars_object = ignorechars_object;
+        if (options->validation) {
+            options->translate_fn = &translate;
         }
-        if ((ignorechars_buffer.len == 0) && padded) {
-            PyBuffer_Release(&ignorechars_buffer);
-            Py_DECREF(ignorechars_object);
-            ignorechars_object = NULL;
-            fast_path = 1;
+        if ((options->ignorechars_buffer.len == 0) && padded) {
+            pybase64_decode_options_release(options);
+            options->fast_path = 1;
         }
         else {
-            fast_path = 0;
+            options->fast_path = 0;
         }
     }
+    return 0;
+}
 
-    if (PyUnicode_Check(in_object)) {
-        if (fast_path && (PyUnicode_READY(in_object) == 0) && (PyUnicode_KIND(in_object) == PyUnicode_1BYTE_KIND)) {
-            source = PyUnicode_1BYTE_DATA(in_object);
-            source_len = PyUnicode_GET_LENGTH(in_object);
+/* returns 0 on success, objects keeping the options must not hold an export on a mutable ignorechars */
+static int pybase64_decode_options_own_ignorechars(pybase64_decode_options* options)
+{
+    PyObject* owned;
+
+    if ((options->ignorechars_object == NULL) || PyBytes_CheckExact(options->ignorechars_object)) {
+        return 0;
+    }
+    owned = PyBytes_FromStringAndSize(options->ignorechars_buffer.buf, options->ignorechars_buffer.len);
+    if (owned == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return -1; /* GCOVR_EXCL_LINE */
+    }
+    pybase64_decode_options_release(options);
+    if (get_buffer(owned, &options->ignorechars_buffer, 0) != 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        Py_DECREF(owned); /* GCOVR_EXCL_LINE */
+        return -1; /* GCOVR_EXCL_LINE */
+    }
+    options->ignorechars_object = owned;
+    return 0;
+}
+
+/* returns 0 on success */
+static int warn_bad_char(pybase64_decode_options const* options, int stacklevel)
+{
+    static const char format_validation[] = "invalid characters '+' or '/' in Base64 data with altchars=%R and validate=True will be an error in future versions";
+    static const char format_no_validation[] = "invalid characters '+' or '/' in Base64 data with altchars=%R and validate=False will be discarded in future versions";
+    char const* format = options->validation ? format_validation : format_no_validation;
+    PyObject* category = options->validation ? PyExc_DeprecationWarning : PyExc_FutureWarning;
+    return PyErr_WarnFormat(category, stacklevel, format, options->altchars_object);
+}
+
+/* size of the blocks translated at once when decoding */
+#define PYBASE64_DECODE_BLOCK_SIZE (16U * 1024U)
+
+/* the slow path gathers runs of alphabet characters in blocks decoded by libbase64 */
+/* libbase64 only knows the standard alphabet, the url-safe alphabet is not translated before */
+/* the slow path & its blocks are translated while being gathered */
+static int decode_urlsafe(pybase64_decode_options const* options)
+{
+    return options->use_alphabet && !options->translate_slow;
+}
+
+/* decodes with the libbase64 codec the longest prefix of src made of alphabet characters */
+/* & ignored characters, stops at padding, at any other character & before an incomplete group */
+/* runs of alphabet characters are gathered in a block by copy_alphabet_prefix_impl or */
+/* copy_urlsafe_prefix_impl */
+/* returns the number of bytes consumed from src */
+/* does not interact with Python objects, can be called without the GIL */
+static size_t decode_compact_prefix(const char* src, size_t srclen, char* dst, size_t* out_len, pybase64_decode_options const* options)
+{
+    char block[PYBASE64_DECODE_BLOCK_SIZE];
+    size_t (*copy_prefix)(const char*, size_t, char*) = decode_urlsafe(options) ? copy_urlsafe_prefix_impl : copy_alphabet_prefix_impl;
+    pybase64_decode_tables const* tables = options->tables;
+    const uint8_t* s = (const uint8_t*)src;
+    struct base64_state b64_state;
+    uint32_t ignorecache[8];
+    size_t i = 0U;
+    size_t count = 0U;
+    size_t total = 0U;
+    int stop = 0;
+
+    if (copy_prefix == NULL) {
+        *out_len = 0U;
+        return 0U;
+    }
+
+    memset(ignorecache, 0, sizeof(ignorecache));
+    base64_stream_decode_init(&b64_state, 0);
+
+    while (!stop) {
+        size_t groups;
+
+        while ((i < srclen) && (count < sizeof(block))) {
+            size_t max_len = sizeof(block) - count;
+            size_t n;
+
+            if (max_len > (srclen - i)) {
+                max_len = srclen - i;
+            }
+            n = copy_prefix(src + i, max_len, block + count);
+            count += n;
+            i += n;
+            if ((n == max_len) || (i == srclen)) {
+                break;
+            }
+            if ((tables->dec_8bit[s[i]] != 255U) || !check_ignore(s[i], &options->ignorechars_buffer, ignorecache)) {
+                /* padding, deprecated or invalid character */
+                stop = 1;
+                break;
+            }
+            ++i;
         }
-        else {
-            in_object = PyUnicode_AsASCIIString(in_object);
-            if (in_object == NULL) {
-                if (PyErr_ExceptionMatches(PyExc_UnicodeEncodeError)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-                    PyErr_SetString(PyExc_ValueError, "string argument should contain only ASCII characters");
-                }
-                if (ignorechars_object) {
-                    PyBuffer_Release(&ignorechars_buffer);
-                    Py_DECREF(ignorechars_object);
-                }
-                return NULL;
+        if (i == srclen) {
+            stop = 1;
+        }
+        groups = count & ~(size_t)3U;
+        if (groups > 0U) {
+            size_t len = 0U;
+
+            /* only complete groups of alphabet characters, can't fail */
+            base64_stream_decode(&b64_state, block, groups, dst + total, &len);
+            total += len;
+            count -= groups;
+            memmove(block, block + groups, count);
+        }
+    }
+    /* the characters of an incomplete group are left to decode_slow */
+    while (count > 0U) {
+        --i;
+        if (tables->dec_8bit[s[i]] < 64U) {
+            --count;
+        }
+    }
+    *out_len = total;
+    return i;
+}
+
+/* longest line width looked for when decoding wrapped lines */
+#define PYBASE64_DECODE_LINE_MAX 1024U
+
+/* number of alphabet characters at the start of a line, stops after PYBASE64_DECODE_LINE_MAX + 1 */
+static size_t decode_line_width(const uint8_t* s, size_t len, pybase64_decode_tables const* tables)
+{
+    size_t width = 0U;
+
+    while ((width < len) && (width <= PYBASE64_DECODE_LINE_MAX) && (tables->dec_8bit[s[width]] < 64U)) {
+        ++width;
+    }
+    return width;
+}
+
+/* translates the url-safe alphabet of the lines gathered in a block decoded by libbase64 */
+/* '+' & '/' are translated to characters rejected by libbase64 */
+static void translate_urlsafe_lines(char* block, size_t len, pybase64_decode_options const* options)
+{
+    size_t prefix = 0U;
+
+    if (copy_urlsafe_prefix_impl != NULL) {
+        prefix = copy_urlsafe_prefix_impl(block, len, block);
+    }
+    translate(block + prefix, block + prefix, len - prefix, options->alphabet, NULL);
+}
+
+/* decodes with the libbase64 codec the leading lines of src sharing the width & the new line */
+/* sequence ("\n" or "\r\n", ignored characters) of the first line, e.g. MIME or PEM data */
+/* the first line may be shorter when src starts in the middle of a line, e.g. a stream chunk */
+/* lines are gathered in a block without looking for new lines elsewhere, a block that libbase64 */
+/* can't decode is left to the caller as well as the lines following a line breaking the pattern */
+/* returns the number of bytes consumed from src */
+/* does not interact with Python objects, can be called without the GIL */
+static size_t decode_lines_prefix(const char* src, size_t srclen, char* dst, size_t* out_len, pybase64_decode_options const* options)
+{
+    char block[PYBASE64_DECODE_BLOCK_SIZE];
+    pybase64_decode_tables const* tables = options->tables;
+    const uint8_t* s = (const uint8_t*)src;
+    uint32_t ignorecache[8];
+    size_t head;
+    size_t width;
+    size_t new_line;
+    int has_head = 0;
+    size_t pos = 0U;
+    size_t total = 0U;
+
+    *out_len = 0U;
+    head = decode_line_width(s, srclen, tables);
+    if (((head & 3U) != 0U) || (head > PYBASE64_DECODE_LINE_MAX) || (head == srclen)) {
+        return 0U;
+    }
+    if (src[head] == '\n') {
+        new_line = 1U;
+    }
+    else if ((src[head] == '\r') && ((head + 1U) < srclen) && (src[head + 1U] == '\n')) {
+        new_line = 2U;
+    }
+    else {
+        return 0U;
+    }
+    memset(ignorecache, 0, sizeof(ignorecache));
+    if ((tables->dec_8bit[s[head]] != 255U) || (tables->dec_8bit['\n'] != 255U) ||
+        !check_ignore(s[head], &options->ignorechars_buffer, ignorecache) ||
+        !check_ignore('\n', &options->ignorechars_buffer, ignorecache)) {
+        return 0U;
+    }
+    /* a shorter first line is the end of a line, the width is the one of the next line */
+    width = decode_line_width(s + head + new_line, srclen - head - new_line, tables);
+    if ((width > head) && ((width & 3U) == 0U) && (width <= PYBASE64_DECODE_LINE_MAX)) {
+        has_head = 1;
+    }
+    else if (head > 0U) {
+        width = head;
+    }
+    else {
+        return 0U;
+    }
+
+    for (;;) {
+        struct base64_state b64_state;
+        size_t count = 0U;
+        size_t end = pos;
+        size_t len = 0U;
+
+        if (has_head) {
+            size_t i;
+
+            for (i = 0U; i < head; i += 4U) {
+                memcpy(block + i, src + i, 4U);
+            }
+            count = head;
+            end = head + new_line;
+            has_head = 0;
+        }
+        while (((count + width) <= sizeof(block)) && ((srclen - end) >= (width + new_line)) &&
+               (src[end + width + new_line - 1U] == '\n') && ((new_line == 1U) || (src[end + width] == '\r'))) {
+            size_t i = 0U;
+
+            /* fixed size copies, width is a multiple of 4 */
+            for (; i < (width & ~(size_t)15U); i += 16U) {
+                memcpy(block + count + i, src + end + i, 16U);
+            }
+            for (; i < width; i += 4U) {
+                memcpy(block + count + i, src + end + i, 4U);
+            }
+            count += width;
+            end += width + new_line;
+        }
+        if (count == 0U) {
+            break;
+        }
+        if (decode_urlsafe(options)) {
+            translate_urlsafe_lines(block, count, options);
+        }
+        base64_stream_decode_init(&b64_state, 0);
+        if (!base64_stream_decode(&b64_state, block, count, dst + total, &len) || (b64_state.eof != 0)) {
+            /* not only alphabet characters */
+            break;
+        }
+        total += len;
+        pos = end;
+        if ((count + width) <= sizeof(block)) {
+            /* the pattern is broken */
+            break;
+        }
+    }
+    *out_len = total;
+    return pos;
+}
+
+/* same as decode_slow, the leading alphabet & ignored characters are decoded using libbase64 */
+/* does not interact with Python objects, can be called without the GIL */
+static int decode_slow_compact(const char* src, size_t srclen, char* dst, size_t* out_len, pybase64_decode_options const* options, int has_output, size_t* consumed, int* has_bad_char)
+{
+    size_t lines_out = 0U;
+    size_t lines = decode_lines_prefix(src, srclen, dst, &lines_out, options);
+    size_t prefix_out = 0U;
+    size_t prefix = decode_compact_prefix(src + lines, srclen - lines, dst + lines_out, &prefix_out, options);
+    int result;
+
+    prefix += lines;
+    prefix_out += lines_out;
+    result = decode_slow((const uint8_t*)src + prefix, srclen - prefix, (uint8_t*)dst + prefix_out, out_len, options->tables, &options->ignorechars_buffer, options->padded, options->canonical, has_output || (prefix_out > 0U), consumed, has_bad_char);
+    if (result == PYBASE64_DECODE_SLOW_SUCCESS) {
+        *out_len += prefix_out;
+        if (consumed != NULL) {
+            *consumed += prefix;
+        }
+    }
+    return result;
+}
+
+/* slow path decoding with an alphabet, input is translated & decoded in blocks */
+/* returns PYBASE64_DECODE_SLOW_SUCCESS on success */
+/* does not interact with Python objects, can be called without the GIL */
+static int decode_slow_translate(const char* src, size_t len, char* dst, size_t* out_len, pybase64_decode_options const* options, int* has_bad_char)
+{
+    char cache[PYBASE64_DECODE_BLOCK_SIZE];
+    char* dst_start = dst;
+    char* tmp;
+    size_t pending = 0U;
+    size_t dst_len;
+    int result;
+
+    for (;;) {
+        size_t slice = sizeof(cache) - pending;
+        size_t consumed = 0U;
+
+        if (slice > len) {
+            slice = len;
+        }
+        options->translate_fn(src, cache + pending, slice, options->alphabet, has_bad_char);
+        src += slice;
+        len -= slice;
+        pending += slice;
+        dst_len = 0U;
+        result = decode_slow_compact(cache, pending, dst, &dst_len, options, dst != dst_start, (len > 0U) ? &consumed : NULL, has_bad_char);
+        if (result != PYBASE64_DECODE_SLOW_SUCCESS) {
+            return result;
+        }
+        dst += dst_len;
+        if (len == 0U) {
+            *out_len = (size_t)(dst - dst_start);
+            return result;
+        }
+        if (consumed == 0U) {
+            /* look-ahead does not fit in a block */
+            break;
+        }
+        pending -= consumed;
+        memmove(cache, cache + consumed, pending);
+    }
+
+    /* translate the remaining input at once, only happens with padding in the middle of the data */
+    tmp = PyMem_RawMalloc(pending + len);
+    if (tmp == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return PYBASE64_DECODE_SLOW_NO_MEMORY; /* GCOVR_EXCL_LINE */
+    }
+    memcpy(tmp, cache, pending);
+    options->translate_fn(src, tmp + pending, len, options->alphabet, has_bad_char);
+    dst_len = 0U;
+    result = decode_slow_compact(tmp, pending + len, dst, &dst_len, options, dst != dst_start, NULL, has_bad_char);
+    PyMem_RawFree(tmp);
+    *out_len = (size_t)(dst + dst_len - dst_start);
+    return result;
+}
+
+/* fast path decoding, returns 1 on success, 0 on invalid data */
+/* does not interact with Python objects, can be called without the GIL */
+static int decode_fast(struct base64_state* b64_state, const char* src, size_t len, char* dst, size_t* out_len, pybase64_decode_options const* options, int* has_bad_char)
+{
+    int result = 1;
+
+    if (options->use_alphabet) {
+        /* TODO, make this more efficient */
+        char cache[PYBASE64_DECODE_BLOCK_SIZE];
+        char* dst_start = dst;
+
+        while ((len > 0U) && (result > 0)) {
+            size_t slice = (len > sizeof(cache)) ? sizeof(cache) : len;
+            size_t dst_len;
+            size_t prefix = 0U;
+
+            if (decode_urlsafe(options) && (copy_urlsafe_prefix_impl != NULL)) {
+                /* classify & translate at once, up to the first character which is not url-safe */
+                prefix = copy_urlsafe_prefix_impl(src, slice, cache);
             }
+            options->translate_fn(src + prefix, cache + prefix, slice - prefix, options->alphabet, has_bad_char);
+            result = base64_stream_decode(b64_state, cache, slice, dst, &dst_len);
+            len -= slice;
+            src += slice;
+            dst += dst_len;
         }
+        *out_len = (size_t)(dst - dst_start);
     }
     else {
-        Py_INCREF(in_object);
+        result = base64_stream_decode(b64_state, src, len, dst, out_len);
     }
-    if (source == NULL) {
-        if (get_buffer(in_object, &buffer, 0) != 0) {
-            Py_DECREF(in_object);
-            if (ignorechars_object) {
-                PyBuffer_Release(&ignorechars_buffer);
-                Py_DECREF(ignorechars_object);
+    return (result > 0) ? 1 : 0;
+}
+
+typedef struct pybase64_decode_task {
+    pybase64_decode_options const* options;
+    const char* src;
+    size_t src_len;
+    char* dst;
+    size_t out_len;
+    int last;
+    int result;
+    int has_bad_char;
+    uint8_t carry;
+} pybase64_decode_task;
+
+static void pybase64_decode_task_run(void* arg)
+{
+    pybase64_decode_task* task = (pybase64_decode_task*)arg;
+    struct base64_state b64_state;
+
+    base64_stream_decode_init(&b64_state, 0);
+    task->result = decode_fast(&b64_state, task->src, task->src_len, task->dst, &task->out_len, task->options, &task->has_bad_char);
+    /* data always follows a chunk which is not the last one, padding is not allowed */
+    if ((b64_state.bytes != 0) || (!task->last && (b64_state.eof != 0))) {
+        task->result = 0;
+    }
+    task->carry = b64_state.carry;
+}
+
+static Py_ssize_t decode_split_tasks(size_t len, Py_ssize_t threads, size_t* chunk)
+{
+    return pybase64_split_tasks((Py_ssize_t)len, threads, 4U, chunk);
+}
+
+/* fast path decoding of a complete input, splits the work between threads for large inputs */
+/* returns 1 on success, 0 on invalid data, carry is the one of the last group */
+/* does not interact with Python objects, can be called without the GIL */
+static int decode_fast_threads(const char* src, size_t len, char* dst, size_t* out_len, pybase64_decode_options const* options, int* has_bad_char, uint8_t* carry, Py_ssize_t threads)
+{
+    pybase64_decode_task tasks[PYBASE64_THREADS_MAX];
+    size_t chunk = 0U;
+    Py_ssize_t count = decode_split_tasks(len, threads, &chunk);
+    Py_ssize_t i;
+    int result = 1;
+
+    for (i = 0; i < count; ++i) {
+        pybase64_decode_task* task = &tasks[i];
+
+        task->options = options;
+        task->src = src + (size_t)i * chunk;
+        task->dst = dst + (size_t)i * ((chunk / 4U) * 3U);
+        task->last = (i == count - 1);
+        task->src_len = task->last ? (len - (size_t)i * chunk) : chunk;
+        task->has_bad_char = 0;
+    }
+    pybase64_run_tasks(pybase64_decode_task_run, tasks, sizeof(tasks[0]), count);
+    for (i = 0; i < count; ++i) {
+        result &= tasks[i].result;
+        *has_bad_char |= tasks[i].has_bad_char;
+    }
+    *out_len = (size_t)(count - 1) * ((chunk / 4U) * 3U) + tasks[count - 1].out_len;
+    *carry = tasks[count - 1].carry;
+    return result;
+}
+
+/* copies the part of src fitting in dst, written bytes are counted in total */
+static void copy_fitting(char* dst, size_t dst_len, size_t total, const char* src, size_t len)
+{
+    if (total < dst_len) {
+        memcpy(dst + total, src, ((dst_len - total) < len) ? (dst_len - total) : len);
+    }
+}
+
+/* decodes src block by block into a scratch buffer, the decoded bytes fitting in dst are copied */
+/* out_len is the decoded length, even when larger than dst_len, dst can be NULL with dst_len 0 */
+/* has_output tells if data was already decoded before src */
+/* returns PYBASE64_DECODE_SLOW_SUCCESS on success */
+/* does not interact with Python objects, can be called without the GIL */
+static int decode_length(const char* src, size_t len, char* dst, size_t dst_len, size_t* out_len, pybase64_decode_options const* options, int has_output, int* has_bad_char)
+{
+    char cache[PYBASE64_DECODE_BLOCK_SIZE];
+    char scratch[(PYBASE64_DECODE_BLOCK_SIZE / 4U) * 3U + 4U];
+    size_t total = 0U;
+    size_t pending = 0U;
+    size_t dst_len_slice;
+    char* tmp;
+    int result;
+
+    if (options->fast_path) {
+        struct base64_state b64_state;
+        int ok = 1;
+
+        base64_stream_decode_init(&b64_state, 0);
+        while ((len > 0U) && ok) {
+            size_t slice = (len > sizeof(cache)) ? sizeof(cache) : len;
+
+            ok = decode_fast(&b64_state, src, slice, scratch, &dst_len_slice, options, has_bad_char);
+            copy_fitting(dst, dst_len, total, scratch, dst_len_slice);
+            src += slice;
+            len -= slice;
+            total += dst_len_slice;
+        }
+        if (!ok || (b64_state.bytes != 0)) {
+            return PYBASE64_DECODE_SLOW_INVALID_DATA;
+        }
+        if (options->canonical && (b64_state.carry != 0)) {
+            return PYBASE64_DECODE_SLOW_PADDING_BITS_NOT_ALLOWED;
+        }
+        *out_len = total;
+        return PYBASE64_DECODE_SLOW_SUCCESS;
+    }
+
+    for (;;) {
+        size_t slice = sizeof(cache) - pending;
+        size_t consumed = 0U;
+
+        if (slice > len) {
+            slice = len;
+        }
+        if (options->translate_slow) {
+            options->translate_fn(src, cache + pending, slice, options->alphabet, has_bad_char);
+        }
+        else {
+            memcpy(cache + pending, src, slice);
+        }
+        src += slice;
+        len -= slice;
+        pending += slice;
+        dst_len_slice = 0U;
+        result = decode_slow_compact(cache, pending, scratch, &dst_len_slice, options, has_output || (total > 0U), (len > 0U) ? &consumed : NULL, has_bad_char);
+        if (result != PYBASE64_DECODE_SLOW_SUCCESS) {
+            return result;
+        }
+        copy_fitting(dst, dst_len, total, scratch, dst_len_slice);
+        total += dst_len_slice;
+        if (len == 0U) {
+            *out_len = total;
+            return result;
+        }
+        if (consumed == 0U) {
+            /* look-ahead does not fit in a block */
+            break;
+        }
+        pending -= consumed;
+        memmove(cache, cache + consumed, pending);
+    }
+
+    /* decode the remaining input at once, only happens with padding in the middle of the data */
+    tmp = PyMem_RawMalloc(pending + len + ((pending + len) / 4U) * 3U + 4U);
+    if (tmp == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return PYBASE64_DECODE_SLOW_NO_MEMORY; /* GCOVR_EXCL_LINE */
+    }
+    memcpy(tmp, cache, pending);
+    if (options->translate_slow) {
+        options->translate_fn(src, tmp + pending, len, options->alphabet, has_bad_char);
+    }
+    else {
+        memcpy(tmp + pending, src, len);
+    }
+    dst_len_slice = 0U;
+    result = decode_slow_compact(tmp, pending + len, tmp + pending + len, &dst_len_slice, options, has_output || (total > 0U), NULL, has_bad_char);
+    if (result == PYBASE64_DECODE_SLOW_SUCCESS) {
+        copy_fitting(dst, dst_len, total, tmp + pending + len, dst_len_slice);
+    }
+    PyMem_RawFree(tmp);
+    *out_len = total + dst_len_slice;
+    return result;
+}
+
+/* decodes src into dst which might be too small for the upper bound of the decoded length */
+/* complete groups are decoded in dst while the upper bound of their decoded length fits, */
+/* the remaining input, a few bytes of output for valid data, goes through decode_length */
+/* out_len is the decoded length, even when larger than dst_len */
+/* returns PYBASE64_DECODE_SLOW_SUCCESS on success */
+/* does not interact with Python objects, can be called without the GIL */
+static int decode_into(const char* src, size_t len, char* dst, size_t dst_len, size_t* out_len, pybase64_decode_options const* options, int* has_bad_char)
+{
+    char cache[PYBASE64_DECODE_BLOCK_SIZE];
+    size_t total = 0U;
+    size_t pos = 0U;
+    size_t rest_len = 0U;
+    int result;
+
+    if (options->fast_path) {
+        struct base64_state b64_state;
+        size_t head = (dst_len / 3U) * 4U;
+
+        if (head > len) {
+            head = len;
+        }
+        base64_stream_decode_init(&b64_state, 0);
+        if (!decode_fast(&b64_state, src, head, dst, &total, options, has_bad_char) || (b64_state.bytes != 0)) {
+            return PYBASE64_DECODE_SLOW_INVALID_DATA;
+        }
+        if (head == len) {
+            if (options->canonical && (b64_state.carry != 0)) {
+                return PYBASE64_DECODE_SLOW_PADDING_BITS_NOT_ALLOWED;
             }
-            return NULL;
+            *out_len = total;
+            return PYBASE64_DECODE_SLOW_SUCCESS;
         }
-        source = buffer.buf;
-        source_len = buffer.len;
-        source_use_buffer = 1;
+        if (b64_state.eof != 0) {
+            /* data after padding */
+            return PYBASE64_DECODE_SLOW_INVALID_DATA;
+        }
+        result = decode_length(src + head, len - head, dst + total, dst_len - total, &rest_len, options, total > 0U, has_bad_char);
+        *out_len = total + rest_len;
+        return result;
     }
 
-/* TRY: */
-    if (!fast_path && use_alphabet) {
-        PyObject* translate_object;
-        char* translate_dst;
+    for (;;) {
+        size_t room = dst_len - total;
+        /* decode_slow might write one more byte than the decoded ones */
+        size_t slice = (room >= 4U) ? ((room - 1U) / 3U) * 4U : 0U;
+        size_t consumed = 0U;
+        size_t dst_len_slice = 0U;
+        const char* in = src + pos;
+        int last;
+
+        if (options->translate_slow && (slice > sizeof(cache))) {
+            slice = sizeof(cache);
+        }
+        if (slice == 0U) {
+            break;
+        }
+        last = (len - pos) <= slice;
+        if (last) {
+            slice = len - pos;
+        }
+        if (options->translate_slow) {
+            options->translate_fn(in, cache, slice, options->alphabet, has_bad_char);
+            in = cache;
+        }
+        result = decode_slow_compact(in, slice, dst + total, &dst_len_slice, options, total > 0U, last ? NULL : &consumed, has_bad_char);
+        if (result != PYBASE64_DECODE_SLOW_SUCCESS) {
+            return result;
+        }
+        total += dst_len_slice;
+        if (last) {
+            *out_len = total;
+            return result;
+        }
+        if (consumed == 0U) {
+            /* look-ahead does not fit in the slice */
+            break;
+        }
+        pos += consumed;
+    }
+    result = decode_length(src + pos, len - pos, dst + total, dst_len - total, &rest_len, options, total > 0U, has_bad_char);
+    *out_len = total + rest_len;
+    return result;
+}
 
-#if PY_VERSION_HEX >= 0x030f0000
-        writer = PyBytesWriter_Create(source_len);
-        if (writer == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-            goto EXCEPT; /* GCOVR_EXCL_LINE */
+/* gets the data to decode, a str is used in place when possible */
+/* the buffer must be released with release_decode_buffer */
+static int get_decode_buffer(PyObject* in_object, pybase64_decode_options const* options, Py_buffer* buffer)
+{
+    int result;
+
+    if (PyUnicode_Check(in_object)) {
+        if ((PyUnicode_READY(in_object) == 0) && (PyUnicode_IS_ASCII(in_object) || (options->fast_path && (PyUnicode_KIND(in_object) == PyUnicode_1BYTE_KIND)))) {
+            buffer->buf = PyUnicode_1BYTE_DATA(in_object);
+            buffer->len = PyUnicode_GET_LENGTH(in_object);
+            buffer->obj = NULL;
+            return 0;
         }
-        translate_dst = PyBytesWriter_GetData(writer);
-#else
-        translate_object = PyBytes_FromStringAndSize(NULL, source_len);
-        if (translate_object == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-            goto EXCEPT; /* GCOVR_EXCL_LINE */
+        in_object = PyUnicode_AsASCIIString(in_object);
+        if (in_object == NULL) {
+            if (PyErr_ExceptionMatches(PyExc_UnicodeEncodeError)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+                PyErr_SetString(PyExc_ValueError, "string argument should contain only ASCII characters");
+            }
+            return -1;
         }
-        translate_dst = PyBytes_AS_STRING(translate_object);
-#endif
+        /* the buffer keeps a reference to the encoded string */
+        result = get_buffer(in_object, buffer, 0);
+        Py_DECREF(in_object);
+        return result;
+    }
+    return get_buffer(in_object, buffer, 0);
+}
 
-        /* not interacting with Python objects from here, release the GIL */
-        Py_BEGIN_ALLOW_THREADS
+static void release_decode_buffer(Py_buffer* buffer)
+{
+    if (buffer->obj != NULL) {
+        PyBuffer_Release(buffer);
+    }
+}
 
-        translate_fn(source, translate_dst, source_len, alphabet, &has_bad_char);
+/* decisions taken when decoding len bytes with options, the GIL is released depending on len */
+static void pybase64_decode_explain_init(pybase64_explain* explain, pybase64_decode_options const* options, size_t len, size_t out_len, Py_ssize_t threads)
+{
+    size_t chunk = 0U;
+    int translate = options->fast_path ? options->use_alphabet : options->translate_slow;
 
-        /* restore the GIL */
-        Py_END_ALLOW_THREADS
+    pybase64_explain_init(explain, pybase64_stats_decode_path(options), translate, out_len);
+    explain->release_gil = PYBASE64_RELEASE_GIL(len);
+    if (options->fast_path) {
+        explain->threads = decode_split_tasks(len, threads, &chunk);
+    }
+    if (translate) {
+        explain->translate_block = PYBASE64_DECODE_BLOCK_SIZE * (size_t)explain->threads;
+    }
+    if (!options->fast_path) {
+        explain->compact_block = PYBASE64_DECODE_BLOCK_SIZE;
+    }
+}
 
+/* decodes into out_buf when not NULL & returns the number of bytes written */
+/* returns what pybase64.explain() reports instead of the decoded data when explain is not 0 */
+static PyObject* pybase64_decode_impl_core(pybase64_state* state, enum pybase64_stats_entry entry, PyObject* in_object, pybase64_decode_options const* options, int return_bytearray, char* out_buf, Py_ssize_t out_buf_len, Py_ssize_t threads, int explain)
+{
+    int has_bad_char = 0;
+    Py_buffer buffer;
+    size_t out_len;
+    PyObject* out_object = NULL;
 #if PY_VERSION_HEX >= 0x030f0000
-        translate_object = PyBytesWriter_Finish(writer);
-        writer = NULL;
-        if (translate_object == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-            goto EXCEPT; /* GCOVR_EXCL_LINE */
-        }
+    PyBytesWriter* writer = NULL;
 #endif
+    const void* source;
+    Py_ssize_t source_len;
+    void* dest;
 
-        assert(source_use_buffer); /* we always use a buffer when fast_path == 0 */
-        PyBuffer_Release(&buffer);
-        Py_DECREF(in_object);
-        in_object = translate_object;
-        if (get_buffer(in_object, &buffer, 0) != 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-            Py_DECREF(in_object); /* GCOVR_EXCL_LINE */
-            return NULL; /* GCOVR_EXCL_LINE */
-        }
-        source = buffer.buf;
-        source_len = buffer.len;
-        source_use_buffer = 1;
+    if (get_decode_buffer(in_object, options, &buffer) != 0) {
+        return NULL;
     }
+    source = buffer.buf;
+    source_len = buffer.len;
 
+/* TRY: */
     /* No overflow check needed, exact out_len recomputed at the end */
     /* out_len is ceildiv(len / 4) * 3  when len % 4 != 0*/
     /* else out_len is (ceildiv(len / 4) + 1) * 3 */
     out_len = (size_t)((source_len / 4) * 3) + 3U;
-    if (return_bytearray) {
-        out_object = PyByteArray_FromStringAndSize(NULL, (Py_ssize_t)out_len);
+    if (explain) {
+        pybase64_explain info;
+
+        pybase64_decode_explain_init(&info, options, (size_t)buffer.len, out_len, threads);
+        release_decode_buffer(&buffer);
+        return pybase64_explain_result(&info);
+    }
+    if (out_buf != NULL) {
+        dest = out_buf;
+    }
+    else if (return_bytearray) {
+        out_object = PyByteArray_FromStringAndSize(NULL, (Py_ssize_t)out_len);
         if (out_object == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
             goto EXCEPT; /* GCOVR_EXCL_LINE */
         }
@@ -1113,197 +2775,1597 @@ static PyObject* pybase64_decode_impl(PyObject* self, PyObject* args, PyObject *
         if (out_object == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
             goto EXCEPT; /* GCOVR_EXCL_LINE */
         }
-        dest = PyBytes_AS_STRING(out_object);
-#endif
+        dest = PyBytes_AS_STRING(out_object);
+#endif
+    }
+
+    if ((out_buf != NULL) && ((size_t)out_buf_len < out_len)) {
+        int result;
+
+        /* the output might fit once decoded */
+        PYBASE64_BEGIN_ALLOW_THREADS(source_len)
+
+        result = decode_into(source, (size_t)source_len, dest, (size_t)out_buf_len, &out_len, options, &has_bad_char);
+
+        /* restore the GIL */
+        PYBASE64_END_ALLOW_THREADS
+
+        if (result != PYBASE64_DECODE_SLOW_SUCCESS) {
+            set_decode_slow_error(state, result);
+            goto EXCEPT;
+        }
+        if (out_len > (size_t)out_buf_len) {
+            PyErr_Format(PyExc_ValueError, "output buffer too small, %zu bytes needed, %zd available", out_len, out_buf_len);
+            goto EXCEPT;
+        }
+    }
+    else if (!options->fast_path) {
+        int result;
+
+        /* not interacting with Python objects from here, release the GIL */
+        PYBASE64_BEGIN_ALLOW_THREADS(source_len)
+
+        if (options->translate_slow) {
+            result = decode_slow_translate(source, (size_t)source_len, dest, &out_len, options, &has_bad_char);
+        }
+        else {
+            result = decode_slow_compact(source, (size_t)source_len, dest, &out_len, options, 0, NULL, &has_bad_char);
+        }
+
+        /* restore the GIL */
+        PYBASE64_END_ALLOW_THREADS
+
+        if (result != PYBASE64_DECODE_SLOW_SUCCESS) {
+            set_decode_slow_error(state, result);
+            goto EXCEPT;
+        }
+    }
+    else {
+        int result;
+        uint8_t carry;
+
+        /* not interacting with Python objects from here, release the GIL */
+        PYBASE64_BEGIN_ALLOW_THREADS(source_len)
+
+        result = decode_fast_threads(source, (size_t)source_len, dest, &out_len, options, &has_bad_char, &carry, threads);
+
+        /* restore the GIL */
+        PYBASE64_END_ALLOW_THREADS
+
+        if (!result) {
+            PyErr_SetString(state->binAsciiError, "Non-base64 digit found");
+            goto EXCEPT;
+        }
+        if (options->canonical && (carry != 0)) {
+            PyErr_SetString(state->binAsciiError, "Non-zero padding bits");
+            goto EXCEPT;
+        }
+    }
+    if (out_buf != NULL) {
+        out_object = PyLong_FromSize_t(out_len);
+    }
+    else if (return_bytearray) {
+        PyByteArray_Resize(out_object, (Py_ssize_t)out_len);
+    }
+    else {
+#if PY_VERSION_HEX >= 0x030f0000
+        out_object = PyBytesWriter_FinishWithSize(writer, (Py_ssize_t)out_len);
+        /* writer = NULL; */
+#else
+        _PyBytes_Resize(&out_object, (Py_ssize_t)out_len);
+#endif
+    }
+    goto FINALLY;
+EXCEPT:
+#if PY_VERSION_HEX >= 0x030f0000
+    PyBytesWriter_Discard(writer);
+#endif
+    Py_XDECREF(out_object);
+    out_object = NULL;
+FINALLY:
+    PYBASE64_STATS_RECORD(state, entry, (out_object != NULL) ? pybase64_stats_decode_path(options) : PYBASE64_STATS_ERROR, source_len, (out_object != NULL) ? out_len : 0U)
+    release_decode_buffer(&buffer);
+    if (has_bad_char && (out_object != NULL)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/4 */
+        if (warn_bad_char(options, 2) < 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            Py_XDECREF(out_object); /* GCOVR_EXCL_LINE */
+            out_object = NULL; /* GCOVR_EXCL_LINE */
+        }
+    }
+    return out_object;
+}
+
+static PyObject* pybase64_decode_impl(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames, int return_bytearray, int explain)
+{
+    static const pybase64_params params = { "O|OO$pOpn", { PYBASE64_KW_NONE, PYBASE64_KW_ALTCHARS, PYBASE64_KW_VALIDATE, PYBASE64_KW_PADDED, PYBASE64_KW_IGNORECHARS, PYBASE64_KW_CANONICAL, PYBASE64_KW_THREADS } };
+
+    PyObject* in_alphabet = NULL;
+    PyObject* in_object;
+    PyObject* validation_object = NULL;
+    PyObject* ignorechars_object = NULL;
+    int canonical = 0;
+    int padded = 1;
+    Py_ssize_t threads = 1;
+    pybase64_decode_options options;
+    PyObject* result;
+    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    /* Parse the arguments */
+    if (parse_fastcall_args(state, &params, args, nargs, kwnames, &in_object, &in_alphabet, &validation_object, &padded, &ignorechars_object, &canonical, &threads) != 0) {
+        return NULL;
+    }
+
+    if (check_threads(threads) != 0) {
+        return NULL;
+    }
+
+    if (pybase64_decode_options_init(state, &options, in_alphabet, validation_object, padded, ignorechars_object, canonical) != 0) {
+        return NULL;
+    }
+
+    result = pybase64_decode_impl_core(state, return_bytearray ? PYBASE64_STATS_B64DECODE_AS_BYTEARRAY : PYBASE64_STATS_B64DECODE, in_object, &options, return_bytearray, NULL, 0, threads, explain);
+
+    pybase64_decode_options_release(&options);
+
+    return result;
+}
+
+static PyObject* pybase64_decode(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
+{
+    return pybase64_decode_impl(self, args, nargs, kwnames, 0, 0);
+}
+
+static PyObject* pybase64_decode_as_bytearray(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
+{
+    return pybase64_decode_impl(self, args, nargs, kwnames, 1, 0);
+}
+
+static PyObject* pybase64_decode_into_impl(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames, int explain)
+{
+    static const pybase64_params params = { "OO|OO$pOpn", { PYBASE64_KW_NONE, PYBASE64_KW_NONE, PYBASE64_KW_ALTCHARS, PYBASE64_KW_VALIDATE, PYBASE64_KW_PADDED, PYBASE64_KW_IGNORECHARS, PYBASE64_KW_CANONICAL, PYBASE64_KW_OFFSET } };
+
+    PyObject* in_alphabet = NULL;
+    PyObject* in_object;
+    PyObject* out_object;
+    PyObject* result;
+    PyObject* validation_object = NULL;
+    PyObject* ignorechars_object = NULL;
+    int canonical = 0;
+    int padded = 1;
+    Py_ssize_t offset = 0;
+    Py_buffer out_buffer;
+    pybase64_decode_options options;
+    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    /* Parse the arguments */
+    if (parse_fastcall_args(state, &params, args, nargs, kwnames, &in_object, &out_object, &in_alphabet, &validation_object, &padded, &ignorechars_object, &canonical, &offset) != 0) {
+        return NULL;
+    }
+
+    if (get_writable_buffer(out_object, &out_buffer, offset) != 0) {
+        return NULL;
+    }
+
+    if (pybase64_decode_options_init(state, &options, in_alphabet, validation_object, padded, ignorechars_object, canonical) != 0) {
+        PyBuffer_Release(&out_buffer);
+        return NULL;
+    }
+
+    result = pybase64_decode_impl_core(state, PYBASE64_STATS_B64DECODE_INTO, in_object, &options, 0, (char*)out_buffer.buf + offset, out_buffer.len - offset, 1, explain);
+
+    pybase64_decode_options_release(&options);
+    PyBuffer_Release(&out_buffer);
+
+    return result;
+}
+
+static PyObject* pybase64_decode_into(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
+{
+    return pybase64_decode_into_impl(self, args, nargs, kwnames, 0);
+}
+
+/* returns the decoded length or -1 on error, invalid data is reported as PYBASE64_DECODE_SLOW_* in result */
+static Py_ssize_t pybase64_decoded_length_core(PyObject* in_object, pybase64_decode_options const* options, int* result)
+{
+    Py_buffer buffer;
+    size_t out_len = 0U;
+    int has_bad_char = 0;
+
+    if (get_decode_buffer(in_object, options, &buffer) != 0) {
+        return -1;
+    }
+
+    /* not interacting with Python objects from here, release the GIL */
+    PYBASE64_BEGIN_ALLOW_THREADS(buffer.len)
+
+    *result = decode_length(buffer.buf, (size_t)buffer.len, NULL, 0U, &out_len, options, 0, &has_bad_char);
+
+    /* restore the GIL */
+    PYBASE64_END_ALLOW_THREADS
+
+    release_decode_buffer(&buffer);
+    if (has_bad_char && (*result == PYBASE64_DECODE_SLOW_SUCCESS) && (warn_bad_char(options, 2) < 0)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 2/6 */
+        return -1; /* GCOVR_EXCL_LINE */
+    }
+    return (Py_ssize_t)out_len;
+}
+
+/* returns what pybase64.explain() reports instead of the length when explain is not 0 */
+static PyObject* pybase64_decoded_length_impl(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames, int validate_only, int explain)
+{
+    static const pybase64_params params = { "O|OO$pOp", { PYBASE64_KW_NONE, PYBASE64_KW_ALTCHARS, PYBASE64_KW_VALIDATE, PYBASE64_KW_PADDED, PYBASE64_KW_IGNORECHARS, PYBASE64_KW_CANONICAL } };
+
+    PyObject* in_alphabet = NULL;
+    PyObject* in_object;
+    PyObject* validation_object = NULL;
+    PyObject* ignorechars_object = NULL;
+    int canonical = 0;
+    int padded = 1;
+    int result = PYBASE64_DECODE_SLOW_SUCCESS;
+    Py_ssize_t out_len;
+    pybase64_decode_options options;
+    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    /* Parse the arguments */
+    if (parse_fastcall_args(state, &params, args, nargs, kwnames, &in_object, &in_alphabet, &validation_object, &padded, &ignorechars_object, &canonical) != 0) {
+        return NULL;
+    }
+
+    if (pybase64_decode_options_init(state, &options, in_alphabet, validation_object, padded, ignorechars_object, canonical) != 0) {
+        return NULL;
+    }
+
+    if (explain) {
+        PyObject* out_object = NULL;
+        Py_buffer buffer;
+
+        if (get_decode_buffer(in_object, &options, &buffer) == 0) {
+            pybase64_explain info;
+
+            /* decoded block by block, nothing is output */
+            pybase64_decode_explain_init(&info, &options, (size_t)buffer.len, 0U, 1);
+            release_decode_buffer(&buffer);
+            out_object = pybase64_explain_result(&info);
+        }
+        pybase64_decode_options_release(&options);
+        return out_object;
+    }
+
+    out_len = pybase64_decoded_length_core(in_object, &options, &result);
+
+    pybase64_decode_options_release(&options);
+
+    if (out_len < 0) {
+        return NULL;
+    }
+    if (validate_only && (result != PYBASE64_DECODE_SLOW_NO_MEMORY)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/4 */
+        return PyBool_FromLong(result == PYBASE64_DECODE_SLOW_SUCCESS);
+    }
+    if (result != PYBASE64_DECODE_SLOW_SUCCESS) {
+        set_decode_slow_error(state, result);
+        return NULL;
+    }
+    return PyLong_FromSsize_t(out_len);
+}
+
+static PyObject* pybase64_decoded_length(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
+{
+    return pybase64_decoded_length_impl(self, args, nargs, kwnames, 0, 0);
+}
+
+static PyObject* pybase64_validate(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
+{
+    return pybase64_decoded_length_impl(self, args, nargs, kwnames, 1, 0);
+}
+
+/* number of characters output by base64_stream_encode when pending bytes are in the state */
+static size_t encoded_length_stream(size_t pending, size_t len)
+{
+    size_t total = pending + len;
+    return (total / 3U) * 4U + (total % 3U) - pending;
+}
+
+/* bytes output helpers, uses PyBytesWriter on Python 3.15+ */
+typedef struct pybase64_bytes_writer {
+#if PY_VERSION_HEX >= 0x030f0000
+    PyBytesWriter* writer;
+#else
+    PyObject* object;
+#endif
+} pybase64_bytes_writer;
+
+static char* pybase64_bytes_writer_create(pybase64_bytes_writer* writer, size_t size)
+{
+#if PY_VERSION_HEX >= 0x030f0000
+    writer->writer = PyBytesWriter_Create((Py_ssize_t)size);
+    if (writer->writer == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    return PyBytesWriter_GetData(writer->writer);
+#else
+    writer->object = PyBytes_FromStringAndSize(NULL, (Py_ssize_t)size);
+    if (writer->object == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    return PyBytes_AS_STRING(writer->object);
+#endif
+}
+
+static PyObject* pybase64_bytes_writer_finish(pybase64_bytes_writer* writer, size_t size)
+{
+#if PY_VERSION_HEX >= 0x030f0000
+    PyObject* result = PyBytesWriter_FinishWithSize(writer->writer, (Py_ssize_t)size);
+    writer->writer = NULL;
+    return result;
+#else
+    PyObject* result = writer->object;
+    writer->object = NULL;
+    if ((size_t)PyBytes_GET_SIZE(result) != size) {
+        _PyBytes_Resize(&result, (Py_ssize_t)size);
+    }
+    return result;
+#endif
+}
+
+static void pybase64_bytes_writer_discard(pybase64_bytes_writer* writer)
+{
+#if PY_VERSION_HEX >= 0x030f0000
+    PyBytesWriter_Discard(writer->writer);
+    writer->writer = NULL;
+#else
+    Py_CLEAR(writer->object);
+#endif
+}
+
+/* serializes accesses to Encoder/Decoder objects, the GIL might be released while holding the lock */
+#define PYBASE64_ENTER_OBJECT(obj) \
+    if (!PyThread_acquire_lock((obj)->lock, 0)) { \
+        Py_BEGIN_ALLOW_THREADS \
+        PyThread_acquire_lock((obj)->lock, 1); \
+        Py_END_ALLOW_THREADS \
+    }
+#define PYBASE64_LEAVE_OBJECT(obj) PyThread_release_lock((obj)->lock)
+
+typedef struct pybase64_encoder {
+    PyObject_HEAD
+    PyThread_type_lock lock;
+    struct base64_state b64_state;
+    size_t wrapcol;
+    size_t column;
+    int nopadding;
+    int use_alphabet;
+    char alphabet[2];
+} pybase64_encoder;
+
+static PyObject* pybase64_encoder_new(PyTypeObject* type, PyObject* args, PyObject* kwds)
+{
+    static const char *kwlist[] = { "altchars", "padded", "wrapcol", NULL };
+
+    PyObject* in_alphabet = NULL;
+    int padded = 1;
+    Py_ssize_t wrapcol = 0;
+    pybase64_encoder* self;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|O$pn", KW_CONST_CAST kwlist, &in_alphabet, &padded, &wrapcol)) {
+        return NULL;
+    }
+    if (wrapcol < 0) {
+        PyErr_SetString(PyExc_ValueError, "wrapcol must be >= 0");
+        return NULL;
+    }
+
+    self = (pybase64_encoder*)type->tp_alloc(type, 0);
+    if (self == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    if (parse_alphabet(in_alphabet, self->alphabet, &self->use_alphabet) != 0) {
+        Py_DECREF(self);
+        return NULL;
+    }
+    self->lock = PyThread_allocate_lock();
+    if (self->lock == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        Py_DECREF(self); /* GCOVR_EXCL_LINE */
+        PyErr_SetString(PyExc_MemoryError, "unable to allocate lock"); /* GCOVR_EXCL_LINE */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    if (wrapcol > 0) {
+        /* round down except for low value which are rounded up */
+        wrapcol = (wrapcol < 4) ? 4U : (((size_t)wrapcol / 4U) * 4U);
+    }
+    self->wrapcol = (size_t)wrapcol;
+    self->column = 0U;
+    self->nopadding = !padded;
+    base64_stream_encode_init(&self->b64_state, 0);
+    return (PyObject*)self;
+}
+
+static void pybase64_encoder_dealloc(pybase64_encoder* self)
+{
+    PyTypeObject* type = Py_TYPE(self);
+    if (self->lock != NULL) {
+        PyThread_free_lock(self->lock);
+    }
+    type->tp_free(self);
+    Py_DECREF(type);
+}
+
+/* n encoded characters are at dst + newlines, returns the number of characters written to dst */
+static size_t pybase64_encoder_output(pybase64_encoder* self, char* dst, size_t n, size_t newlines)
+{
+    char* src = dst + newlines;
+
+    if (self->use_alphabet) {
+        translate_inplace(src, n, self->alphabet);
+    }
+    if (self->wrapcol == 0U) {
+        return n;
+    }
+    return (size_t)(wrap_lines(dst, src, n, self->wrapcol, &self->column) - dst);
+}
+
+static PyObject* pybase64_encoder_update(pybase64_encoder* self, PyObject* in_object)
+{
+    Py_buffer buffer;
+    pybase64_bytes_writer writer;
+    PyObject* out_object = NULL;
+    size_t out_len;
+    size_t newlines = 0U;
+    char* dst;
+    pybase64_state* state = (pybase64_state*)PyType_GetModuleState(Py_TYPE(self));
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+
+    if (get_buffer(in_object, &buffer, 0) != 0) {
+        return NULL;
+    }
+    if (buffer.len > (3 * (PY_SSIZE_T_MAX / 4)) - 3) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        PyBuffer_Release(&buffer); /* GCOVR_EXCL_LINE */
+        return PyErr_NoMemory(); /* GCOVR_EXCL_LINE */
+    }
+
+    PYBASE64_ENTER_OBJECT(self)
+
+    out_len = encoded_length_stream((size_t)self->b64_state.bytes, (size_t)buffer.len);
+    if (self->wrapcol > 0U) {
+        newlines = wrap_lines_count(self->column, out_len, self->wrapcol);
+    }
+    dst = pybase64_bytes_writer_create(&writer, out_len + newlines);
+    if (dst != NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        /* not interacting with Python objects from here, release the GIL */
+        PYBASE64_BEGIN_ALLOW_THREADS(buffer.len)
+
+        base64_stream_encode(&self->b64_state, buffer.buf, (size_t)buffer.len, dst + newlines, &out_len);
+        out_len = pybase64_encoder_output(self, dst, out_len, newlines);
+
+        /* restore the GIL */
+        PYBASE64_END_ALLOW_THREADS
+
+        out_object = pybase64_bytes_writer_finish(&writer, out_len);
+        PYBASE64_STATS_RECORD(state, PYBASE64_STATS_ENCODER, pybase64_stats_encode_path(self->use_alphabet ? self->alphabet : NULL, (Py_ssize_t)self->wrapcol), buffer.len, out_len)
+    }
+
+    PYBASE64_LEAVE_OBJECT(self);
+    PyBuffer_Release(&buffer);
+    return out_object;
+}
+
+static PyObject* pybase64_encoder_finalize(pybase64_encoder* self, PyObject* Py_UNUSED(arg))
+{
+    char out[4];
+    size_t out_len;
+    size_t newlines = 0U;
+    pybase64_state* state = (pybase64_state*)PyType_GetModuleState(Py_TYPE(self));
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+
+    PYBASE64_ENTER_OBJECT(self)
+
+    pybase64_stream_encode_final(&self->b64_state, out + 1, &out_len, self->nopadding);
+    if ((self->wrapcol > 0U) && (out_len > 0U)) {
+        newlines = wrap_lines_count(self->column, out_len, self->wrapcol);
+    }
+    out_len = pybase64_encoder_output(self, out + 1 - newlines, out_len, newlines);
+    PYBASE64_STATS_RECORD(state, PYBASE64_STATS_ENCODER, pybase64_stats_encode_path(self->use_alphabet ? self->alphabet : NULL, (Py_ssize_t)self->wrapcol), 0U, out_len)
+    base64_stream_encode_init(&self->b64_state, 0);
+    self->column = 0U;
+
+    PYBASE64_LEAVE_OBJECT(self);
+    return PyBytes_FromStringAndSize(out + 1 - newlines, (Py_ssize_t)out_len);
+}
+
+static PyMethodDef pybase64_encoder_methods[] = {
+    { "update", (PyCFunction)pybase64_encoder_update, METH_O, NULL },
+    { "finalize", (PyCFunction)pybase64_encoder_finalize, METH_NOARGS, NULL },
+    { NULL, NULL, 0, NULL }  /* Sentinel */
+};
+
+static PyType_Slot pybase64_encoder_slots[] = {
+    { Py_tp_new, pybase64_encoder_new },
+    { Py_tp_dealloc, pybase64_encoder_dealloc },
+    { Py_tp_methods, pybase64_encoder_methods },
+    { 0, NULL }
+};
+
+static PyType_Spec pybase64_encoder_spec = {
+    "pybase64._pybase64.Encoder",
+    sizeof(pybase64_encoder),
+    0,
+    Py_TPFLAGS_DEFAULT,
+    pybase64_encoder_slots
+};
+
+typedef struct pybase64_decoder {
+    PyObject_HEAD
+    PyThread_type_lock lock;
+    pybase64_decode_options options;
+    PyObject* altchars_object;
+    struct base64_state b64_state;
+    char* pending;
+    size_t pending_len;
+    size_t pending_size;
+    int has_output;
+    int has_bad_char;
+} pybase64_decoder;
+
+static void pybase64_decoder_reset(pybase64_decoder* self)
+{
+    base64_stream_decode_init(&self->b64_state, 0);
+    self->pending_len = 0U;
+    self->has_output = 0;
+}
+
+static PyObject* pybase64_decoder_new(PyTypeObject* type, PyObject* args, PyObject* kwds)
+{
+    static const char *kwlist[] = { "altchars", "validate", "padded", "ignorechars", "canonical", NULL };
+
+    PyObject* in_alphabet = NULL;
+    PyObject* validation_object = NULL;
+    PyObject* ignorechars_object = NULL;
+    int canonical = 0;
+    int padded = 1;
+    pybase64_decoder* self;
+    pybase64_state* state = (pybase64_state*)PyType_GetModuleState(type);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OO$pOp", KW_CONST_CAST kwlist, &in_alphabet, &validation_object, &padded, &ignorechars_object, &canonical)) {
+        return NULL;
+    }
+
+    self = (pybase64_decoder*)type->tp_alloc(type, 0);
+    if (self == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    if ((pybase64_decode_options_init(state, &self->options, in_alphabet, validation_object, padded, ignorechars_object, canonical) != 0) ||
+        (pybase64_decode_options_own_ignorechars(&self->options) != 0)) {
+        Py_DECREF(self);
+        return NULL;
+    }
+    self->lock = PyThread_allocate_lock();
+    if (self->lock == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        Py_DECREF(self); /* GCOVR_EXCL_LINE */
+        PyErr_SetString(PyExc_MemoryError, "unable to allocate lock"); /* GCOVR_EXCL_LINE */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    Py_XINCREF(in_alphabet);
+    self->altchars_object = in_alphabet;
+    pybase64_decoder_reset(self);
+    return (PyObject*)self;
+}
+
+static void pybase64_decoder_dealloc(pybase64_decoder* self)
+{
+    PyTypeObject* type = Py_TYPE(self);
+    pybase64_decode_options_release(&self->options);
+    Py_CLEAR(self->altchars_object);
+    PyMem_Free(self->pending);
+    if (self->lock != NULL) {
+        PyThread_free_lock(self->lock);
+    }
+    type->tp_free(self);
+    Py_DECREF(type);
+}
+
+/* returns 0 on success */
+static int pybase64_decoder_warn(pybase64_decoder* self, int has_bad_char)
+{
+    if (has_bad_char && !self->has_bad_char) {
+        self->has_bad_char = 1;
+        return warn_bad_char(&self->options, 1);
+    }
+    return 0;
+}
+
+static PyObject* pybase64_decoder_decode(pybase64_decoder* self, PyObject* in_object, int final)
+{
+    pybase64_state* state = (pybase64_state*)PyType_GetModuleState(Py_TYPE(self));
+    pybase64_decode_options const* options = &self->options;
+    Py_buffer buffer;
+    pybase64_bytes_writer writer;
+    PyObject* out_object = NULL;
+    const char* source = NULL;
+    size_t source_len = 0U;
+    size_t in_len = 0U;
+    size_t out_len = 0U;
+    int has_bad_char = 0;
+    int result = PYBASE64_DECODE_SLOW_SUCCESS;
+    char* dest;
+
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+
+    if (in_object != NULL) {
+        if (PyUnicode_Check(in_object)) {
+            in_object = PyUnicode_AsASCIIString(in_object);
+            if (in_object == NULL) {
+                if (PyErr_ExceptionMatches(PyExc_UnicodeEncodeError)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+                    PyErr_SetString(PyExc_ValueError, "string argument should contain only ASCII characters");
+                }
+                return NULL;
+            }
+        }
+        else {
+            Py_INCREF(in_object);
+        }
+        if (get_buffer(in_object, &buffer, 0) != 0) {
+            Py_DECREF(in_object);
+            return NULL;
+        }
+        source = buffer.buf;
+        source_len = (size_t)buffer.len;
+        in_len = source_len;
+    }
+
+    PYBASE64_ENTER_OBJECT(self)
+
+    if (!options->fast_path) {
+        /* translated input is appended to pending data */
+        if (self->pending_len + source_len > self->pending_size) {
+            size_t size = self->pending_len + source_len;
+            char* pending = PyMem_Realloc(self->pending, size);
+            if (pending == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+                PyErr_NoMemory(); /* GCOVR_EXCL_LINE */
+                goto LEAVE; /* GCOVR_EXCL_LINE */
+            }
+            self->pending = pending;
+            self->pending_size = size;
+        }
+        source_len = self->pending_len + source_len;
+    }
+
+    /* No overflow check needed, exact out_len recomputed at the end */
+    out_len = (source_len / 4U) * 3U + 3U;
+    dest = pybase64_bytes_writer_create(&writer, out_len);
+    if (dest == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        goto LEAVE; /* GCOVR_EXCL_LINE */
+    }
+
+    /* not interacting with Python objects from here, release the GIL */
+    PYBASE64_BEGIN_ALLOW_THREADS(source_len)
+
+    if (!options->fast_path) {
+        size_t consumed = source_len;
+
+        if (source_len != self->pending_len) {
+            if (options->translate_slow) {
+                options->translate_fn(source, self->pending + self->pending_len, source_len - self->pending_len, options->alphabet, &has_bad_char);
+            }
+            else {
+                memcpy(self->pending + self->pending_len, source, source_len - self->pending_len);
+            }
+        }
+        out_len = 0U;
+        if (source_len > 0U) {
+            result = decode_slow_compact(self->pending, source_len, dest, &out_len, options, self->has_output, final ? NULL : &consumed, &has_bad_char);
+        }
+        self->pending_len = source_len - consumed;
+        memmove(self->pending, self->pending + consumed, self->pending_len);
+    }
+    else {
+        int ok = 1;
+
+        out_len = 0U;
+        if (source_len > 0U) {
+            ok = decode_fast(&self->b64_state, source, source_len, dest, &out_len, options, &has_bad_char);
+        }
+        if (final && (self->b64_state.bytes != 0)) {
+            ok = 0;
+        }
+        if (!ok) {
+            result = PYBASE64_DECODE_SLOW_INVALID_DATA;
+        }
+        else if (final && options->canonical && (self->b64_state.carry != 0)) {
+            result = PYBASE64_DECODE_SLOW_PADDING_BITS_NOT_ALLOWED;
+        }
+    }
+
+    /* restore the GIL */
+    PYBASE64_END_ALLOW_THREADS
+
+    if (out_len > 0U) {
+        self->has_output = 1;
+    }
+    if (result != PYBASE64_DECODE_SLOW_SUCCESS) {
+        set_decode_slow_error(state, result);
+        pybase64_bytes_writer_discard(&writer);
+        goto LEAVE;
+    }
+    out_object = pybase64_bytes_writer_finish(&writer, out_len);
+    if ((out_object != NULL) && (pybase64_decoder_warn(self, has_bad_char) != 0)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/4 */
+        Py_CLEAR(out_object); /* GCOVR_EXCL_LINE */
+    }
+LEAVE:
+    PYBASE64_STATS_RECORD(state, PYBASE64_STATS_DECODER, (out_object != NULL) ? pybase64_stats_decode_path(options) : PYBASE64_STATS_ERROR, in_len, (out_object != NULL) ? out_len : 0U)
+    if (final || (out_object == NULL)) {
+        pybase64_decoder_reset(self);
+    }
+    PYBASE64_LEAVE_OBJECT(self);
+    if (in_object != NULL) {
+        PyBuffer_Release(&buffer);
+        Py_DECREF(in_object);
+    }
+    return out_object;
+}
+
+static PyObject* pybase64_decoder_update(pybase64_decoder* self, PyObject* in_object)
+{
+    return pybase64_decoder_decode(self, in_object, 0);
+}
+
+static PyObject* pybase64_decoder_finalize(pybase64_decoder* self, PyObject* Py_UNUSED(arg))
+{
+    return pybase64_decoder_decode(self, NULL, 1);
+}
+
+static PyMethodDef pybase64_decoder_methods[] = {
+    { "update", (PyCFunction)pybase64_decoder_update, METH_O, NULL },
+    { "finalize", (PyCFunction)pybase64_decoder_finalize, METH_NOARGS, NULL },
+    { NULL, NULL, 0, NULL }  /* Sentinel */
+};
+
+static PyType_Slot pybase64_decoder_slots[] = {
+    { Py_tp_new, pybase64_decoder_new },
+    { Py_tp_dealloc, pybase64_decoder_dealloc },
+    { Py_tp_methods, pybase64_decoder_methods },
+    { 0, NULL }
+};
+
+static PyType_Spec pybase64_decoder_spec = {
+    "pybase64._pybase64.Decoder",
+    sizeof(pybase64_decoder),
+    0,
+    Py_TPFLAGS_DEFAULT,
+    pybase64_decoder_slots
+};
+
+/* immutable once created, can be shared between threads without locking */
+typedef struct pybase64_codec {
+    PyObject_HEAD
+    pybase64_decode_options options;
+    PyObject* altchars_object;
+    Py_ssize_t wrapcol;
+} pybase64_codec;
+
+static PyObject* pybase64_codec_new(PyTypeObject* type, PyObject* args, PyObject* kwds)
+{
+    static const char *kwlist[] = { "altchars", "validate", "padded", "ignorechars", "canonical", "wrapcol", NULL };
+
+    PyObject* in_alphabet = NULL;
+    PyObject* validation_object = NULL;
+    PyObject* ignorechars_object = NULL;
+    int canonical = 0;
+    int padded = 1;
+    Py_ssize_t wrapcol = 0;
+    unsigned int flags = 0U;
+    size_t out_len;
+    pybase64_codec* self;
+    pybase64_state* state = (pybase64_state*)PyType_GetModuleState(type);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OO$pOpn", KW_CONST_CAST kwlist, &in_alphabet, &validation_object, &padded, &ignorechars_object, &canonical, &wrapcol)) {
+        return NULL;
+    }
+    /* checks & normalizes wrapcol */
+    if (pybase64_encode_length(0, &wrapcol, &flags, &out_len) != 0) {
+        return NULL;
+    }
+
+    self = (pybase64_codec*)type->tp_alloc(type, 0);
+    if (self == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    if ((pybase64_decode_options_init(state, &self->options, in_alphabet, validation_object, padded, ignorechars_object, canonical) != 0) ||
+        (pybase64_decode_options_own_ignorechars(&self->options) != 0)) {
+        Py_DECREF(self);
+        return NULL;
+    }
+    Py_XINCREF(in_alphabet);
+    self->altchars_object = in_alphabet;
+    self->wrapcol = wrapcol;
+    return (PyObject*)self;
+}
+
+static void pybase64_codec_dealloc(pybase64_codec* self)
+{
+    PyTypeObject* type = Py_TYPE(self);
+    pybase64_decode_options_release(&self->options);
+    Py_CLEAR(self->altchars_object);
+    type->tp_free(self);
+    Py_DECREF(type);
+}
+
+static PyObject* pybase64_codec_encode_impl(pybase64_codec* self, PyObject* in_object, int explain)
+{
+    Py_buffer buffer;
+    PyObject* out_object;
+    unsigned int flags = 0U;
+    pybase64_state* state = (pybase64_state*)PyType_GetModuleState(Py_TYPE(self));
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+
+    if (get_buffer(in_object, &buffer, 0) != 0) {
+        return NULL;
+    }
+    if ((buffer.len > 0) && !self->options.padded) {
+        flags |= PYBASE64_FLAGS_NO_PADDING;
+    }
+    out_object = pybase64_encode_impl_core(state, PYBASE64_STATS_CODEC_ENCODE, &buffer, self->options.use_alphabet ? self->options.alphabet : NULL, self->wrapcol, flags, 1, explain);
+    PyBuffer_Release(&buffer);
+    return out_object;
+}
+
+static PyObject* pybase64_codec_encode(pybase64_codec* self, PyObject* in_object)
+{
+    return pybase64_codec_encode_impl(self, in_object, 0);
+}
+
+static PyObject* pybase64_codec_decode_impl(pybase64_codec* self, PyObject* in_object, int explain)
+{
+    pybase64_state* state = (pybase64_state*)PyType_GetModuleState(Py_TYPE(self));
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    return pybase64_decode_impl_core(state, PYBASE64_STATS_CODEC_DECODE, in_object, &self->options, 0, NULL, 0, 1, explain);
+}
+
+static PyObject* pybase64_codec_decode(pybase64_codec* self, PyObject* in_object)
+{
+    return pybase64_codec_decode_impl(self, in_object, 0);
+}
+
+static PyMethodDef pybase64_codec_methods[] = {
+    { "encode", (PyCFunction)pybase64_codec_encode, METH_O, NULL },
+    { "decode", (PyCFunction)pybase64_codec_decode, METH_O, NULL },
+    { NULL, NULL, 0, NULL }  /* Sentinel */
+};
+
+static PyType_Slot pybase64_codec_slots[] = {
+    { Py_tp_new, pybase64_codec_new },
+    { Py_tp_dealloc, pybase64_codec_dealloc },
+    { Py_tp_methods, pybase64_codec_methods },
+    { 0, NULL }
+};
+
+static PyType_Spec pybase64_codec_spec = {
+    "pybase64._pybase64.Codec",
+    sizeof(pybase64_codec),
+    0,
+    Py_TPFLAGS_DEFAULT,
+    pybase64_codec_slots
+};
+
+/* prefixes the message of the current exception with the index of the failing item */
+static void set_item_error(Py_ssize_t index)
+{
+    PyObject* type;
+    PyObject* value;
+    PyObject* message;
+#if PY_VERSION_HEX >= 0x030c0000
+    value = PyErr_GetRaisedException();
+    type = (PyObject*)Py_TYPE(value);
+    Py_INCREF(type);
+#else
+    PyObject* traceback;
+    PyErr_Fetch(&type, &value, &traceback);
+    PyErr_NormalizeException(&type, &value, &traceback);
+    Py_XDECREF(traceback);
+#endif
+    message = PyObject_Str(value);
+    if (message != NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        PyErr_Format(type, "item %zd: %U", index, message);
+        Py_DECREF(message);
+    }
+    Py_DECREF(type);
+    Py_DECREF(value);
+}
+
+typedef struct pybase64_many_item {
+    PyObject* object;
+    Py_buffer buffer;
+    pybase64_bytes_writer writer;
+    char* dst;
+    size_t out_len;
+} pybase64_many_item;
+
+static void pybase64_many_items_release(pybase64_many_item* items, Py_ssize_t count)
+{
+    Py_ssize_t i;
+
+    for (i = 0; i < count; ++i) {
+        if (items[i].dst != NULL) {
+            pybase64_bytes_writer_discard(&items[i].writer);
+        }
+        PyBuffer_Release(&items[i].buffer);
+        Py_DECREF(items[i].object);
+    }
+    PyMem_Free(items);
+}
+
+/* returns the items of in_object with their buffer acquired, ASCII strings are accepted when decoding */
+static pybase64_many_item* pybase64_many_items_acquire(PyObject* in_object, int decode, Py_ssize_t* count)
+{
+    PyObject* sequence;
+    pybase64_many_item* items;
+    Py_ssize_t i;
+
+    sequence = PySequence_Fast(in_object, "argument should be an iterable");
+    if (sequence == NULL) {
+        return NULL;
+    }
+    *count = PySequence_Fast_GET_SIZE(sequence);
+    items = PyMem_New(pybase64_many_item, (size_t)*count + 1U);
+    if (items == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        Py_DECREF(sequence); /* GCOVR_EXCL_LINE */
+        PyErr_NoMemory(); /* GCOVR_EXCL_LINE */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    for (i = 0; i < *count; ++i) {
+        pybase64_many_item* item = &items[i];
+        PyObject* object = PySequence_Fast_GET_ITEM(sequence, i);
+
+        if (decode && PyUnicode_Check(object)) {
+            object = PyUnicode_AsASCIIString(object);
+            if (object == NULL) {
+                if (PyErr_ExceptionMatches(PyExc_UnicodeEncodeError)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+                    PyErr_SetString(PyExc_ValueError, "string argument should contain only ASCII characters");
+                }
+                goto EXCEPT;
+            }
+        }
+        else {
+            Py_INCREF(object);
+        }
+        if (get_buffer(object, &item->buffer, 0) != 0) {
+            Py_DECREF(object);
+            goto EXCEPT;
+        }
+        item->object = object;
+        item->dst = NULL;
+        item->out_len = 0U;
+    }
+    Py_DECREF(sequence);
+    return items;
+EXCEPT:
+    set_item_error(i);
+    pybase64_many_items_release(items, i);
+    Py_DECREF(sequence);
+    return NULL;
+}
+
+/* returns 0 on success */
+static int pybase64_many_items_create(pybase64_many_item* items, Py_ssize_t count)
+{
+    Py_ssize_t i;
+
+    for (i = 0; i < count; ++i) {
+        items[i].dst = pybase64_bytes_writer_create(&items[i].writer, items[i].out_len);
+        if (items[i].dst == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            return -1; /* GCOVR_EXCL_LINE */
+        }
+    }
+    return 0;
+}
+
+/* returns a list of bytes objects */
+static PyObject* pybase64_many_items_finish(pybase64_many_item* items, Py_ssize_t count)
+{
+    PyObject* out_object = PyList_New(count);
+    Py_ssize_t i;
+
+    if (out_object == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    for (i = 0; i < count; ++i) {
+        PyObject* item = pybase64_bytes_writer_finish(&items[i].writer, items[i].out_len);
+        items[i].dst = NULL;
+        if (item == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            Py_CLEAR(out_object); /* GCOVR_EXCL_LINE */
+            break; /* GCOVR_EXCL_LINE */
+        }
+        PyList_SET_ITEM(out_object, i, item);
+    }
+    return out_object;
+}
+
+/* returns a tuple (bytearray, array('q')) */
+static PyObject* pybase64_packed_finish(pybase64_state* state, PyObject* data, PyObject* offsets)
+{
+    PyObject* offsets_array = PyObject_CallFunction(state->arrayType, "sO", "q", offsets);
+    PyObject* out_object;
+
+    if (offsets_array == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    out_object = PyTuple_Pack(2, data, offsets_array);
+    Py_DECREF(offsets_array);
+    return out_object;
+}
+
+/* returns 0 on success, encoded lengths are stored in items */
+/* returns the total input length, the total output length is written in out_len */
+static size_t pybase64_many_items_total(pybase64_many_item const* items, Py_ssize_t count, size_t* out_len)
+{
+    size_t in_len = 0U;
+    Py_ssize_t i;
+
+    *out_len = 0U;
+    for (i = 0; i < count; ++i) {
+        in_len += (size_t)items[i].buffer.len;
+        *out_len += items[i].out_len;
+    }
+    return in_len;
+}
+
+static int pybase64_encode_items_length(pybase64_many_item* items, Py_ssize_t count, int padded, Py_ssize_t wrapcol)
+{
+    Py_ssize_t i;
+
+    for (i = 0; i < count; ++i) {
+        Py_ssize_t item_wrapcol = wrapcol;
+        unsigned int flags = 0U;
+
+        if ((items[i].buffer.len > 0) && !padded) {
+            flags |= PYBASE64_FLAGS_NO_PADDING;
+        }
+        if (pybase64_encode_length(items[i].buffer.len, &item_wrapcol, &flags, &items[i].out_len) != 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            set_item_error(i); /* GCOVR_EXCL_LINE */
+            return -1; /* GCOVR_EXCL_LINE */
+        }
+    }
+    return 0;
+}
+
+/* src/src_len describe the item to encode, lengths must have been checked by pybase64_encode_length */
+/* does not interact with Python objects, can be called without the GIL */
+static void pybase64_encode_item(const char* src, Py_ssize_t src_len, char* dst, char const* alphabet, int padded, Py_ssize_t wrapcol)
+{
+    unsigned int flags = 0U;
+    size_t out_len;
+
+    if ((src_len > 0) && !padded) {
+        flags |= PYBASE64_FLAGS_NO_PADDING;
+    }
+    /* cannot fail, it already succeeded with the GIL held */
+    pybase64_encode_length(src_len, &wrapcol, &flags, &out_len);
+    pybase64_encode_core(src, src_len, dst, out_len, alphabet, wrapcol, flags);
+}
+
+/* decodes items into their own output or, when dst is not NULL, at dst + offsets[i] */
+/* returns the index of the failing item, -1 on success */
+/* does not interact with Python objects, can be called without the GIL */
+static Py_ssize_t pybase64_decode_items(pybase64_many_item* items, Py_ssize_t count, pybase64_decode_options const* options, char* dst, int64_t* offsets, int* result, int* has_bad_char)
+{
+    Py_ssize_t i;
+
+    for (i = 0; i < count; ++i) {
+        pybase64_many_item* item = &items[i];
+        const char* source = (const char*)item->buffer.buf;
+        size_t source_len = (size_t)item->buffer.len;
+        char* item_dst = (dst != NULL) ? (dst + offsets[i]) : item->dst;
+
+        if (!options->fast_path) {
+            if (options->translate_slow) {
+                *result = decode_slow_translate(source, source_len, item_dst, &item->out_len, options, has_bad_char);
+            }
+            else {
+                *result = decode_slow_compact(source, source_len, item_dst, &item->out_len, options, 0, NULL, has_bad_char);
+            }
+        }
+        else {
+            struct base64_state b64_state;
+
+            base64_stream_decode_init(&b64_state, 0);
+            if (!decode_fast(&b64_state, source, source_len, item_dst, &item->out_len, options, has_bad_char) || (b64_state.bytes != 0)) {
+                *result = PYBASE64_DECODE_SLOW_INVALID_DATA;
+            }
+            else if (options->canonical && (b64_state.carry != 0)) {
+                *result = PYBASE64_DECODE_SLOW_PADDING_BITS_NOT_ALLOWED;
+            }
+        }
+        if (*result != PYBASE64_DECODE_SLOW_SUCCESS) {
+            return i;
+        }
+        if (dst != NULL) {
+            offsets[i + 1] = offsets[i] + (int64_t)item->out_len;
+        }
+    }
+    return -1;
+}
+
+/* returns what pybase64.explain() reports instead of the encoded items when explain is not 0 */
+static PyObject* pybase64_encode_many_impl(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames, int explain)
+{
+    static const pybase64_params params = { "O|O$pn", { PYBASE64_KW_NONE, PYBASE64_KW_ALTCHARS, PYBASE64_KW_PADDED, PYBASE64_KW_WRAPCOL } };
+
+    int use_alphabet = 0;
+    char alphabet[2];
+    char const* alphabet_ptr;
+    PyObject* in_object;
+    PyObject* in_alphabet = NULL;
+    PyObject* out_object = NULL;
+    pybase64_many_item* items;
+    int padded = 1;
+    Py_ssize_t wrapcol = 0;
+    Py_ssize_t count;
+    Py_ssize_t i;
+    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+
+    /* Parse the arguments */
+    if (parse_fastcall_args(state, &params, args, nargs, kwnames, &in_object, &in_alphabet, &padded, &wrapcol) != 0) {
+        return NULL;
+    }
+
+    if (parse_alphabet(in_alphabet, alphabet, &use_alphabet) != 0) {
+        return NULL;
+    }
+    alphabet_ptr = use_alphabet ? alphabet : NULL;
+
+    if (wrapcol < 0) {
+        PyErr_SetString(PyExc_ValueError, "wrapcol must be >= 0");
+        return NULL;
+    }
+
+    /* acquire all inputs & allocate all outputs before releasing the GIL once */
+    items = pybase64_many_items_acquire(in_object, 0, &count);
+    if (items == NULL) {
+        return NULL;
+    }
+    if (pybase64_encode_items_length(items, count, padded, wrapcol) != 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        goto FINALLY; /* GCOVR_EXCL_LINE */
+    }
+    if (explain) {
+        pybase64_explain info;
+        size_t out_len;
+
+        pybase64_many_items_total(items, count, &out_len);
+        pybase64_explain_init(&info, pybase64_stats_encode_path(alphabet_ptr, wrapcol), use_alphabet, out_len);
+        /* the GIL is released once for all items */
+        info.release_gil = 1;
+        out_object = pybase64_explain_result(&info);
+        goto FINALLY;
+    }
+    if (pybase64_many_items_create(items, count) != 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        goto FINALLY; /* GCOVR_EXCL_LINE */
+    }
+
+    /* not interacting with Python objects from here, release the GIL */
+    Py_BEGIN_ALLOW_THREADS
+
+    for (i = 0; i < count; ++i) {
+        pybase64_encode_item((const char*)items[i].buffer.buf, items[i].buffer.len, items[i].dst, alphabet_ptr, padded, wrapcol);
+    }
+
+    /* restore the GIL */
+    Py_END_ALLOW_THREADS
+
+    if (PYBASE64_STATS_ENABLED(state)) {
+        size_t out_len;
+        size_t in_len = pybase64_many_items_total(items, count, &out_len);
+
+        pybase64_stats_record(state, PYBASE64_STATS_B64ENCODE_MANY, pybase64_stats_encode_path(alphabet_ptr, wrapcol), in_len, out_len);
+    }
+
+    out_object = pybase64_many_items_finish(items, count);
+FINALLY:
+    pybase64_many_items_release(items, count);
+    return out_object;
+}
+
+static PyObject* pybase64_encode_many(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
+{
+    return pybase64_encode_many_impl(self, args, nargs, kwnames, 0);
+}
+
+/* returns what pybase64.explain() reports instead of the encoded items when explain is not 0 */
+static PyObject* pybase64_encode_packed_impl(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames, int explain)
+{
+    static const pybase64_params params = { "OO|O$pn", { PYBASE64_KW_NONE, PYBASE64_KW_NONE, PYBASE64_KW_ALTCHARS, PYBASE64_KW_PADDED, PYBASE64_KW_WRAPCOL } };
+
+    int use_alphabet = 0;
+    char alphabet[2];
+    char const* alphabet_ptr;
+    Py_buffer buffer;
+    Py_buffer offsets_buffer;
+    PyObject* in_object;
+    PyObject* in_offsets;
+    PyObject* in_alphabet = NULL;
+    PyObject* out_object = NULL;
+    PyObject* out_data = NULL;
+    PyObject* out_offsets = NULL;
+    const int64_t* offsets;
+    int64_t* out_offsets_ptr;
+    char* dst;
+    int padded = 1;
+    Py_ssize_t wrapcol = 0;
+    Py_ssize_t count;
+    Py_ssize_t i;
+    size_t total = 0U;
+    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+
+    /* Parse the arguments */
+    if (parse_fastcall_args(state, &params, args, nargs, kwnames, &in_object, &in_offsets, &in_alphabet, &padded, &wrapcol) != 0) {
+        return NULL;
+    }
+
+    if (parse_alphabet(in_alphabet, alphabet, &use_alphabet) != 0) {
+        return NULL;
+    }
+    alphabet_ptr = use_alphabet ? alphabet : NULL;
+
+    if (wrapcol < 0) {
+        PyErr_SetString(PyExc_ValueError, "wrapcol must be >= 0");
+        return NULL;
+    }
+
+    if (get_buffer(in_object, &buffer, 0) != 0) {
+        return NULL;
+    }
+    if (get_offsets_buffer(in_offsets, &offsets_buffer) != 0) {
+        PyBuffer_Release(&buffer);
+        return NULL;
+    }
+    offsets = (const int64_t*)offsets_buffer.buf;
+    count = (offsets_buffer.len / 8) - 1;
+    if (check_offsets(offsets, count, buffer.len) != 0) {
+        goto FINALLY;
+    }
+
+    out_offsets = PyBytes_FromStringAndSize(NULL, (count + 1) * 8);
+    if (out_offsets == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        goto FINALLY; /* GCOVR_EXCL_LINE */
+    }
+    out_offsets_ptr = (int64_t*)PyBytes_AS_STRING(out_offsets);
+    out_offsets_ptr[0] = 0;
+    for (i = 0; i < count; ++i) {
+        Py_ssize_t item_wrapcol = wrapcol;
+        unsigned int flags = 0U;
+        size_t out_len;
+
+        if ((offsets[i + 1] > offsets[i]) && !padded) {
+            flags |= PYBASE64_FLAGS_NO_PADDING;
+        }
+        if (pybase64_encode_length((Py_ssize_t)(offsets[i + 1] - offsets[i]), &item_wrapcol, &flags, &out_len) != 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            goto FINALLY; /* GCOVR_EXCL_LINE */
+        }
+        if (out_len > ((size_t)PY_SSIZE_T_MAX - total)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            PyErr_NoMemory(); /* GCOVR_EXCL_LINE */
+            goto FINALLY; /* GCOVR_EXCL_LINE */
+        }
+        total += out_len;
+        out_offsets_ptr[i + 1] = (int64_t)total;
     }
+    if (explain) {
+        pybase64_explain info;
+
+        pybase64_explain_init(&info, pybase64_stats_encode_path(alphabet_ptr, wrapcol), use_alphabet, total);
+        /* the GIL is released once for all items */
+        info.release_gil = 1;
+        out_object = pybase64_explain_result(&info);
+        goto FINALLY;
+    }
+    out_data = PyByteArray_FromStringAndSize(NULL, (Py_ssize_t)total);
+    if (out_data == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        goto FINALLY; /* GCOVR_EXCL_LINE */
+    }
+    dst = PyByteArray_AS_STRING(out_data);
 
-    if (!fast_path) {
-        int result;
-
-        /* not interacting with Python objects from here, release the GIL */
-        Py_BEGIN_ALLOW_THREADS
+    /* not interacting with Python objects from here, release the GIL */
+    Py_BEGIN_ALLOW_THREADS
 
-        result = decode_slow(source, source_len, dest, &out_len, &ignorechars_buffer, padded, canonical);
+    for (i = 0; i < count; ++i) {
+        pybase64_encode_item((const char*)buffer.buf + offsets[i], (Py_ssize_t)(offsets[i + 1] - offsets[i]), dst + out_offsets_ptr[i], alphabet_ptr, padded, wrapcol);
+    }
 
-        /* restore the GIL */
-        Py_END_ALLOW_THREADS
+    /* restore the GIL */
+    Py_END_ALLOW_THREADS
 
-        if (result != PYBASE64_DECODE_SLOW_SUCCESS) {
-            switch(result) /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/10 */
-            {
-            case PYBASE64_DECODE_SLOW_INCORRECT_PADDING:
-                PyErr_SetString(state->binAsciiError, "Incorrect padding");
-                break;
-            case PYBASE64_DECODE_SLOW_EXCESS_DATA:
-                PyErr_SetString(state->binAsciiError, "Excess data after padding");
-                break;
-            case PYBASE64_DECODE_SLOW_LEADING_PADDING:
-                PyErr_SetString(state->binAsciiError, "Leading padding");
-                break;
-            case PYBASE64_DECODE_SLOW_DISCONTINUOUS_PADDING:
-                PyErr_SetString(state->binAsciiError, "Discontinuous padding");
-                break;
-            case PYBASE64_DECODE_SLOW_EXCESS_PADDING:
-                PyErr_SetString(state->binAsciiError, "Excess padding");
-                break;
-            case PYBASE64_DECODE_SLOW_INVALID_LEN:
-                PyErr_SetString(state->binAsciiError, "Invalid number of data characters");
-                break;
-            case PYBASE64_DECODE_SLOW_INVALID_DATA:
-                PyErr_SetString(state->binAsciiError, "Non-base64 digit found");
-                break;
-            case PYBASE64_DECODE_SLOW_PADDING_NOT_ALLOWED:
-                PyErr_SetString(state->binAsciiError, "Padding not allowed");
-                break;
-            case PYBASE64_DECODE_SLOW_PADDING_BITS_NOT_ALLOWED:
-                PyErr_SetString(state->binAsciiError, "Non-zero padding bits");
-                break;
-            }
-            goto EXCEPT;
-        }
-    }
-    else if (use_alphabet) {
-        /* TODO, make this more efficient */
-        const Py_ssize_t src_slice = 16 * 1024;
-        const size_t dst_slice = (src_slice / 4) * 3;
-        char cache[16 * 1024];
-        Py_ssize_t len = source_len;
-        const char* src = source;
-        char* dst = dest;
-        int result = 1;
-        struct base64_state b64_state;
+    PYBASE64_STATS_RECORD(state, PYBASE64_STATS_B64ENCODE_PACKED, pybase64_stats_encode_path(alphabet_ptr, wrapcol), offsets[count] - offsets[0], total)
 
-        /* not interacting with Python objects from here, release the GIL */
-        Py_BEGIN_ALLOW_THREADS
+    out_object = pybase64_packed_finish(state, out_data, out_offsets);
+FINALLY:
+    Py_XDECREF(out_data);
+    Py_XDECREF(out_offsets);
+    PyBuffer_Release(&offsets_buffer);
+    PyBuffer_Release(&buffer);
+    return out_object;
+}
 
-        base64_stream_decode_init(&b64_state, 0);
+static PyObject* pybase64_encode_packed(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
+{
+    return pybase64_encode_packed_impl(self, args, nargs, kwnames, 0);
+}
 
-        while (len > src_slice) {
-            size_t dst_len = dst_slice;
+/* common implementation of b64decode_many & b64decode_packed */
+/* returns what pybase64.explain() reports instead of the decoded items when explain is not 0 */
+static PyObject* pybase64_decode_many_impl(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames, int packed, int explain)
+{
+    static const pybase64_params params = { "O|OO$pOp", { PYBASE64_KW_NONE, PYBASE64_KW_ALTCHARS, PYBASE64_KW_VALIDATE, PYBASE64_KW_PADDED, PYBASE64_KW_IGNORECHARS, PYBASE64_KW_CANONICAL } };
 
-            translate_fn(src, cache, src_slice, alphabet, &has_bad_char);
-            result = base64_stream_decode(&b64_state, cache, src_slice, dst, &dst_len);
-            if (result <= 0) {
-                break;
-            }
+    PyObject* in_alphabet = NULL;
+    PyObject* in_object;
+    PyObject* validation_object = NULL;
+    PyObject* ignorechars_object = NULL;
+    PyObject* out_object = NULL;
+    PyObject* out_data = NULL;
+    PyObject* out_offsets = NULL;
+    pybase64_many_item* items;
+    pybase64_decode_options options;
+    char* dst = NULL;
+    int64_t* offsets = NULL;
+    size_t total = 0U;
+    Py_ssize_t count;
+    Py_ssize_t index;
+    Py_ssize_t i;
+    int canonical = 0;
+    int padded = 1;
+    int has_bad_char = 0;
+    int result = PYBASE64_DECODE_SLOW_SUCCESS;
+    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    /* Parse the arguments */
+    if (parse_fastcall_args(state, &params, args, nargs, kwnames, &in_object, &in_alphabet, &validation_object, &padded, &ignorechars_object, &canonical) != 0) {
+        return NULL;
+    }
 
-            len -= src_slice;
-            src += src_slice;
-            out_len -= dst_slice;
-            dst += dst_slice;
-        }
-        if (result > 0) {
-            translate_fn(src, cache, len, alphabet, &has_bad_char);
-            result = base64_stream_decode(&b64_state, cache, len, dst, &out_len);
-            if (b64_state.bytes != 0) {
-                result = 0;
-            }
-        }
+    if (pybase64_decode_options_init(state, &options, in_alphabet, validation_object, padded, ignorechars_object, canonical) != 0) {
+        return NULL;
+    }
 
-        /* restore the GIL */
-        Py_END_ALLOW_THREADS
+    /* acquire all inputs & allocate all outputs before releasing the GIL once */
+    items = pybase64_many_items_acquire(in_object, 1, &count);
+    if (items == NULL) {
+        pybase64_decode_options_release(&options);
+        return NULL;
+    }
+    for (i = 0; i < count; ++i) {
+        size_t len = (size_t)items[i].buffer.len;
 
-        if (result <= 0) {
-            PyErr_SetString(state->binAsciiError, "Non-base64 digit found");
-            goto EXCEPT;
+        /* No overflow check needed, exact out_len recomputed after decoding */
+        items[i].out_len = (len / 4U) * 3U + 3U;
+        total += items[i].out_len;
+    }
+    if (explain) {
+        pybase64_explain info;
+        size_t out_len;
+
+        pybase64_decode_explain_init(&info, &options, pybase64_many_items_total(items, count, &out_len), total, 1);
+        /* the GIL is released once for all items */
+        info.release_gil = 1;
+        out_object = pybase64_explain_result(&info);
+        goto FINALLY;
+    }
+    if (packed) {
+        out_offsets = PyBytes_FromStringAndSize(NULL, (count + 1) * 8);
+        if (out_offsets == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            goto FINALLY; /* GCOVR_EXCL_LINE */
         }
-        if (canonical && (b64_state.carry != 0)) {
-            PyErr_SetString(state->binAsciiError, "Non-zero padding bits");
-            goto EXCEPT;
+        offsets = (int64_t*)PyBytes_AS_STRING(out_offsets);
+        offsets[0] = 0;
+        out_data = PyByteArray_FromStringAndSize(NULL, (Py_ssize_t)total);
+        if (out_data == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            goto FINALLY; /* GCOVR_EXCL_LINE */
         }
-        out_len += (dst - (char*)dest);
+        dst = PyByteArray_AS_STRING(out_data);
+    }
+    else if (pybase64_many_items_create(items, count) != 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        goto FINALLY; /* GCOVR_EXCL_LINE */
     }
-    else {
-        int result;
-        struct base64_state b64_state;
 
-        /* not interacting with Python objects from here, release the GIL */
-        Py_BEGIN_ALLOW_THREADS
+    /* not interacting with Python objects from here, release the GIL */
+    Py_BEGIN_ALLOW_THREADS
 
-        base64_stream_decode_init(&b64_state, 0);
-        result = base64_stream_decode(&b64_state, source, source_len, dest, &out_len);
-        if (b64_state.bytes != 0) {
-            result = 0;
-        }
+    index = pybase64_decode_items(items, count, &options, dst, offsets, &result, &has_bad_char);
 
-        /* restore the GIL */
-        Py_END_ALLOW_THREADS
+    /* restore the GIL */
+    Py_END_ALLOW_THREADS
 
-        if (result <= 0) {
-            PyErr_SetString(state->binAsciiError, "Non-base64 digit found");
-            goto EXCEPT;
+    if (PYBASE64_STATS_ENABLED(state)) {
+        size_t out_len;
+        size_t in_len = pybase64_many_items_total(items, count, &out_len);
+
+        if (index >= 0) {
+            pybase64_stats_record(state, packed ? PYBASE64_STATS_B64DECODE_PACKED : PYBASE64_STATS_B64DECODE_MANY, PYBASE64_STATS_ERROR, in_len, 0U);
         }
-        if (canonical && (b64_state.carry != 0)) {
-            PyErr_SetString(state->binAsciiError, "Non-zero padding bits");
-            goto EXCEPT;
+        else {
+            pybase64_stats_record(state, packed ? PYBASE64_STATS_B64DECODE_PACKED : PYBASE64_STATS_B64DECODE_MANY, pybase64_stats_decode_path(&options), in_len, out_len);
         }
     }
-    if (return_bytearray) {
-        PyByteArray_Resize(out_object, (Py_ssize_t)out_len);
-    }
-    else {
-#if PY_VERSION_HEX >= 0x030f0000
-        out_object = PyBytesWriter_FinishWithSize(writer, (Py_ssize_t)out_len);
-        /* writer = NULL; */
-#else
-        _PyBytes_Resize(&out_object, (Py_ssize_t)out_len);
-#endif
+    if (index >= 0) {
+        set_decode_slow_error(state, result);
+        set_item_error(index);
+        goto FINALLY;
     }
-    goto FINALLY;
-EXCEPT:
-#if PY_VERSION_HEX >= 0x030f0000
-    PyBytesWriter_Discard(writer);
-#endif
-    Py_XDECREF(out_object);
-    out_object = NULL;
-FINALLY:
-    if (source_use_buffer) {
-        PyBuffer_Release(&buffer);
-        Py_DECREF(in_object);
+    if (packed) {
+        if (PyByteArray_Resize(out_data, (Py_ssize_t)offsets[count]) != 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            goto FINALLY; /* GCOVR_EXCL_LINE */
+        }
+        out_object = pybase64_packed_finish(state, out_data, out_offsets);
     }
-    if (ignorechars_object) {
-        PyBuffer_Release(&ignorechars_buffer);
-        Py_DECREF(ignorechars_object);
+    else {
+        out_object = pybase64_many_items_finish(items, count);
     }
     if (has_bad_char && (out_object != NULL)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/4 */
-        static const char format_validation[] = "invalid characters '+' or '/' in Base64 data with altchars=%R and validate=True will be an error in future versions";
-        static const char format_no_validation[] = "invalid characters '+' or '/' in Base64 data with altchars=%R and validate=False will be discarded in future versions";
-        char const* format = validation ? format_validation : format_no_validation;
-        PyObject* category = validation ? PyExc_DeprecationWarning : PyExc_FutureWarning;
-        if (PyErr_WarnFormat(category, 2, format, in_alphabet) < 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
-            Py_XDECREF(out_object); /* GCOVR_EXCL_LINE */
-            out_object = NULL; /* GCOVR_EXCL_LINE */
+        if (warn_bad_char(&options, 1) < 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            Py_CLEAR(out_object); /* GCOVR_EXCL_LINE */
         }
     }
+FINALLY:
+    Py_XDECREF(out_data);
+    Py_XDECREF(out_offsets);
+    pybase64_many_items_release(items, count);
+    pybase64_decode_options_release(&options);
     return out_object;
 }
 
-static PyObject* pybase64_decode(PyObject* self, PyObject* args, PyObject *kwds)
+static PyObject* pybase64_decode_many(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
 {
-    return pybase64_decode_impl(self, args, kwds, 0);
+    return pybase64_decode_many_impl(self, args, nargs, kwnames, 0, 0);
 }
 
-static PyObject* pybase64_decode_as_bytearray(PyObject* self, PyObject* args, PyObject *kwds)
+static PyObject* pybase64_decode_packed(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
 {
-    return pybase64_decode_impl(self, args, kwds, 1);
+    return pybase64_decode_many_impl(self, args, nargs, kwnames, 1, 0);
 }
 
-static PyObject* pybase64_encodebytes(PyObject* self, PyObject* in_object)
+static PyObject* pybase64_encodebytes_impl(PyObject* self, PyObject* in_object, int explain)
 {
     Py_buffer buffer;
     PyObject* out_object;
+    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
 
     if (get_buffer(in_object, &buffer, 1) != 0) {
         return NULL;
     }
 
-    out_object = pybase64_encode_impl_core(self, &buffer, NULL, 76, PYBASE64_FLAGS_APPEND_NEW_LINE);
+    out_object = pybase64_encode_impl_core(state, PYBASE64_STATS_ENCODEBYTES, &buffer, NULL, 76, PYBASE64_FLAGS_APPEND_NEW_LINE, 1, explain);
 
     PyBuffer_Release(&buffer);
 
     return out_object;
 }
 
+static PyObject* pybase64_encodebytes(PyObject* self, PyObject* in_object)
+{
+    return pybase64_encodebytes_impl(self, in_object, 0);
+}
+
+/* reports the path a call would take, the arguments are checked by the same code as the call */
+static PyObject* pybase64_explain_call(PyObject* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)
+{
+    const char* name;
+
+    if ((nargs < 1) || !PyUnicode_Check(args[0])) {
+        PyErr_SetString(PyExc_TypeError, "expected a function name");
+        return NULL;
+    }
+    name = PyUnicode_AsUTF8(args[0]);
+    if (name == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    /* the remaining arguments are the ones of the call, keyword values follow them */
+    ++args;
+    --nargs;
+
+    if (strcmp(name, "b64encode") == 0) {
+        return pybase64_encode_impl(self, args, nargs, kwnames, 0U, 1);
+    }
+    if (strcmp(name, "b64encode_as_string") == 0) {
+        return pybase64_encode_impl(self, args, nargs, kwnames, PYBASE64_FLAGS_ENCODE_AS_STRING, 1);
+    }
+    if (strcmp(name, "b64encode_into") == 0) {
+        return pybase64_encode_into_impl(self, args, nargs, kwnames, 1);
+    }
+    if (strcmp(name, "encodebytes") == 0) {
+        static const pybase64_params params = { "O", { PYBASE64_KW_NONE } };
+        PyObject* in_object;
+        pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+        if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            return NULL; /* GCOVR_EXCL_LINE */
+        }
+
+        if (parse_fastcall_args(state, &params, args, nargs, kwnames, &in_object) != 0) {
+            return NULL;
+        }
+        return pybase64_encodebytes_impl(self, in_object, 1);
+    }
+    if (strcmp(name, "b64decode") == 0) {
+        return pybase64_decode_impl(self, args, nargs, kwnames, 0, 1);
+    }
+    if (strcmp(name, "b64decode_as_bytearray") == 0) {
+        return pybase64_decode_impl(self, args, nargs, kwnames, 1, 1);
+    }
+    if (strcmp(name, "b64decode_into") == 0) {
+        return pybase64_decode_into_impl(self, args, nargs, kwnames, 1);
+    }
+    if (strcmp(name, "b64encode_many") == 0) {
+        return pybase64_encode_many_impl(self, args, nargs, kwnames, 1);
+    }
+    if (strcmp(name, "b64encode_packed") == 0) {
+        return pybase64_encode_packed_impl(self, args, nargs, kwnames, 1);
+    }
+    if (strcmp(name, "b64decode_many") == 0) {
+        return pybase64_decode_many_impl(self, args, nargs, kwnames, 0, 1);
+    }
+    if (strcmp(name, "b64decode_packed") == 0) {
+        return pybase64_decode_many_impl(self, args, nargs, kwnames, 1, 1);
+    }
+    if (strcmp(name, "b64decoded_length") == 0) {
+        return pybase64_decoded_length_impl(self, args, nargs, kwnames, 0, 1);
+    }
+    if (strcmp(name, "b64validate") == 0) {
+        return pybase64_decoded_length_impl(self, args, nargs, kwnames, 1, 1);
+    }
+    if ((strcmp(name, "Codec.encode") == 0) || (strcmp(name, "Codec.decode") == 0)) {
+        /* the codec comes first, then the arguments of a METH_O method */
+        pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+        if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            return NULL; /* GCOVR_EXCL_LINE */
+        }
+
+        if ((nargs < 1) || !PyObject_TypeCheck(args[0], (PyTypeObject*)state->codecType)) {
+            PyErr_SetString(PyExc_TypeError, "expected a Codec");
+            return NULL;
+        }
+        if ((kwnames != NULL) && (PyTuple_GET_SIZE(kwnames) != 0)) {
+            PyErr_Format(PyExc_TypeError, "%s() takes no keyword arguments", name);
+            return NULL;
+        }
+        if (nargs != 2) {
+            PyErr_Format(PyExc_TypeError, "%s() takes exactly one argument (%zd given)", name, nargs - 1);
+            return NULL;
+        }
+        if (strcmp(name, "Codec.encode") == 0) {
+            return pybase64_codec_encode_impl((pybase64_codec*)args[0], args[1], 1);
+        }
+        return pybase64_codec_decode_impl((pybase64_codec*)args[0], args[1], 1);
+    }
+    PyErr_Format(PyExc_ValueError, "%s is not supported", name);
+    return NULL;
+}
+
 static PyObject* pybase64_get_simd_path(PyObject* self, PyObject* arg)
 {
     pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
@@ -1419,6 +4481,23 @@ static void set_simd_path(pybase64_state* state, uint32_t flag)
         state->active_simd_flag = PYBASE64_NONE;
         b64_cpu_flags = BASE64_FORCE_PLAIN;
     }
+    translate_inplace_impl = &translate_inplace_default;
+    copy_alphabet_prefix_impl = NULL;
+    copy_urlsafe_prefix_impl = NULL;
+#if BASE64_WITH_AVX512
+    if (state->active_simd_flag == PYBASE64_AVX512VBMI) {
+        translate_inplace_impl = &translate_inplace_avx512;
+    }
+#endif
+#if BASE64_WITH_AVX2
+    if (state->active_simd_flag == PYBASE64_AVX2) {
+        translate_inplace_impl = &translate_inplace_avx2;
+    }
+    if ((state->active_simd_flag == PYBASE64_AVX2) || (state->active_simd_flag == PYBASE64_AVX512VBMI)) {
+        copy_alphabet_prefix_impl = &copy_alphabet_prefix_avx2;
+        copy_urlsafe_prefix_impl = &copy_urlsafe_prefix_avx2;
+    }
+#endif
     if (b64_cpu_flags_mem != b64_cpu_flags) {
         struct base64_state b64_state;
         base64_stream_encode_init(&b64_state, b64_cpu_flags);
@@ -1470,6 +4549,95 @@ static PyObject* pybase64_get_simd_name(PyObject* self, PyObject* arg)
     return PyUnicode_FromString("No SIMD");
 }
 
+static PyObject* pybase64_get_stats(PyObject* self, PyObject* arg)
+{
+    PyObject* result;
+    int entry;
+    int path;
+    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+
+    result = PyDict_New();
+    if (result == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    /* only entry points & paths that were used are reported */
+    for (entry = 0; entry < PYBASE64_STATS_ENTRY_COUNT; ++entry) {
+        PyObject* paths = NULL;
+
+        for (path = 0; path < PYBASE64_STATS_PATH_COUNT; ++path) {
+            pybase64_stats_counters* counters = &state->stats[entry][path];
+            unsigned long long calls = PYBASE64_STATS_LOAD(counters->calls);
+            PyObject* value;
+            int error;
+
+            if (calls == 0U) {
+                continue;
+            }
+            if (paths == NULL) {
+                paths = PyDict_New();
+                if ((paths == NULL) || (PyDict_SetItemString(result, pybase64_stats_entry_names[entry], paths) != 0)) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 2/4 */
+                    goto EXCEPT; /* GCOVR_EXCL_LINE */
+                }
+                Py_DECREF(paths); /* borrowed from result */
+            }
+            value = Py_BuildValue("{sKsKsK}", "calls", calls, "bytes_in", (unsigned long long)PYBASE64_STATS_LOAD(counters->bytes_in), "bytes_out", (unsigned long long)PYBASE64_STATS_LOAD(counters->bytes_out));
+            if (value == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+                goto EXCEPT; /* GCOVR_EXCL_LINE */
+            }
+            error = PyDict_SetItemString(paths, pybase64_stats_path_names[path], value);
+            Py_DECREF(value);
+            if (error != 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+                goto EXCEPT; /* GCOVR_EXCL_LINE */
+            }
+        }
+    }
+    return result;
+EXCEPT:
+    Py_DECREF(result); /* GCOVR_EXCL_LINE */
+    return NULL; /* GCOVR_EXCL_LINE */
+}
+
+static PyObject* pybase64_reset_stats(PyObject* self, PyObject* arg)
+{
+    int entry;
+    int path;
+    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+
+    for (entry = 0; entry < PYBASE64_STATS_ENTRY_COUNT; ++entry) {
+        for (path = 0; path < PYBASE64_STATS_PATH_COUNT; ++path) {
+            pybase64_stats_counters* counters = &state->stats[entry][path];
+
+            PYBASE64_STATS_STORE(counters->calls, 0U);
+            PYBASE64_STATS_STORE(counters->bytes_in, 0U);
+            PYBASE64_STATS_STORE(counters->bytes_out, 0U);
+        }
+    }
+    Py_RETURN_NONE;
+}
+
+static PyObject* pybase64_set_stats_enabled(PyObject* self, PyObject* arg)
+{
+    int previous;
+    int enabled = PyObject_IsTrue(arg);
+    pybase64_state *state = (pybase64_state*)PyModule_GetState(self);
+    if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+    if (enabled < 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return NULL; /* GCOVR_EXCL_LINE */
+    }
+
+    previous = PYBASE64_STATS_ENABLED(state);
+    PYBASE64_STATS_SET_ENABLED(state, enabled);
+    return PyBool_FromLong(previous);
+}
+
 static PyObject* pybase64_import(const char* from, const char* object)
 {
     PyObject* subModules;
@@ -1527,6 +4695,42 @@ static PyObject* pybase64_import_BinAsciiError()
     return binAsciiError;
 }
 
+static void pybase64_init_decode_tables(pybase64_state* state)
+{
+    const uint32_t* dec_32bit[4] = { base64_table_dec_32bit_d0, base64_table_dec_32bit_d1, base64_table_dec_32bit_d2, base64_table_dec_32bit_d3 };
+    int i;
+    int j;
+
+    for (i = 0; i < PYBASE64_DECODE_TABLES_COUNT; ++i) {
+        pybase64_decode_tables* tables = &state->decode_tables[i];
+
+        for (j = 0; j < 4; ++j) {
+            memcpy(tables->dec_32bit[j], dec_32bit[j], sizeof(tables->dec_32bit[j]));
+        }
+        memcpy(tables->dec_8bit, base64_table_dec_8bit, sizeof(tables->dec_8bit));
+        if (i == PYBASE64_DECODE_TABLES_STANDARD) {
+            continue;
+        }
+        for (j = 0; j < 4; ++j) {
+            tables->dec_32bit[j]['-'] = dec_32bit[j]['+'];
+            tables->dec_32bit[j]['_'] = dec_32bit[j]['/'];
+            /* '+' & '/' always leave the fast loop */
+            tables->dec_32bit[j]['+'] = dec_32bit[j]['-'];
+            tables->dec_32bit[j]['/'] = dec_32bit[j]['_'];
+        }
+        tables->dec_8bit['-'] = 62U;
+        tables->dec_8bit['_'] = 63U;
+        if (i == PYBASE64_DECODE_TABLES_URLSAFE) {
+            tables->dec_8bit['+'] = PYBASE64_DECODE_BAD_CHAR | 62U;
+            tables->dec_8bit['/'] = PYBASE64_DECODE_BAD_CHAR | 63U;
+        }
+        else {
+            tables->dec_8bit['+'] = 255U;
+            tables->dec_8bit['/'] = 255U;
+        }
+    }
+}
+
 static int _pybase64_exec(PyObject *m)
 {
     static uint8_t const ignoreCharsValidateFalse[] = {
@@ -1547,17 +4751,43 @@ static int _pybase64_exec(PyObject *m)
         224, 225, 226, 227, 228, 229, 230, 231, 232, 233, 234, 235, 236, 237, 238, 239,
         240, 241, 242, 243, 244, 245, 246, 247, 248, 249, 250, 251, 252, 253, 254, 255,
     };
+    int i;
     pybase64_state *state = (pybase64_state*)PyModule_GetState(m);
     if (state == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
         return -1; /* GCOVR_EXCL_LINE */
     }
 
+    pybase64_init_decode_tables(state);
+
+    for (i = 0; i < PYBASE64_KW_COUNT; ++i) {
+        state->keywords[i] = PyUnicode_InternFromString(pybase64_keyword_names[i]);
+        if (state->keywords[i] == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+            return -1; /* GCOVR_EXCL_LINE */
+        }
+    }
+
     assert(sizeof(ignoreCharsValidateFalse) == (256 - 64));
     state->ignoreCharsValidateFalse = PyBytes_FromStringAndSize((const char*)ignoreCharsValidateFalse, sizeof(ignoreCharsValidateFalse));
     if (state->ignoreCharsValidateFalse == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
         return -1; /* GCOVR_EXCL_LINE */
     }
 
+    /* '-' & '_' are part of the url-safe alphabet */
+    state->ignoreCharsValidateFalseUrlSafe = PyBytes_FromStringAndSize(NULL, sizeof(ignoreCharsValidateFalse) - 2);
+    if (state->ignoreCharsValidateFalseUrlSafe == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return -1; /* GCOVR_EXCL_LINE */
+    }
+    {
+        char* dst = PyBytes_AS_STRING(state->ignoreCharsValidateFalseUrlSafe);
+        size_t i;
+
+        for (i = 0U; i < sizeof(ignoreCharsValidateFalse); ++i) {
+            if ((ignoreCharsValidateFalse[i] != '-') && (ignoreCharsValidateFalse[i] != '_')) {
+                *dst++ = (char)ignoreCharsValidateFalse[i];
+            }
+        }
+    }
+
     state->ignoreCharsNoPadding = PyBytes_FromStringAndSize("", 0);
     if (state->ignoreCharsNoPadding == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
         return -1; /* GCOVR_EXCL_LINE */
@@ -1574,6 +4804,41 @@ static int _pybase64_exec(PyObject *m)
         return -1; /* GCOVR_EXCL_LINE */
     }
 
+    state->arrayType = pybase64_import("array", "array");
+    if (state->arrayType == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return -1; /* GCOVR_EXCL_LINE */
+    }
+
+    state->encoderType = PyType_FromModuleAndSpec(m, &pybase64_encoder_spec, NULL);
+    if (state->encoderType == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return -1; /* GCOVR_EXCL_LINE */
+    }
+    Py_INCREF(state->encoderType); /* PyModule_AddObject steals a reference */
+    if (PyModule_AddObject(m, "Encoder", state->encoderType) != 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        Py_DECREF(state->encoderType); /* GCOVR_EXCL_LINE */
+        return -1; /* GCOVR_EXCL_LINE */
+    }
+
+    state->decoderType = PyType_FromModuleAndSpec(m, &pybase64_decoder_spec, NULL);
+    if (state->decoderType == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return -1; /* GCOVR_EXCL_LINE */
+    }
+    Py_INCREF(state->decoderType); /* PyModule_AddObject steals a reference */
+    if (PyModule_AddObject(m, "Decoder", state->decoderType) != 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        Py_DECREF(state->decoderType); /* GCOVR_EXCL_LINE */
+        return -1; /* GCOVR_EXCL_LINE */
+    }
+
+    state->codecType = PyType_FromModuleAndSpec(m, &pybase64_codec_spec, NULL);
+    if (state->codecType == NULL) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        return -1; /* GCOVR_EXCL_LINE */
+    }
+    Py_INCREF(state->codecType); /* PyModule_AddObject steals a reference */
+    if (PyModule_AddObject(m, "Codec", state->codecType) != 0) { /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
+        Py_DECREF(state->codecType); /* GCOVR_EXCL_LINE */
+        return -1; /* GCOVR_EXCL_LINE */
+    }
+
     state->simd_flags = pybase64_get_simd_flags();
     set_simd_path(state, state->simd_flags);
 
@@ -1582,22 +4847,40 @@ static int _pybase64_exec(PyObject *m)
 
 static int _pybase64_traverse(PyObject *m, visitproc visit, void *arg)
 {
+    int i;
     pybase64_state *state = (pybase64_state*)PyModule_GetState(m);
     if (state) {  /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
         Py_VISIT(state->binAsciiError);
         Py_VISIT(state->ignoreCharsValidateFalse);
+        Py_VISIT(state->ignoreCharsValidateFalseUrlSafe);
         Py_VISIT(state->ignoreCharsNoPadding);
+        Py_VISIT(state->encoderType);
+        Py_VISIT(state->decoderType);
+        Py_VISIT(state->codecType);
+        Py_VISIT(state->arrayType);
+        for (i = 0; i < PYBASE64_KW_COUNT; ++i) {
+            Py_VISIT(state->keywords[i]);
+        }
     }
     return 0;
 }
 
 static int _pybase64_clear(PyObject *m)
 {
+    int i;
     pybase64_state *state = (pybase64_state*)PyModule_GetState(m);
     if (state) {  /* GCOVR_EXCL_BR_WITHOUT_HIT: 1/2 */
         Py_CLEAR(state->binAsciiError);
         Py_CLEAR(state->ignoreCharsValidateFalse);
+        Py_CLEAR(state->ignoreCharsValidateFalseUrlSafe);
         Py_CLEAR(state->ignoreCharsNoPadding);
+        Py_CLEAR(state->encoderType);
+        Py_CLEAR(state->decoderType);
+        Py_CLEAR(state->codecType);
+        Py_CLEAR(state->arrayType);
+        for (i = 0; i < PYBASE64_KW_COUNT; ++i) {
+            Py_CLEAR(state->keywords[i]);
+        }
     }
     return 0;
 }
@@ -1608,16 +4891,29 @@ static void _pybase64_free(void *m)
 }
 
 static PyMethodDef _pybase64_methods[] = {
-    { "b64encode", (PyCFunction)pybase64_encode, METH_VARARGS | METH_KEYWORDS, NULL },
-    { "b64encode_as_string", (PyCFunction)pybase64_encode_as_string, METH_VARARGS | METH_KEYWORDS, NULL },
-    { "b64decode", (PyCFunction)pybase64_decode, METH_VARARGS | METH_KEYWORDS, NULL },
-    { "b64decode_as_bytearray", (PyCFunction)pybase64_decode_as_bytearray, METH_VARARGS | METH_KEYWORDS, NULL },
+    { "b64encode", (PyCFunction)pybase64_encode, METH_FASTCALL | METH_KEYWORDS, NULL },
+    { "b64encode_as_string", (PyCFunction)pybase64_encode_as_string, METH_FASTCALL | METH_KEYWORDS, NULL },
+    { "b64decode", (PyCFunction)pybase64_decode, METH_FASTCALL | METH_KEYWORDS, NULL },
+    { "b64decode_as_bytearray", (PyCFunction)pybase64_decode_as_bytearray, METH_FASTCALL | METH_KEYWORDS, NULL },
+    { "b64encode_into", (PyCFunction)pybase64_encode_into, METH_FASTCALL | METH_KEYWORDS, NULL },
+    { "b64decode_into", (PyCFunction)pybase64_decode_into, METH_FASTCALL | METH_KEYWORDS, NULL },
+    { "b64encoded_length", (PyCFunction)pybase64_encoded_length, METH_FASTCALL | METH_KEYWORDS, NULL },
+    { "b64decoded_length", (PyCFunction)pybase64_decoded_length, METH_FASTCALL | METH_KEYWORDS, NULL },
+    { "b64validate", (PyCFunction)pybase64_validate, METH_FASTCALL | METH_KEYWORDS, NULL },
+    { "b64encode_many", (PyCFunction)pybase64_encode_many, METH_FASTCALL | METH_KEYWORDS, NULL },
+    { "b64decode_many", (PyCFunction)pybase64_decode_many, METH_FASTCALL | METH_KEYWORDS, NULL },
+    { "b64encode_packed", (PyCFunction)pybase64_encode_packed, METH_FASTCALL | METH_KEYWORDS, NULL },
+    { "b64decode_packed", (PyCFunction)pybase64_decode_packed, METH_FASTCALL | METH_KEYWORDS, NULL },
     { "encodebytes", (PyCFunction)pybase64_encodebytes, METH_O, NULL },
     { "_get_simd_path", (PyCFunction)pybase64_get_simd_path, METH_NOARGS, NULL },
     { "_set_simd_path", (PyCFunction)pybase64_set_simd_path, METH_O, NULL },
     { "_get_simd_flags_compile", (PyCFunction)pybase64_get_simd_flags_compile, METH_NOARGS, NULL },
     { "_get_simd_flags_runtime", (PyCFunction)pybase64_get_simd_flags_runtime, METH_NOARGS, NULL },
     { "_get_simd_name", (PyCFunction)pybase64_get_simd_name, METH_O, NULL },
+    { "_explain", (PyCFunction)pybase64_explain_call, METH_FASTCALL | METH_KEYWORDS, NULL },
+    { "_get_stats", (PyCFunction)pybase64_get_stats, METH_NOARGS, NULL },
+    { "_reset_stats", (PyCFunction)pybase64_reset_stats, METH_NOARGS, NULL },
+    { "_set_stats_enabled", (PyCFunction)pybase64_set_stats_enabled, METH_O, NULL },
     { NULL, NULL, 0, NULL }  /* Sentinel */
 };
 
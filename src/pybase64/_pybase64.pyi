@@ -1,13 +1,57 @@
+from array import array
+from collections.abc import Iterable
 from typing import Literal
 
-from pybase64._typing import Buffer
+from pybase64._typing import Buffer, Explanation
 from pybase64._unspecified import _Unspecified
 
+class Encoder:
+    def __init__(
+        self,
+        altchars: str | Buffer | None = None,
+        *,
+        padded: bool = True,
+        wrapcol: int = 0,
+    ) -> None: ...
+    def update(self, s: Buffer) -> bytes: ...
+    def finalize(self) -> bytes: ...
+
+class Decoder:
+    def __init__(
+        self,
+        altchars: str | Buffer | None = None,
+        validate: bool | Literal[_Unspecified.UNSPECIFIED] = ...,
+        *,
+        padded: bool = True,
+        ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = ...,
+        canonical: bool = False,
+    ) -> None: ...
+    def update(self, s: str | Buffer) -> bytes: ...
+    def finalize(self) -> bytes: ...
+
+class Codec:
+    def __init__(
+        self,
+        altchars: str | Buffer | None = None,
+        validate: bool | Literal[_Unspecified.UNSPECIFIED] = ...,
+        *,
+        padded: bool = True,
+        ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = ...,
+        canonical: bool = False,
+        wrapcol: int = 0,
+    ) -> None: ...
+    def encode(self, s: Buffer) -> bytes: ...
+    def decode(self, s: str | Buffer) -> bytes: ...
+
+def _explain(name: str, /, *args: object, **kwargs: object) -> Explanation: ...
 def _get_simd_flags_compile() -> int: ...
 def _get_simd_flags_runtime() -> int: ...
 def _get_simd_name(flags: int) -> str: ...
 def _get_simd_path() -> int: ...
 def _set_simd_path(flags: int) -> None: ...
+def _get_stats() -> dict[str, dict[str, dict[str, int]]]: ...
+def _reset_stats() -> None: ...
+def _set_stats_enabled(enabled: bool) -> bool: ...
 def b64decode(
     s: str | Buffer,
     altchars: str | Buffer | None = None,
@@ -16,6 +60,7 @@ def b64decode(
     padded: bool = True,
     ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = ...,
     canonical: bool = False,
+    threads: int = 1,
 ) -> bytes: ...
 def b64decode_as_bytearray(
     s: str | Buffer,
@@ -25,13 +70,53 @@ def b64decode_as_bytearray(
     padded: bool = True,
     ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = ...,
     canonical: bool = False,
+    threads: int = 1,
 ) -> bytearray: ...
+def b64decode_into(
+    s: str | Buffer,
+    out: Buffer,
+    altchars: str | Buffer | None = None,
+    validate: bool | Literal[_Unspecified.UNSPECIFIED] = ...,
+    *,
+    padded: bool = True,
+    ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = ...,
+    canonical: bool = False,
+    offset: int = 0,
+) -> int: ...
+def b64decode_many(
+    items: Iterable[str | Buffer],
+    altchars: str | Buffer | None = None,
+    validate: bool | Literal[_Unspecified.UNSPECIFIED] = ...,
+    *,
+    padded: bool = True,
+    ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = ...,
+    canonical: bool = False,
+) -> list[bytes]: ...
+def b64decode_packed(
+    items: Iterable[str | Buffer],
+    altchars: str | Buffer | None = None,
+    validate: bool | Literal[_Unspecified.UNSPECIFIED] = ...,
+    *,
+    padded: bool = True,
+    ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = ...,
+    canonical: bool = False,
+) -> tuple[bytearray, array[int]]: ...
+def b64decoded_length(
+    s: str | Buffer,
+    altchars: str | Buffer | None = None,
+    validate: bool | Literal[_Unspecified.UNSPECIFIED] = ...,
+    *,
+    padded: bool = True,
+    ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = ...,
+    canonical: bool = False,
+) -> int: ...
 def b64encode(
     s: Buffer,
     altchars: str | Buffer | None = None,
     *,
     padded: bool = True,
     wrapcol: int = 0,
+    threads: int = 1,
 ) -> bytes: ...
 def b64encode_as_string(
     s: Buffer,
@@ -39,5 +124,40 @@ def b64encode_as_string(
     *,
     padded: bool = True,
     wrapcol: int = 0,
+    threads: int = 1,
 ) -> str: ...
+def b64encode_into(
+    s: Buffer,
+    out: Buffer,
+    altchars: str | Buffer | None = None,
+    *,
+    padded: bool = True,
+    wrapcol: int = 0,
+    offset: int = 0,
+) -> int: ...
+def b64encode_many(
+    items: Iterable[Buffer],
+    altchars: str | Buffer | None = None,
+    *,
+    padded: bool = True,
+    wrapcol: int = 0,
+) -> list[bytes]: ...
+def b64encode_packed(
+    data: Buffer,
+    offsets: Buffer,
+    altchars: str | Buffer | None = None,
+    *,
+    padded: bool = True,
+    wrapcol: int = 0,
+) -> tuple[bytearray, array[int]]: ...
+def b64encoded_length(n: int, *, padded: bool = True, wrapcol: int = 0) -> int: ...
+def b64validate(
+    s: str | Buffer,
+    altchars: str | Buffer | None = None,
+    validate: bool | Literal[_Unspecified.UNSPECIFIED] = ...,
+    *,
+    padded: bool = True,
+    ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = ...,
+    canonical: bool = False,
+) -> bool: ...
 def encodebytes(s: Buffer) -> bytes: ...
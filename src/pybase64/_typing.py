@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import sys
-from typing import Literal, Protocol
+from typing import Literal, Protocol, TypedDict
 
 if sys.version_info < (3, 12):
     from typing_extensions import Buffer
@@ -27,6 +27,13 @@ class Decode(Protocol):
     ) -> bytes: ...
 
 
+class DecodeOptions(TypedDict, total=False):
+    validate: bool
+    padded: bool
+    ignorechars: Buffer
+    canonical: bool
+
+
 class Encode(Protocol):
     __name__: str
     __module__: str
@@ -41,4 +48,15 @@ class Encode(Protocol):
     ) -> bytes: ...
 
 
-__all__ = ("Buffer", "Decode", "Encode")
+class Explanation(TypedDict, total=False):
+    simd: str
+    path: str
+    translate: bool
+    release_gil: bool
+    threads: int
+    output_size: int
+    copies: dict[str, int]
+    extra_memory: int
+
+
+__all__ = ("Buffer", "Decode", "DecodeOptions", "Encode", "Explanation")
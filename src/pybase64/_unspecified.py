@@ -1,8 +1,32 @@
+from __future__ import annotations
+
 from enum import Enum
 
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Literal
+
+    from pybase64._typing import Buffer, DecodeOptions
+
 
 class _Unspecified(Enum):
     """For internal use only, external usage is undefined behavior."""
 
     UNSPECIFIED = 0
     """For internal use only, external usage is undefined behavior."""
+
+
+def _decode_options(
+    *,
+    validate: bool | Literal[_Unspecified.UNSPECIFIED],
+    padded: bool,
+    ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED],
+    canonical: bool,
+) -> DecodeOptions:
+    # keyword arguments of the decoding functions, unspecified options are left out
+    options: DecodeOptions = {"padded": padded, "canonical": canonical}
+    if validate is not _Unspecified.UNSPECIFIED:
+        options["validate"] = validate
+    if ignorechars is not _Unspecified.UNSPECIFIED:
+        options["ignorechars"] = ignorechars
+    return options
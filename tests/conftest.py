@@ -2,8 +2,14 @@ from __future__ import annotations
 
 import pytest
 
+import pybase64
+
 from . import utils
 
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
 simd = utils.simd
 
 
@@ -21,3 +27,14 @@ def _autoskip_pypi_distribution(request: pytest.FixtureRequest) -> None:
     running = request.config.getoption("--pypi-distribution", default=False)
     if marker is not None and not running:
         pytest.skip("needs '--pypi-distribution' to run")
+
+
+@pytest.fixture
+def stats(request: pytest.FixtureRequest) -> Iterator[None]:
+    if request.config.getoption("--parallel-threads", default=1) != 1:
+        pytest.skip("'--parallel-threads' != 1")  # pragma: no cover
+    enabled = pybase64.enable_stats()
+    pybase64.reset_stats()
+    yield
+    pybase64.enable_stats(enabled)
+    pybase64.reset_stats()
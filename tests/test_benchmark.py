@@ -1,11 +1,167 @@
+from __future__ import annotations
+
+import functools
+from array import array
+
 import pytest
 
 import pybase64
+from pybase64 import _fallback
 
 from . import utils
 
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+    from types import ModuleType
+
+    from pybase64 import Decoder, Encoder
+
+    # a call bound to its arguments, prepared before timing
+    Call = Callable[[], object]
+
 pytestmark = pytest.mark.benchmark
 
+# same grid as "python -m pybase64 benchmark --sizes"
+SWEEP_SIZES = (1, 16, 64, 256, 4 * 1024, 64 * 1024, 1024 * 1024, 64 * 1024 * 1024)
+ITEM_SIZE = 48  # size of the items of the batch APIs
+LARGE_SIZE = SWEEP_SIZES[-1]
+FALLBACK_SIZES = (16, 4 * 1024, 1024 * 1024)
+
+
+def _size_id(size: int) -> str:
+    for unit, factor in (("MiB", 1024 * 1024), ("KiB", 1024)):
+        if size >= factor:
+            return f"{size // factor:d}{unit:s}"
+    return f"{size:d}B"
+
+
+def _split(data: bytes) -> list[bytes]:
+    return [data[i : i + ITEM_SIZE] for i in range(0, len(data), ITEM_SIZE)] or [b""]
+
+
+def _stream(new_coder: Callable[[], Encoder | Decoder], s: bytes) -> bytes:
+    coder = new_coder()
+    return coder.update(s) + coder.finalize()
+
+
+def _call(name: str, **kwargs: object) -> Callable[[ModuleType, bytes], Call]:
+    def prepare(module: ModuleType, data: bytes) -> Call:
+        return functools.partial(getattr(module, name), data, **kwargs)
+
+    return prepare
+
+
+def _decode_call(
+    name: str,
+    encode: Callable[[bytes], bytes] = pybase64.b64encode,
+    **kwargs: object,
+) -> Callable[[ModuleType, bytes], Call]:
+    def prepare(module: ModuleType, data: bytes) -> Call:
+        return functools.partial(getattr(module, name), encode(data), **kwargs)
+
+    return prepare
+
+
+_encode_lines = functools.partial(pybase64.b64encode, wrapcol=76)
+
+
+def _encode_into(module: ModuleType, data: bytes) -> Call:
+    out = bytearray(pybase64.b64encoded_length(len(data)))
+    return functools.partial(module.b64encode_into, data, out)
+
+
+def _decode_into(module: ModuleType, data: bytes) -> Call:
+    # an exact size buffer, decoded into in place
+    out = bytearray(len(data))
+    return functools.partial(module.b64decode_into, pybase64.b64encode(data), out, validate=True)
+
+
+def _encode_many(module: ModuleType, data: bytes) -> Call:
+    return functools.partial(module.b64encode_many, _split(data))
+
+
+def _decode_many(module: ModuleType, data: bytes) -> Call:
+    items = pybase64.b64encode_many(_split(data))
+    return functools.partial(module.b64decode_many, items, validate=True)
+
+
+def _encode_packed(module: ModuleType, data: bytes) -> Call:
+    offsets = array("q", [*range(0, len(data), ITEM_SIZE), len(data)])
+    return functools.partial(module.b64encode_packed, data, offsets)
+
+
+def _decode_packed(module: ModuleType, data: bytes) -> Call:
+    items = pybase64.b64encode_many(_split(data))
+    return functools.partial(module.b64decode_packed, items, validate=True)
+
+
+def _encoder(module: ModuleType, data: bytes) -> Call:
+    return functools.partial(_stream, module.Encoder, data)
+
+
+def _decoder(module: ModuleType, data: bytes) -> Call:
+    new_decoder = functools.partial(module.Decoder, validate=True)
+    return functools.partial(_stream, new_decoder, pybase64.b64encode(data))
+
+
+def _codec_encode(module: ModuleType, data: bytes) -> Call:
+    return functools.partial(module.Codec(b"-_").encode, data)
+
+
+def _codec_decode(module: ModuleType, data: bytes) -> Call:
+    encoded = pybase64.b64encode(data, b"-_")
+    return functools.partial(module.Codec(b"-_", validate=True).decode, encoded)
+
+
+def _encoded_length(module: ModuleType, data: bytes) -> Call:
+    return functools.partial(module.b64encoded_length, len(data), wrapcol=76)
+
+
+# API x option set, ids are tracked over time, do not rename them
+API_CALLS: dict[str, Callable[[ModuleType, bytes], Call]] = {
+    "b64encode": _call("b64encode"),
+    "b64encode-altchars": _call("b64encode", altchars=b"-_"),
+    "b64encode-unpadded": _call("b64encode", padded=False),
+    "b64encode-wrapcol": _call("b64encode", wrapcol=76),
+    "b64encode_as_string": _call("b64encode_as_string"),
+    "b64encode_into": _encode_into,
+    "b64encode_many": _encode_many,
+    "b64encode_packed": _encode_packed,
+    "b64encoded_length": _encoded_length,
+    "encodebytes": _call("encodebytes"),
+    "standard_b64encode": _call("standard_b64encode"),
+    "urlsafe_b64encode": _call("urlsafe_b64encode"),
+    "Encoder": _encoder,
+    "Codec-encode": _codec_encode,
+    "b64decode-validate": _decode_call("b64decode", validate=True),
+    "b64decode-novalidate": _decode_call("b64decode", _encode_lines, validate=False),
+    "b64decode-altchars": _decode_call(
+        "b64decode",
+        pybase64.urlsafe_b64encode,
+        altchars=b"-_",
+        validate=True,
+    ),
+    "b64decode-unpadded": _decode_call(
+        "b64decode",
+        functools.partial(pybase64.b64encode, padded=False),
+        validate=True,
+        padded=False,
+    ),
+    "b64decode-ignorechars": _decode_call("b64decode", _encode_lines, ignorechars=b"\n"),
+    "b64decode-canonical": _decode_call("b64decode", validate=True, canonical=True),
+    "b64decode_as_bytearray": _decode_call("b64decode_as_bytearray", validate=True),
+    "b64decode_into": _decode_into,
+    "b64decode_many": _decode_many,
+    "b64decode_packed": _decode_packed,
+    "b64decoded_length": _decode_call("b64decoded_length", validate=True),
+    "b64validate": _decode_call("b64validate", validate=True),
+    "standard_b64decode": _decode_call("standard_b64decode"),
+    "urlsafe_b64decode": _decode_call("urlsafe_b64decode", pybase64.urlsafe_b64encode),
+    "Decoder": _decoder,
+    "Codec-decode": _codec_decode,
+}
+
 
 @pytest.fixture(scope="module")
 def encode_data_full(request: pytest.FixtureRequest) -> bytes:
@@ -42,3 +198,82 @@ def test_encoding(simd: int, encode_data: bytearray) -> None:
 def test_decoding(simd: int, decode_data: bytearray) -> None:
     utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
     pybase64.b64decode(decode_data, validate=True)
+
+
+@pytest.fixture(scope="module", params=(16, 48))
+def small_encode_data(request: pytest.FixtureRequest) -> bytes:
+    if not request.config.getoption("--codspeed", default=False):
+        pytest.skip("needs '--codspeed' to run")
+    return bytes(i % 256 for i in range(request.param))
+
+
+@pytest.fixture(scope="module")
+def small_decode_data(small_encode_data: bytes) -> bytes:
+    return pybase64.b64encode(small_encode_data)
+
+
+@utils.param_simd
+def test_encoding_small(simd: int, small_encode_data: bytes) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    for _ in range(1000):
+        pybase64.b64encode(small_encode_data)
+
+
+@utils.param_simd
+@pytest.mark.parametrize("validate", [False, True], ids=["novalidate", "validate"])
+def test_decoding_small(simd: int, validate: bool, small_decode_data: bytes) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    for _ in range(1000):
+        pybase64.b64decode(small_decode_data, validate=validate)
+
+
+# the largest size & the fallback module are only timed on a representative subset of the APIs
+REPRESENTATIVE_APIS = (
+    "b64encode",
+    "b64encode-wrapcol",
+    "b64decode-validate",
+    "b64decode-novalidate",
+    "b64decode-altchars",
+)
+
+
+def _param_api_sizes(apis: Iterable[str], sizes: Iterable[int]) -> pytest.MarkDecorator:
+    cases = [
+        pytest.param(api, size, id=f"{api:s}-{_size_id(size):s}")
+        for api in apis
+        for size in sizes
+        if size != LARGE_SIZE or api in REPRESENTATIVE_APIS
+    ]
+    return pytest.mark.parametrize(("api", "sweep_data"), cases, indirect=True, scope="module")
+
+
+@pytest.fixture(scope="module")
+def sweep_data(request: pytest.FixtureRequest, encode_data_full: bytes) -> bytes:
+    return encode_data_full[: request.param]
+
+
+@pytest.fixture(scope="module")
+def api(request: pytest.FixtureRequest) -> str:
+    return str(request.param)
+
+
+@pytest.fixture(scope="module")
+def api_call(api: str, sweep_data: bytes) -> Call:
+    return API_CALLS[api](pybase64, sweep_data)
+
+
+@pytest.fixture(scope="module")
+def fallback_call(api: str, sweep_data: bytes) -> Call:
+    return API_CALLS[api](_fallback, sweep_data)
+
+
+@utils.param_simd
+@_param_api_sizes(API_CALLS, SWEEP_SIZES)
+def test_api(simd: int, api_call: Call) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    api_call()
+
+
+@_param_api_sizes(REPRESENTATIVE_APIS, FALLBACK_SIZES)
+def test_api_fallback(fallback_call: Call) -> None:
+    fallback_call()
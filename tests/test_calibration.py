@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+import pybase64
+from pybase64 import _calibration
+
+from . import utils
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+@pytest.fixture
+def cache_dir(
+    request: pytest.FixtureRequest,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> Iterator[Path]:
+    if request.config.getoption("--parallel-threads", default=1) != 1:
+        pytest.skip("'--parallel-threads' != 1")  # pragma: no cover
+    for name in ("PYBASE64_SIMD", "PYBASE64_CALIBRATE"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("PYBASE64_CACHE_DIR", str(tmp_path))
+    simd_path = pybase64._get_simd_path()  # type: ignore[attr-defined]
+    yield tmp_path
+    if utils.has_extension:
+        pybase64._set_simd_path(simd_path)  # type: ignore[attr-defined]
+
+
+def _set_plain() -> None:
+    if utils.has_extension:
+        pybase64._set_simd_path(0)  # type: ignore[attr-defined]
+
+
+@pytest.mark.parametrize("save", [True, False])
+def test_calibrate(cache_dir: Path, save: bool) -> None:
+    name = pybase64.calibrate(rounds=1, save=save)
+    cache_file = cache_dir / "simd-calibration.txt"
+    if not utils.has_extension:
+        assert name == "fallback"
+        assert not cache_file.exists()
+        return
+    assert pybase64.get_version().endswith(f" {name})")
+    if not save:
+        assert not cache_file.exists()
+        return
+    lines = cache_file.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    assert lines[0].endswith(f"\t{name}")
+    # loaded from the cache
+    active_simd_path = pybase64._get_simd_path()  # type: ignore[attr-defined]
+    _set_plain()
+    _calibration.select_simd_path()
+    assert pybase64._get_simd_path() == active_simd_path  # type: ignore[attr-defined]
+
+
+def test_calibrate_invalid() -> None:
+    with pytest.raises(ValueError, match="rounds"):
+        pybase64.calibrate(rounds=0)
+
+
+def test_calibrate_cache_entries(cache_dir: Path) -> None:
+    cache_file = cache_dir / "simd-calibration.txt"
+    cache_file.write_text("other cpu\tSSE41\ninvalid line\n", encoding="utf-8")
+    name = pybase64.calibrate(rounds=1)
+    if utils.has_extension:
+        lines = cache_file.read_text(encoding="utf-8").splitlines()
+        assert lines[0] == "other cpu\tSSE41"
+        assert lines[1].endswith(f"\t{name}")
+        assert len(lines) == 2
+
+
+@pytest.mark.skipif(not utils.has_extension, reason="requires the C extension")
+def test_select_override(cache_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    utils.unused_args(cache_dir)
+    pybase64.calibrate(rounds=1)
+    calibrated_simd_path = pybase64._get_simd_path()  # type: ignore[attr-defined]
+    monkeypatch.setenv("PYBASE64_SIMD", "PLAIN")
+    _calibration.select_simd_path()
+    assert pybase64._get_simd_path() == 0  # type: ignore[attr-defined]
+    for name, flag in _calibration.get_simd_paths().items():
+        monkeypatch.setenv("PYBASE64_SIMD", name)
+        _calibration.select_simd_path()
+        assert pybase64._get_simd_path() == flag  # type: ignore[attr-defined]
+    monkeypatch.setenv("PYBASE64_SIMD", "auto")
+    _set_plain()
+    _calibration.select_simd_path()  # cached calibration
+    assert pybase64._get_simd_path() == calibrated_simd_path  # type: ignore[attr-defined]
+
+
+@pytest.mark.skipif(not utils.has_extension, reason="requires the C extension")
+def test_select_override_invalid(cache_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    utils.unused_args(cache_dir)
+    _set_plain()
+    monkeypatch.setenv("PYBASE64_SIMD", "foo")
+    with pytest.warns(RuntimeWarning, match="PYBASE64_SIMD='foo' is not available"):
+        _calibration.select_simd_path()
+    assert pybase64._get_simd_path() == 0  # type: ignore[attr-defined]
+
+
+@pytest.mark.skipif(not utils.has_extension, reason="requires the C extension")
+@pytest.mark.parametrize("calibrate", ["0", "1"])
+def test_select_calibrate(cache_dir: Path, monkeypatch: pytest.MonkeyPatch, calibrate: str) -> None:
+    monkeypatch.setenv("PYBASE64_CALIBRATE", calibrate)
+    _set_plain()
+    _calibration.select_simd_path()
+    cache_file = cache_dir / "simd-calibration.txt"
+    assert cache_file.exists() == (calibrate == "1")
+    if calibrate == "0":
+        assert pybase64._get_simd_path() == 0  # type: ignore[attr-defined]
+
+
+@pytest.mark.parametrize("calibrate", ["0", "1"])
+def test_select_cache_unwritable(
+    cache_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    calibrate: str,
+) -> None:
+    # a file where the cache directory is expected, the cache can't be written
+    not_a_dir = cache_dir / "file"
+    not_a_dir.write_bytes(b"")
+    monkeypatch.setenv("PYBASE64_CACHE_DIR", str(not_a_dir / "cache"))
+    monkeypatch.setenv("PYBASE64_CALIBRATE", calibrate)
+    _calibration.select_simd_path()
+    name = pybase64.calibrate(rounds=1)
+    assert pybase64.get_version().endswith(f" {name})") == utils.has_extension
+    assert list(cache_dir.iterdir()) == [not_a_dir]
+
+
+def test_cache_path(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("PYBASE64_CACHE_DIR", str(tmp_path))
+    assert _calibration.get_cache_path() == str(tmp_path / "simd-calibration.txt")
+    monkeypatch.delenv("PYBASE64_CACHE_DIR")
+    env = "LOCALAPPDATA" if sys.platform == "win32" else "XDG_CACHE_HOME"
+    monkeypatch.setenv(env, str(tmp_path))
+    expected = tmp_path / "pybase64" / "simd-calibration.txt"
+    assert _calibration.get_cache_path() == str(expected)
+
+
+def test_cpu_model_without_cpuinfo(monkeypatch: pytest.MonkeyPatch) -> None:
+    def no_cpuinfo(*args: object, **kwargs: object) -> None:
+        utils.unused_args(args, kwargs)
+        raise OSError
+
+    def no_subprocess(*args: object, **kwargs: object) -> None:  # pragma: no cover
+        utils.unused_args(args, kwargs)
+        raise AssertionError
+
+    monkeypatch.setattr(_calibration, "open", no_cpuinfo, raising=False)
+    monkeypatch.setattr("subprocess.Popen", no_subprocess)
+    if sys.platform == "win32":
+        monkeypatch.setenv("PROCESSOR_IDENTIFIER", "x86 Family 6")
+        assert _calibration.get_cpu_model() == "x86 Family 6"
+    else:
+        assert _calibration.get_cpu_model() == os.uname().machine
+
+
+@pytest.mark.skipif(not utils.has_extension, reason="requires the C extension")
+@pytest.mark.parametrize(("name", "plain"), [("No SIMD", True), ("FOO", False)])
+def test_select_cache_name(cache_dir: Path, name: str, plain: bool) -> None:
+    simd_path = pybase64._get_simd_path()  # type: ignore[attr-defined]
+    cache_file = cache_dir / "simd-calibration.txt"
+    cache_file.write_text(f"{_calibration._get_cache_key()}\t{name}\n", encoding="utf-8")
+    _calibration.select_simd_path()
+    expected = 0 if plain else simd_path
+    assert pybase64._get_simd_path() == expected  # type: ignore[attr-defined]
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import base64
+import re
+from array import array
+
+import pytest
+
+import pybase64
+
+from . import utils
+
+try:
+    from pybase64._pybase64 import _get_simd_name, _get_simd_path
+except ImportError:
+    from pybase64._fallback import _get_simd_name, _get_simd_path
+
+_LARGE = b"x" * (4 * 1024 * 1024)
+_LARGE_ENCODED = base64.b64encode(_LARGE)
+
+CALLS: list[tuple[object, tuple[object, ...], dict[str, object]]] = [
+    (pybase64.b64encode, (b"abc",), {}),
+    (pybase64.b64encode, (b"abc", b"-_"), {}),
+    (pybase64.b64encode, (b"x" * 100,), {"wrapcol": 76}),
+    (pybase64.b64encode, (_LARGE,), {"threads": 4}),
+    (pybase64.b64encode_as_string, (b"abc",), {"padded": False}),
+    (pybase64.b64encode_into, (b"abc", bytearray(4)), {}),
+    (pybase64.encodebytes, (b"x" * 100,), {}),
+    (pybase64.b64decode, (b"YWJj",), {}),
+    (pybase64.b64decode, (b"YWJj",), {"validate": True}),
+    (pybase64.b64decode, (b"YWJj",), {"ignorechars": b""}),
+    (pybase64.b64decode, (b"YWJj",), {"ignorechars": b"\n"}),
+    (pybase64.b64decode, (b"YQ",), {"validate": True, "padded": False}),
+    (pybase64.b64decode, (b"YWJj", b"-_"), {"validate": True}),
+    (pybase64.b64decode, (b"YWJj", b"*/"), {}),
+    (pybase64.b64decode, ("YWJj",), {}),
+    (pybase64.b64decode, (_LARGE_ENCODED,), {"validate": True, "threads": 4}),
+    (pybase64.b64decode_as_bytearray, (b"YWJj",), {"validate": True}),
+    (pybase64.b64decode_into, (b"YWJj", bytearray(3)), {"validate": True}),
+    (pybase64.b64decode_into, (b"YWJj", bytearray(6)), {}),
+    (pybase64.standard_b64encode, (b"abc",), {}),
+    (pybase64.standard_b64decode, (b"YWJj",), {}),
+    (pybase64.urlsafe_b64encode, (b"abc",), {"padded": False}),
+    (pybase64.urlsafe_b64decode, ("YWJj",), {}),
+    (pybase64.b64encode_many, ([b"a", b"bc"],), {"wrapcol": 4}),
+    (pybase64.b64encode_packed, (b"abc", array("q", [0, 1, 3]), b"-_"), {}),
+    (pybase64.b64decode_many, (["YQ==", b"YWJj"],), {"validate": True}),
+    (pybase64.b64decode_packed, ([b"YQ==", b"YWJj"], b"-_"), {}),
+    (pybase64.Codec(b"-_").encode, (b"abc",), {}),
+    (pybase64.Codec(validate=True).decode, (b"YWJj",), {}),
+]
+
+# entries of get_stats() for the calls reported under another name
+_STATS_ENTRY = {
+    "standard_b64encode": "b64encode",
+    "standard_b64decode": "b64decode",
+    "urlsafe_b64encode": "b64encode",
+    "urlsafe_b64decode": "b64decode",
+}
+
+
+def _call_id(call: tuple[object, tuple[object, ...], dict[str, object]]) -> str:
+    func, args, kwargs = call
+    size = len(args[0])  # type: ignore[arg-type]
+    options = ",".join(f"{key}={value!r}" for key, value in kwargs.items())
+    return f"{getattr(func, '__qualname__', '')}-{size}-{len(args)}-{options}"
+
+
+@pytest.mark.parametrize("call", CALLS, ids=_call_id)
+def test_explain_matches_call(
+    stats: None,
+    call: tuple[object, tuple[object, ...], dict[str, object]],
+) -> None:
+    utils.unused_args(stats)
+    func, args, kwargs = call
+    assert callable(func)
+    result = pybase64.explain(func, *args, **kwargs)
+    assert result["simd"] == _get_simd_name(_get_simd_path())
+    if not utils.has_extension:
+        assert result == {"simd": "fallback", "path": "fallback"}
+        return
+    assert pybase64.get_stats() == {}
+    func(*args, **kwargs)
+    name = getattr(func, "__qualname__", "")
+    stats_entry = pybase64.get_stats()[_STATS_ENTRY.get(name, name)]
+    assert list(stats_entry) == [result["path"]]
+    assert result["output_size"] >= stats_entry[result["path"]]["bytes_out"]
+    assert result["extra_memory"] == sum(result["copies"].values())
+
+
+@pytest.mark.skipif(not utils.has_extension, reason="requires the C extension")
+def test_explain_decode() -> None:
+    # ignorechars=b"" & padded=False flip the decoder
+    assert pybase64.explain(pybase64.b64decode, b"YWJj")["path"] == "slow"
+    assert pybase64.explain(pybase64.b64decode, b"YWJj", ignorechars=b"")["path"] == "fast"
+    result = pybase64.explain(pybase64.b64decode, b"YWJj", validate=True, padded=False)
+    assert result["path"] == "slow"
+    assert "compact" in result["copies"]
+    result = pybase64.explain(pybase64.b64decode, b"YWJj", b"-_", validate=True)
+    assert result["path"] == "translate"
+    assert result["translate"]
+    assert "translate" in result["copies"]
+    # url-safe alphabet is translated while blocks are gathered by the slow path
+    result = pybase64.explain(pybase64.b64decode, b"YWJj", b"-_")
+    assert result["path"] == "slow"
+    assert not result["translate"]
+    assert "compact" in result["copies"]
+    # an exact size buffer is decoded into in place
+    result = pybase64.explain(pybase64.b64decode_into, b"YWJj", bytearray(3), validate=True)
+    assert result["copies"] == {}
+    assert result["extra_memory"] == 0
+    result = pybase64.explain(pybase64.b64decode, _LARGE_ENCODED, validate=True, threads=4)
+    assert result["release_gil"]
+    assert result["threads"] == 4
+    # the GIL is released once for all items
+    assert pybase64.explain(pybase64.b64decode_many, [b"YWJj"], validate=True)["release_gil"]
+    # nothing is output when validating
+    result = pybase64.explain(pybase64.b64validate, b"YWJj", validate=True)
+    assert result["path"] == "fast"
+    assert result["output_size"] == 0
+    assert pybase64.explain(pybase64.b64decoded_length, b"YW\nJj")["path"] == "slow"
+
+
+@pytest.mark.skipif(not utils.has_extension, reason="requires the C extension")
+def test_explain_encode() -> None:
+    result = pybase64.explain(pybase64.b64encode, b"abc", b"-_")
+    assert result["path"] == "translate"
+    assert result["output_size"] == 4
+    assert not result["release_gil"]
+    assert result["copies"] == {}
+    # a single line is not wrapped
+    assert pybase64.explain(pybase64.encodebytes, b"abc")["path"] == "fast"
+    assert pybase64.explain(pybase64.encodebytes, b"x" * 100)["path"] == "wrapcol"
+    result = pybase64.explain(pybase64.b64encode_packed, b"abc", array("q", [0, 1, 3]))
+    assert result["output_size"] == 8
+    assert result["release_gil"]
+
+
+def test_explain_alias() -> None:
+    expected = pybase64.explain(pybase64.b64decode, "YWJj", b"-_", padded=False)
+    assert pybase64.explain(pybase64.urlsafe_b64decode, "YWJj") == expected
+    expected = pybase64.explain(pybase64.b64encode, b"abc", b"-_", padded=False)
+    assert pybase64.explain(pybase64.urlsafe_b64encode, b"abc", padded=False) == expected
+    with pytest.raises(TypeError):
+        pybase64.explain(pybase64.standard_b64decode, b"YWJj", b"-_")
+
+
+@pytest.mark.parametrize(
+    ("func", "args", "kwargs"),
+    [
+        (pybase64.b64encode_into, (b"abc", bytearray(3)), {}),
+        (pybase64.b64encode, (b"abc",), {"wrapcol": -1}),
+        (pybase64.b64decode, (b"YWJj",), {"validate": False, "ignorechars": b""}),
+        (pybase64.b64decode, ("€",), {}),
+        (pybase64.b64decode, (b"YWJj",), {"foo": True}),
+        (pybase64.encodebytes, ("abc",), {}),
+        (pybase64.b64encode_many, ([b"abc", 1],), {}),
+        (pybase64.b64encode_packed, (b"abc", array("q", [0, 4])), {}),
+        (pybase64.b64decode_packed, (["YQ==", "€"],), {}),
+        (pybase64.b64validate, (b"YWJj", b"-"), {}),
+        (pybase64.Codec().encode, (), {}),
+        (pybase64.Codec().decode, (b"YWJj",), {"s": b"YWJj"}),
+    ],
+)
+def test_explain_invalid_args(
+    func: object,
+    args: tuple[object, ...],
+    kwargs: dict[str, object],
+) -> None:
+    assert callable(func)
+    with pytest.raises((BufferError, TypeError, ValueError)) as exc_info:
+        func(*args, **kwargs)
+    # the fallback raises the same exceptions with its own messages
+    match = re.escape(str(exc_info.value)) if utils.has_extension else None
+    with pytest.raises(exc_info.type, match=match):
+        pybase64.explain(func, *args, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "func",
+    [base64.b64decode, pybase64.b64encoded_length, pybase64.Encoder().update, print],
+)
+def test_explain_unsupported(func: object) -> None:
+    with pytest.raises(ValueError, match="not"):
+        pybase64.explain(func, b"YWJj")
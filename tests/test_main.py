@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import csv
+import io
+import json
 import re
 import sys
 from pathlib import Path
@@ -87,6 +90,169 @@ def test_benchmark(capsys: pytest.CaptureFixture[str], emptyfile: str) -> None:
     assert captured.out != ""
 
 
+def test_benchmark_json(capsys: pytest.CaptureFixture[str], hellofile: str) -> None:
+    main(["benchmark", "-d", "0.005", "--format", "json", hellofile])
+    captured = capsys.readouterr()
+    assert captured.err == ""
+    report = json.loads(captured.out)
+    assert report["version"] == pybase64.get_version()
+    assert isinstance(report["cpu"], str)
+    assert isinstance(report["simd_flags_runtime"], int)
+    assert len(report["results"]) > 0
+    for result in report["results"]:
+        assert result["module"] in {"pybase64", "base64"}
+        assert result["size"] == 16
+        assert result["iterations"] > 0
+        assert result["elapsed"] > 0.0
+        assert result["gbps"] > 0.0
+        if result["function"].startswith("b64decode"):
+            assert result["bytes_out"] == 16
+        else:
+            assert result["bytes_in"] == 16
+
+
+def test_benchmark_csv(capsys: pytest.CaptureFixture[str], hellofile: str) -> None:
+    main(["benchmark", "-d", "0.005", "-f", "csv", hellofile])
+    captured = capsys.readouterr()
+    assert captured.err == ""
+    rows = list(csv.DictReader(io.StringIO(captured.out)))
+    assert len(rows) > 0
+    functions = {(row["module"], row["function"]) for row in rows}
+    assert ("pybase64", "b64decode") in functions
+    assert ("base64", "b64encode") in functions
+    for row in rows:
+        assert row["version"] == pybase64.get_version()
+        assert int(row["iterations"]) > 0
+        assert float(row["gbps"]) > 0.0
+
+
+@pytest.mark.parametrize("with_input", [False, True], ids=["synthesized", "sliced"])
+def test_benchmark_sizes(
+    capsys: pytest.CaptureFixture[str],
+    hellofile: str,
+    with_input: bool,
+) -> None:
+    args = ["benchmark", "-d", "0.001", "--format", "json", "--sizes", "1,40,1K,1"]
+    if with_input:
+        args.append(hellofile)
+    main(args)
+    captured = capsys.readouterr()
+    assert captured.err == ""
+    results = json.loads(captured.out)["results"]
+    assert [result["size"] for result in results[:1]] == [1]
+    assert {result["size"] for result in results} == {1, 40, 1024}
+    functions = {result["function"] for result in results}
+    assert {"b64encode_as_string", "b64decode_as_bytearray"} <= functions
+    assert {result["wrapcol"] for result in results} == {0, 76}
+    for result in results:
+        assert result["ns_per_call"] > 0.0
+
+
+def test_benchmark_sizes_text(capsys: pytest.CaptureFixture[str]) -> None:
+    main(["benchmark", "-d", "0.001", "-s", "16"])
+    captured = capsys.readouterr()
+    assert captured.err == ""
+    assert "bench: size=16, altchars=None, validate=True, padded=True" in captured.out
+    assert re.search(r"pybase64\.b64encode: +\d+ MB/s +[\d.]+ ns/call", captured.out)
+
+
+@pytest.mark.parametrize(
+    ("args", "message"),
+    [
+        ([], "an input file or --sizes is required"),
+        (["-s", "0"], "invalid size: '0'"),
+        (["-s", "16,1T"], "invalid size: '1T'"),
+        (["-s", "16", "-t", "2,0"], "invalid positive integer: '0'"),
+    ],
+    ids=["no-input", "zero", "unit", "threads"],
+)
+def test_benchmark_sizes_invalid(
+    capsys: pytest.CaptureFixture[str],
+    args: Sequence[str],
+    message: str,
+) -> None:
+    with pytest.raises(SystemExit) as exit_info:
+        main(["benchmark", *args])
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert message in captured.err
+    assert exit_info.value.code == 2
+
+
+def test_benchmark_threads(capsys: pytest.CaptureFixture[str]) -> None:
+    main(["benchmark", "-d", "0.001", "--format", "json", "--sizes", "16", "--threads", "3,2,3"])
+    captured = capsys.readouterr()
+    assert captured.err == ""
+    results = json.loads(captured.out)["results"]
+    cells = [(result["threads"], result["shared"], result["function"]) for result in results]
+    assert cells == [
+        (threads, shared, function)
+        for threads, shared in [(1, True), (3, True), (3, False), (2, True), (2, False)]
+        for function in ["b64encode", "b64decode"]
+    ]
+    for result in results:
+        assert result["module"] == "pybase64"
+        assert result["gbps"] > 0.0
+        assert result["efficiency"] > 0.0
+        if result["threads"] == 1:
+            assert result["efficiency"] == 1.0
+
+
+def test_benchmark_threads_text(capsys: pytest.CaptureFixture[str], hellofile: str) -> None:
+    main(["benchmark", "-d", "0.001", "-t", "2", hellofile])
+    captured = capsys.readouterr()
+    assert captured.err == ""
+    assert "bench: threads=2, input=unshared" in captured.out
+    assert re.search(r"pybase64\.b64decode: .*, \d+% efficiency\)", captured.out)
+
+
+@pytest.mark.skipif(not hasattr(pybase64, "_set_simd_path"), reason="requires the C extension")
+@pytest.mark.parametrize("simd", ["all", "plain", "PLAIN,plain"])
+def test_benchmark_simd(capsys: pytest.CaptureFixture[str], hellofile: str, simd: str) -> None:
+    active_simd_path = pybase64._get_simd_path()  # type: ignore[attr-defined]
+    main(["benchmark", "-d", "0.005", "--format", "json", "--simd", simd, hellofile])
+    assert pybase64._get_simd_path() == active_simd_path  # type: ignore[attr-defined]
+    captured = capsys.readouterr()
+    assert captured.err == ""
+    results = json.loads(captured.out)["results"]
+    simd_names = {result["simd"] for result in results if result["module"] == "pybase64"}
+    if simd == "all":
+        assert len(simd_names) >= 1
+    else:
+        assert simd_names == {pybase64._get_simd_name(0)}  # type: ignore[attr-defined]
+    for result in results:
+        if result["module"] == "base64":
+            assert result["simd"] is None
+            assert result["speedup_plain"] is None
+        else:
+            assert result["speedup_plain"] > 0.0
+            if result["simd"] == pybase64._get_simd_name(0):  # type: ignore[attr-defined]
+                assert result["speedup_plain"] == 1.0
+
+
+def test_benchmark_simd_text(capsys: pytest.CaptureFixture[str], hellofile: str) -> None:
+    if not hasattr(pybase64, "_set_simd_path"):
+        with pytest.raises(SystemExit):
+            main(["benchmark", "-d", "0.005", "--simd", "all", hellofile])
+        captured = capsys.readouterr()
+        assert "only be selected with the C extension" in captured.err
+        return
+    main(["benchmark", "-d", "0.005", "--simd", "all", hellofile])
+    captured = capsys.readouterr()
+    assert captured.err == ""
+    assert "pybase64.b64encode (No SIMD):" in captured.out
+    assert "comparison: speedup over No SIMD / over base64" in captured.out
+
+
+def test_benchmark_simd_invalid(capsys: pytest.CaptureFixture[str], hellofile: str) -> None:
+    with pytest.raises(SystemExit) as exit_info:
+        main(["benchmark", "--simd", "plain,foo", hellofile])
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "argument --simd: " in captured.err
+    assert exit_info.value.code == 2
+
+
 @pytest.mark.parametrize(
     ("args", "expect"),
     [
@@ -145,6 +311,122 @@ def test_decode(
     assert captured.out == b"hello world !/?\n"
 
 
+@pytest.mark.parametrize("buffer_size", ["1", "13", "4096"])
+@pytest.mark.parametrize("args", [[], ["-u"]], ids=["0", "1"])
+def test_buffer_size(
+    capsysbinary: pytest.CaptureFixture[bytes],
+    tmp_path: Path,
+    buffer_size: str,
+    args: Sequence[str],
+) -> None:
+    data = bytes(range(256)) * 100 + b"abcd"
+    altchars = b"-_" if args else None
+    input_file = tmp_path / "in"
+    input_file.write_bytes(data)
+    main(["encode", *args, "-b", buffer_size, str(input_file)])
+    captured = capsysbinary.readouterr()
+    assert captured.out == pybase64.b64encode(data, altchars)
+    encoded_file = tmp_path / "encoded"
+    encoded_file.write_bytes(captured.out)
+    main(["decode", *args, "--buffer-size", buffer_size, str(encoded_file)])
+    captured = capsysbinary.readouterr()
+    assert captured.out == data
+
+
+@pytest.mark.parametrize("args", [[], ["-u"]], ids=["0", "1"])
+def test_files(tmp_path: Path, args: Sequence[str]) -> None:
+    data = bytes(range(256)) * 100 + b"abcd"
+    altchars = b"-_" if args else None
+    input_file = tmp_path / "in"
+    input_file.write_bytes(data)
+    encoded_file = tmp_path / "encoded"
+    encoded_file.write_bytes(b"previous content" * 10000)
+    main(["encode", *args, "-o", str(encoded_file), str(input_file)])
+    assert encoded_file.read_bytes() == pybase64.b64encode(data, altchars)
+    decoded_file = tmp_path / "decoded"
+    main(["decode", *args, "-o", str(decoded_file), str(encoded_file)])
+    assert decoded_file.read_bytes() == data
+
+
+@pytest.mark.parametrize("buffer_size", ["0", "-1", "x"])
+def test_buffer_size_invalid(
+    capsys: pytest.CaptureFixture[str],
+    hellofile: str,
+    buffer_size: str,
+) -> None:
+    with pytest.raises(SystemExit) as exit_info:
+        main(["encode", "-b", buffer_size, hellofile])
+    captured = capsys.readouterr()
+    assert "buffer-size" in captured.err
+    assert exit_info.value.code == 2
+
+
+def test_same_input_output(capsys: pytest.CaptureFixture[str], hellofile: str) -> None:
+    with pytest.raises(SystemExit) as exit_info:
+        main(["encode", "-o", hellofile, hellofile])
+    captured = capsys.readouterr()
+    assert "different files" in captured.err
+    assert exit_info.value.code == 2
+    assert Path(hellofile).read_bytes() == b"hello world !/?\n"
+
+
+@pytest.mark.parametrize("jobs", ["1", "3"])
+def test_multiple_files(capsys: pytest.CaptureFixture[str], tmp_path: Path, jobs: str) -> None:
+    data = [bytes(range(256)) * i for i in range(5)]
+    inputs = []
+    for i, item in enumerate(data):
+        input_file = tmp_path / f"in{i:d}"
+        input_file.write_bytes(item)
+        inputs.append(str(input_file))
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    main(["encode", "-j", jobs, "-O", str(output_dir), *inputs])
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert captured.err.startswith("encoded 5 files, 2,560 bytes in ")
+    encoded = [str(output_dir / f"in{i:d}") for i in range(len(data))]
+    for item, output_file in zip(data, encoded):
+        assert Path(output_file).read_bytes() == pybase64.b64encode(item)
+    invalid_file = tmp_path / "invalid"
+    invalid_file.write_bytes(b"YW!j")
+    args = ["decode", "--jobs", jobs, "-s", ".bin", *encoded[:2], str(invalid_file), *encoded[2:]]
+    with pytest.raises(SystemExit) as exit_info:
+        main(args)
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert f"error: {invalid_file}: " in captured.err
+    assert "decoded 5 files, " in captured.err
+    assert exit_info.value.code == f"pybase64 decode: failed: {invalid_file}"
+    for item, output_file in zip(data, encoded):
+        assert Path(output_file + ".bin").read_bytes() == item
+
+
+@pytest.mark.parametrize(
+    ("args", "message"),
+    [
+        (["-s", ".b64", "-o", "out"], "--output can't be used"),
+        (["-s", ".b64", "-"], "stdin can't be used"),
+        (["-s", ""], "input and output must be different files"),
+        ([], "multiple inputs require"),
+    ],
+    ids=["0", "1", "2", "3"],
+)
+def test_multiple_files_invalid(
+    capsys: pytest.CaptureFixture[str],
+    tmp_path: Path,
+    hellofile: str,
+    args: Sequence[str],
+    message: str,
+) -> None:
+    other_file = tmp_path / "other"
+    other_file.write_bytes(b"")
+    with pytest.raises(SystemExit) as exit_info:
+        main(["encode", *args, hellofile, str(other_file)])
+    captured = capsys.readouterr()
+    assert message in captured.err
+    assert exit_info.value.code == 2
+
+
 @pytest.mark.skipif(
     sys.platform.startswith(("android", "emscripten", "ios")),
     reason="subprocess not supported",
@@ -164,3 +446,48 @@ def test_subprocess() -> None:
     assert process.returncode == 0
     assert out == b""
     assert err == b""
+
+
+@pytest.mark.skipif(
+    sys.platform.startswith(("android", "emscripten", "ios")),
+    reason="subprocess not supported",
+)
+def test_subprocess_broken_pipe(tmp_path: Path) -> None:
+    import subprocess  # noqa: PLC0415
+
+    input_file = tmp_path / "in"
+    input_file.write_bytes(b"x" * (4 * 1024 * 1024))
+    process = subprocess.Popen(  # noqa: S603
+        [sys.executable, "-m", "pybase64", "encode", "-b", "4096", str(input_file)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    assert process.stdout is not None
+    assert process.stdout.read(16) == b"eHh4" * 4
+    # the reader goes away early
+    process.stdout.close()
+    _, err = process.communicate()
+    assert process.returncode == 1
+    assert err == b""
+
+
+@pytest.mark.skipif(
+    sys.platform.startswith(("android", "emscripten", "ios")),
+    reason="subprocess not supported",
+)
+@pytest.mark.parametrize("output_format", ["json", "csv"])
+def test_subprocess_benchmark_broken_pipe(output_format: str) -> None:
+    import subprocess  # noqa: PLC0415
+
+    args = ["benchmark", "-d", "0.001", "-s", "16", "-f", output_format]
+    process = subprocess.Popen(  # noqa: S603
+        [sys.executable, "-m", "pybase64", *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    assert process.stdout is not None
+    # the reader goes away before the report is written
+    process.stdout.close()
+    _, err = process.communicate()
+    assert process.returncode == 1
+    assert err == b""
@@ -3,11 +3,14 @@ from __future__ import annotations
 import base64
 import binascii
 import importlib.util
+import os
 import re
 import sys
 import warnings
+from array import array
 from base64 import encodebytes as b64encodebytes
 from binascii import Error as BinAsciiError
+from concurrent.futures import ThreadPoolExecutor
 from enum import IntEnum
 
 import pytest
@@ -20,6 +23,7 @@ from . import utils
 TYPE_CHECKING = False
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from pathlib import Path
     from typing import Any, Literal
 
     from pybase64._typing import Buffer, Decode, Encode
@@ -31,9 +35,16 @@ def b64encode_as_string(
     *,
     padded: bool = True,
     wrapcol: int = 0,
+    threads: int = 1,
 ) -> bytes:
     """Helper returning bytes instead of string for tests"""
-    return pybase64.b64encode_as_string(s, altchars, padded=padded, wrapcol=wrapcol).encode("ascii")
+    return pybase64.b64encode_as_string(
+        s,
+        altchars,
+        padded=padded,
+        wrapcol=wrapcol,
+        threads=threads,
+    ).encode("ascii")
 
 
 def b64decode_as_bytearray(
@@ -44,9 +55,10 @@ def b64decode_as_bytearray(
     padded: bool = True,
     ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = _Unspecified.UNSPECIFIED,
     canonical: bool = False,
+    threads: int = 1,
 ) -> bytes:
     """Helper returning bytes instead of bytearray for tests"""
-    kwargs: dict[str, Any] = {"padded": padded, "canonical": canonical}
+    kwargs: dict[str, Any] = {"padded": padded, "canonical": canonical, "threads": threads}
     if not isinstance(validate, _Unspecified):
         kwargs["validate"] = validate
     if not isinstance(ignorechars, _Unspecified):
@@ -54,10 +66,38 @@ def b64decode_as_bytearray(
     return bytes(pybase64.b64decode_as_bytearray(s, altchars, **kwargs))
 
 
+def b64decode_check_length(
+    s: str | Buffer,
+    altchars: str | Buffer | None = None,
+    validate: bool | Literal[_Unspecified.UNSPECIFIED] = _Unspecified.UNSPECIFIED,
+    *,
+    padded: bool = True,
+    ignorechars: Buffer | Literal[_Unspecified.UNSPECIFIED] = _Unspecified.UNSPECIFIED,
+    canonical: bool = False,
+    threads: int = 1,
+) -> bytes:
+    """Helper checking b64decoded_length & b64validate against b64decode for tests"""
+    kwargs: dict[str, Any] = {"padded": padded, "canonical": canonical}
+    if not isinstance(validate, _Unspecified):
+        kwargs["validate"] = validate
+    if not isinstance(ignorechars, _Unspecified):
+        kwargs["ignorechars"] = ignorechars
+    try:
+        result = pybase64.b64decode(s, altchars, threads=threads, **kwargs)
+    except BinAsciiError:
+        assert not pybase64.b64validate(s, altchars, **kwargs)
+        with pytest.raises(BinAsciiError):
+            pybase64.b64decoded_length(s, altchars, **kwargs)
+        raise
+    assert pybase64.b64validate(s, altchars, **kwargs)
+    assert pybase64.b64decoded_length(s, altchars, **kwargs) == len(result)
+    return result
+
+
 param_encode_functions = pytest.mark.parametrize("efn", [pybase64.b64encode, b64encode_as_string])
 param_decode_functions = pytest.mark.parametrize(
     "dfn",
-    [pybase64.b64decode, b64decode_as_bytearray],
+    [pybase64.b64decode, b64decode_as_bytearray, b64decode_check_length],
 )
 
 
@@ -470,6 +510,22 @@ def test_invalid_data_dec_skip(
     assert test == base
 
 
+@utils.param_simd
+@param_decode_functions
+def test_dec_altchars_slow_path_large(dfn: Decode, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    base = bytes(range(256)) * 512
+    vector = b64encodebytes(base).translate(bytes.maketrans(b"+/", b"-_"))
+    assert dfn(vector, b"-_") == base
+    assert dfn(vector.decode("ascii"), b"-_") == base
+    assert dfn(vector, b"-_", ignorechars=b"\n") == base
+    # padding in the middle of the data, look-ahead larger than a block
+    vector = b"YWJj" * 8192 + b"YQ==" + b"\n" * 65536
+    assert dfn(vector, b"-_") == b"abc" * 8192 + b"a"
+    vector = b"Y" + b"\n" * 65536 + b"Q=="
+    assert dfn(vector, b"-_") == b"a"
+
+
 @utils.param_simd
 @params_invalid_data_all
 @param_decode_functions
@@ -538,6 +594,72 @@ def test_warning_data_dec(
             dfn(vector, b"/+", validate=validate)
 
 
+@utils.param_simd
+@param_decode_functions
+def test_dec_urlsafe_slow_path(dfn: Decode, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    std_to_urlsafe = bytes.maketrans(b"+/", b"-_")
+    base = bytes(range(256)) * 4
+    vector = b64encodebytes(base)
+    urlsafe_vector = vector.translate(std_to_urlsafe)
+    assert dfn(urlsafe_vector, b"-_") == base
+    assert dfn(urlsafe_vector, b"-_", ignorechars=b"\n") == base
+    assert dfn(urlsafe_vector.replace(b"\n", b""), b"-_", padded=False) == base
+    assert dfn(b"-_9=\n", b"-_", ignorechars=b"\n=") == b"\xfb\xff"
+    with pytest.warns(FutureWarning):
+        assert dfn(b"+/8=!", b"-_") == b"\xfb\xff"
+
+
+@utils.param_simd
+@param_decode_functions
+def test_dec_ignorechars_slow_path(dfn: Decode, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    base = bytes(range(256)) * 128
+    vector = b64encodebytes(base)
+    crlf_vector = vector.replace(b"\n", b"\r\n")
+    assert dfn(vector) == base
+    assert dfn(crlf_vector, ignorechars=b"\r\n") == base
+    assert dfn(crlf_vector.replace(b"\r\n", b"\n\n\n"), ignorechars=b"\n") == base
+    assert dfn(b"\n".join(vector[i : i + 1] for i in range(len(vector)))) == base
+    with pytest.raises(BinAsciiError):
+        dfn(crlf_vector, ignorechars=b"\n")
+    with pytest.raises(BinAsciiError):
+        dfn(crlf_vector[:-4] + b"=" + crlf_vector[-4:], ignorechars=b"\r\n")
+    with pytest.raises(BinAsciiError):
+        dfn(vector[:-3], ignorechars=b"\n")
+
+
+@utils.param_simd
+@param_decode_functions
+@pytest.mark.parametrize("width", [4, 64, 76, 1024])
+@pytest.mark.parametrize("new_line", [b"\n", b"\r\n"])
+def test_dec_lines(dfn: Decode, simd: int, width: int, new_line: bytes) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    base = bytes(range(256)) * 128
+    encoded = base64.b64encode(base)
+    lines = [encoded[i : i + width] for i in range(0, len(encoded), width)]
+    vector = new_line.join(lines) + new_line
+    assert dfn(vector) == base
+    assert dfn(vector, ignorechars=b"\r\n") == base
+    # a shorter line in the middle breaks the pattern
+    middle = len(lines) // 2
+    broken = [*lines[:middle], lines[middle][:3], lines[middle][3:], *lines[middle + 1 :]]
+    assert dfn(new_line.join(broken), ignorechars=b"\r\n") == base
+    # starting in the middle of a line, e.g. a stream chunk
+    if width > 4:
+        assert dfn(vector[(width // 8) * 4 :]) == base[(width // 8) * 3 :]
+        assert dfn(new_line + vector) == base
+    invalid = [*lines[:-2], lines[-2][:-1] + b"*", lines[-1]]
+    with pytest.raises(BinAsciiError):
+        dfn(new_line.join(invalid), ignorechars=b"\r\n")
+    # url-safe lines are translated while gathered
+    urlsafe = vector.translate(bytes.maketrans(b"+/", b"-_"))
+    assert dfn(urlsafe, b"-_") == base
+    assert dfn(urlsafe, b"-_", ignorechars=b"\r\n") == base
+    with pytest.raises(BinAsciiError):
+        dfn(vector, b"-_", ignorechars=b"\r\n")
+
+
 @utils.param_simd
 @param_decode_functions
 def test_altchars_translation(
@@ -1067,3 +1189,599 @@ def test_altchars_chunk_limit(
         dfn(vector, altchars=altchars, validate=True)
     with pytest.raises(BinAsciiError, match=r"Non-base64 digit found|Excess data after padding"):
         dfn(vector, altchars=altchars, ignorechars=b"\n")
+
+
+@utils.param_simd
+@param_vector
+@param_altchars
+def test_enc_into(altchars_id: int, vector_id: int, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    vector = test_vectors_bin[altchars_id][vector_id]
+    altchars = altchars_lut[altchars_id]
+    base = base64.b64encode(vector, altchars)
+    out = bytearray(b"\xff" * (len(base) + 8))
+    assert pybase64.b64encode_into(vector, out, altchars, offset=4) == len(base)
+    assert out[:4] == b"\xff" * 4
+    assert out[4 : 4 + len(base)] == base
+    assert out[4 + len(base) :] == b"\xff" * 4
+
+
+@utils.param_simd
+@param_vector
+@param_altchars
+@param_validate
+def test_dec_into(altchars_id: int, vector_id: int, validate: bool, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    vector = test_vectors_b64[altchars_id][vector_id]
+    altchars = altchars_lut[altchars_id]
+    base = base64.b64decode(vector, altchars)
+    # exact size and large enough
+    for extra in (0, 8):
+        out = bytearray(b"\xff" * (len(base) + extra + 4))
+        assert pybase64.b64decode_into(vector, out, altchars, validate, offset=4) == len(base)
+        assert out[:4] == b"\xff" * 4
+        assert out[4 : 4 + len(base)] == base
+        assert out[4 + len(base) :] == b"\xff" * extra
+
+
+@utils.param_simd
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 4, 5, 56, 57, 58, 4095, 65536, 65537])
+def test_dec_into_exact_size(size: int, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    base = bytes(i & 0xFF for i in range(size))
+    vectors: list[tuple[bytes, bytes | None, dict[str, Any]]] = [
+        (base64.b64encode(base), None, {"validate": True}),
+        (base64.b64encode(base), None, {}),
+        (base64.encodebytes(base), None, {}),
+        (base64.encodebytes(base) + b"\n" * 20000, None, {}),
+        (base64.urlsafe_b64encode(base), b"-_", {"validate": True}),
+        (base64.urlsafe_b64encode(base).rstrip(b"="), b"-_", {"padded": False}),
+        (base64.b64encode(base, b"*/"), b"*/", {}),
+    ]
+    for vector, altchars, kwargs in vectors:
+        out = bytearray(b"\xff" * (size + 1))
+        view = memoryview(out)[:size]
+        assert pybase64.b64decode_into(vector, view, altchars, **kwargs) == size
+        assert out == base + b"\xff"
+        if size > 0:
+            with pytest.raises(ValueError, match="output buffer too small"):
+                pybase64.b64decode_into(vector, view[1:], altchars, **kwargs)
+        with pytest.raises(BinAsciiError):
+            pybase64.b64decode_into(vector + b"@YWJj", view, altchars, validate=True)
+
+
+@utils.param_simd
+@param_vector
+@param_altchars
+def test_encoded_length(altchars_id: int, vector_id: int, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    vector = test_vectors_bin[altchars_id][vector_id]
+    for padded in (True, False):
+        for wrapcol in (0, 1, 4, 5, 76):
+            base = pybase64.b64encode(vector, padded=padded, wrapcol=wrapcol)
+            length = pybase64.b64encoded_length(len(vector), padded=padded, wrapcol=wrapcol)
+            assert length == len(base)
+
+
+@utils.param_simd
+def test_length_invalid(simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    with pytest.raises(ValueError, match="n must be >= 0"):
+        pybase64.b64encoded_length(-1)
+    with pytest.raises(ValueError, match="wrapcol"):
+        pybase64.b64encoded_length(3, wrapcol=-1)
+    with pytest.raises(BinAsciiError):
+        pybase64.b64decoded_length(b"YWJ")
+    with pytest.raises(ValueError, match="ASCII"):
+        pybase64.b64validate("é")
+    with pytest.raises(TypeError):
+        pybase64.b64validate(1)  # type: ignore[arg-type]
+    assert pybase64.b64decoded_length(b"") == 0
+    assert pybase64.b64validate(b"")
+    assert not pybase64.b64validate(b"YWJ")
+    assert not pybase64.b64validate(b"YR==", canonical=True)
+    assert pybase64.b64validate(b"YR==")
+
+
+@utils.param_simd
+def test_into_buffers(simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    out = memoryview(bytearray(16)).cast("I")
+    assert pybase64.b64encode_into(b"abc", out, wrapcol=2) == 4
+    assert out.tobytes()[:4] == b"YWJj"
+    assert pybase64.b64decode_into("YWJj", out, offset=12) == 3
+    assert out.tobytes()[12:15] == b"abc"
+    assert pybase64.b64encode_into(b"", bytearray()) == 0
+    assert pybase64.b64decode_into(b"", bytearray()) == 0
+
+
+@utils.param_simd
+def test_into_invalid(simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    with pytest.raises(BufferError):
+        pybase64.b64encode_into(b"abc", b"    ")
+    with pytest.raises(BufferError):
+        pybase64.b64decode_into(b"YWJj", b"   ")
+    with pytest.raises(BufferError):
+        pybase64.b64encode_into(b"abc", memoryview(bytearray(8))[::2])
+    with pytest.raises(TypeError):
+        pybase64.b64encode_into(b"abc", "    ")  # type: ignore[arg-type]
+    with pytest.raises(ValueError, match="output buffer too small"):
+        pybase64.b64encode_into(b"abc", bytearray(3))
+    with pytest.raises(ValueError, match="output buffer too small"):
+        pybase64.b64decode_into(b"YWJjYWJj", bytearray(5))
+    with pytest.raises(ValueError, match="output buffer too small"):
+        pybase64.b64decode_into(b"YWJj", bytearray(4), offset=2)
+    with pytest.raises(ValueError, match="offset"):
+        pybase64.b64encode_into(b"", bytearray(4), offset=5)
+    with pytest.raises(ValueError, match="offset"):
+        pybase64.b64decode_into(b"", bytearray(4), offset=-1)
+    with pytest.raises(BinAsciiError):
+        pybase64.b64decode_into(b"YWJ", bytearray(8))
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+param_chunk_size = pytest.mark.parametrize("chunk_size", [1, 7, 64])
+
+
+@utils.param_simd
+@param_vector
+@param_altchars
+@param_chunk_size
+@pytest.mark.parametrize("wrapcol", [0, 76])
+def test_encoder(
+    altchars_id: int,
+    vector_id: int,
+    chunk_size: int,
+    wrapcol: int,
+    simd: int,
+) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    vector = test_vectors_bin[altchars_id][vector_id]
+    altchars = altchars_lut[altchars_id]
+    for padded in (True, False):
+        base = pybase64.b64encode(vector, altchars, padded=padded, wrapcol=wrapcol)
+        encoder = pybase64.Encoder(altchars, padded=padded, wrapcol=wrapcol)
+        for _ in range(2):  # the encoder can be reused after finalize
+            test = b"".join(encoder.update(chunk) for chunk in _chunks(vector, chunk_size))
+            assert test + encoder.finalize() == base
+
+
+@utils.param_simd
+@param_vector
+@param_altchars
+@param_validate
+@param_chunk_size
+def test_decoder(
+    altchars_id: int,
+    vector_id: int,
+    validate: bool,
+    chunk_size: int,
+    simd: int,
+) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    vector = test_vectors_b64[altchars_id][vector_id]
+    altchars = altchars_lut[altchars_id]
+    base = base64.b64decode(vector, altchars)
+    decoder = pybase64.Decoder(altchars, validate)
+    for _ in range(2):  # the decoder can be reused after finalize
+        test = b"".join(decoder.update(chunk) for chunk in _chunks(vector, chunk_size))
+        assert test + decoder.finalize() == base
+    test = b"".join(decoder.update(chunk.decode("ascii")) for chunk in _chunks(vector, chunk_size))
+    assert test + decoder.finalize() == base
+
+
+@utils.param_simd
+@param_chunk_size
+@pytest.mark.parametrize(
+    ("vector", "kwargs"),
+    [
+        (b"Zm9v\nYmE=\n", {"ignorechars": b"\n"}),
+        (b" Zm9v YmE= !", {"validate": False}),
+        (b"Zm9vYmE", {"padded": False}),
+        (b"Zm9vYm==", {"ignorechars": b"="}),
+        (b"Zm9vYmE=", {"canonical": True}),
+    ],
+)
+def test_decoder_options(chunk_size: int, vector: bytes, kwargs: dict[str, Any], simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    base = pybase64.b64decode(vector, **kwargs)
+    decoder = pybase64.Decoder(**kwargs)
+    test = b"".join(decoder.update(chunk) for chunk in _chunks(vector, chunk_size))
+    assert test + decoder.finalize() == base
+
+
+@utils.param_simd
+@param_chunk_size
+@pytest.mark.parametrize(
+    ("vector", "kwargs"),
+    [
+        (b"Zm9vYm!=", {"validate": True}),
+        (b"Zm9vYmE", {"validate": True}),
+        (b"Zm9vYmE=Zm9v", {"validate": True}),
+        (b"=Zm9vYmE", {"validate": False}),
+        (b"Zm9v\nYmE=\nZ", {"ignorechars": b"\n"}),
+        (b"Zm9vYmF=", {"canonical": True}),
+        (b"Zm9vYmE=", {"padded": False, "validate": True}),
+    ],
+)
+def test_decoder_invalid_data(
+    chunk_size: int,
+    vector: bytes,
+    kwargs: dict[str, Any],
+    simd: int,
+) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    with pytest.raises(BinAsciiError):
+        pybase64.b64decode(vector, **kwargs)
+    decoder = pybase64.Decoder(**kwargs)
+    with pytest.raises(BinAsciiError):  # noqa: PT012
+        for chunk in _chunks(vector, chunk_size):
+            decoder.update(chunk)
+        decoder.finalize()
+    # the decoder is reset on error
+    assert decoder.update(b"Zm9v") + decoder.finalize() == b"foo"
+
+
+@utils.param_simd
+def test_incremental_invalid(simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    with pytest.raises(ValueError, match="altchars"):
+        pybase64.Encoder(b"-")
+    with pytest.raises(ValueError, match="wrapcol"):
+        pybase64.Encoder(wrapcol=-1)
+    with pytest.raises(ValueError, match="altchars"):
+        pybase64.Decoder(b"-")
+    with pytest.raises(ValueError, match="validate"):
+        pybase64.Decoder(validate=False, ignorechars=b"\n")
+    with pytest.raises(TypeError):
+        pybase64.Encoder().update("abc")  # type: ignore[arg-type]
+    with pytest.raises(BufferError):
+        pybase64.Encoder().update(memoryview(bytearray(8))[::2])
+    with pytest.raises(ValueError, match="ASCII"):
+        pybase64.Decoder().update("é")
+    with pytest.raises(DeprecationWarning), warnings.catch_warnings():  # noqa: PT012
+        warnings.simplefilter("error")
+        decoder = pybase64.Decoder(b"-_", validate=True)
+        decoder.update(b"Zm9+")
+        decoder.finalize()
+
+
+@utils.param_simd
+@param_vector
+@param_altchars
+@param_validate
+@pytest.mark.parametrize("wrapcol", [0, 76])
+def test_codec(altchars_id: int, vector_id: int, validate: bool, wrapcol: int, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    vector = test_vectors_bin[altchars_id][vector_id]
+    altchars = altchars_lut[altchars_id]
+    for padded in (True, False):
+        codec = pybase64.Codec(altchars, validate, padded=padded, wrapcol=wrapcol)
+        encoded = pybase64.b64encode(vector, altchars, padded=padded, wrapcol=wrapcol)
+        assert codec.encode(vector) == encoded
+        if wrapcol == 0:
+            assert codec.decode(encoded) == vector
+            assert codec.decode(encoded.decode("ascii")) == vector
+
+
+@utils.param_simd
+@pytest.mark.parametrize(
+    ("vector", "kwargs"),
+    [
+        (b"Zm9v\nYmE=\n", {"ignorechars": b"\n"}),
+        (b" Zm9v YmE= !", {"validate": False}),
+        (b"Zm9vYmE", {"padded": False}),
+        (b"Zm9vYm==", {"ignorechars": b"="}),
+        (b"Zm9vYmE=", {"canonical": True}),
+        (b"Zm9vYmF=", {"canonical": True}),
+        (b"Zm9vYm!=", {"validate": True}),
+        (b"Zm9vYmE=", {"padded": False, "validate": True}),
+    ],
+)
+def test_codec_options(vector: bytes, kwargs: dict[str, Any], simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    codec = pybase64.Codec(**kwargs)
+    try:
+        base = pybase64.b64decode(vector, **kwargs)
+    except BinAsciiError:
+        with pytest.raises(BinAsciiError):
+            codec.decode(vector)
+    else:
+        assert codec.decode(vector) == base
+
+
+@utils.param_simd
+def test_codec_invalid(simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    with pytest.raises(ValueError, match="altchars"):
+        pybase64.Codec(b"-")
+    with pytest.raises(ValueError, match="wrapcol"):
+        pybase64.Codec(wrapcol=-1)
+    with pytest.raises(ValueError, match="validate"):
+        pybase64.Codec(validate=False, ignorechars=b"\n")
+    with pytest.raises(TypeError):
+        pybase64.Codec().encode("abc")  # type: ignore[arg-type]
+    with pytest.raises(ValueError, match="ASCII"):
+        pybase64.Codec().decode("é")
+    with pytest.raises(DeprecationWarning), warnings.catch_warnings():  # noqa: PT012
+        warnings.simplefilter("error")
+        pybase64.Codec(b"-_", validate=True).decode(b"Zm9+")
+
+
+@utils.param_simd
+def test_codec_ignorechars_copy(simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    ignorechars = bytearray(b"\n")
+    codec = pybase64.Codec(ignorechars=ignorechars)
+    decoder = pybase64.Decoder(ignorechars=ignorechars)
+    # the options do not keep a reference on a mutable ignorechars
+    ignorechars.extend(b"*")
+    assert codec.decode(b"YW\nJj") == b"abc"
+    assert decoder.update(b"YW\nJj") + decoder.finalize() == b"abc"
+    with pytest.raises(BinAsciiError):
+        codec.decode(b"YW*Jj")
+
+
+@utils.param_simd
+@param_encode_functions
+@pytest.mark.parametrize("wrapcol", [0, 4, 76])
+@pytest.mark.parametrize("altchars", [None, b"-_"])
+def test_enc_threads(efn: Encode, wrapcol: int, altchars: bytes | None, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    vector = bytes(range(256)) * (4 * 4096) + b"\x01\x02"  # large enough to use threads
+    base = efn(vector, altchars, wrapcol=wrapcol)
+    assert efn(vector, altchars, wrapcol=wrapcol, threads=3) == base  # type: ignore[call-arg]
+    base = efn(vector, altchars, padded=False, wrapcol=wrapcol)
+    assert efn(vector, altchars, padded=False, wrapcol=wrapcol, threads=4) == base  # type: ignore[call-arg]
+
+
+@utils.param_simd
+@param_decode_functions
+@param_validate
+@pytest.mark.parametrize("altchars", [None, b"-_"])
+def test_dec_threads(dfn: Decode, validate: bool, altchars: bytes | None, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    base = bytes(range(256)) * (4 * 4096) + b"\x01\x02"  # large enough to use threads
+    vector = base64.b64encode(base, altchars)
+    assert dfn(vector, altchars, validate, threads=3) == base  # type: ignore[call-arg]
+    assert dfn(vector, altchars, validate, canonical=True, threads=3) == base  # type: ignore[call-arg]
+
+
+@utils.param_simd
+@pytest.mark.parametrize("size", [48, 64 * 1024])  # with and without the GIL held
+def test_concurrent_calls(size: int, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    simd_path = pybase64._get_simd_path()  # type: ignore[attr-defined]
+    data = (bytes(range(256)) * (size // 256 + 1))[:size]
+    encoded = base64.b64encode(data, b"-_")
+
+    def run(shared: bool) -> int:
+        input_ = data if shared else bytes(bytearray(data))
+        for _ in range(64):
+            assert pybase64.b64encode(input_, b"-_") == encoded
+            assert pybase64.b64decode(encoded, b"-_", validate=True) == data
+        return int(pybase64._get_simd_path())  # type: ignore[attr-defined]
+
+    with ThreadPoolExecutor(4) as executor:
+        paths = list(executor.map(run, [True, False] * 4))
+    assert paths == [simd_path] * 8
+
+
+@utils.param_simd
+@pytest.mark.parametrize("position", [0, 1024 * 1024 + 2, 3 * 1024 * 1024 - 1])
+def test_dec_threads_invalid(position: int, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    vector = bytearray(b"AAAA" * (1024 * 1024))
+    vector[position] = ord("!")
+    with pytest.raises(BinAsciiError):
+        pybase64.b64decode(vector, validate=True, threads=4)
+    # padding before the end of the data
+    vector = bytearray(b"AAAA" * (1024 * 1024))
+    vector[position & ~3 : (position & ~3) + 4] = b"AA=="
+    with pytest.raises(BinAsciiError):
+        pybase64.b64decode(vector, validate=True, threads=4)
+    vector = bytearray(b"AAAA" * (1024 * 1024) + b"AB==")
+    with pytest.raises(BinAsciiError, match="Non-zero padding bits"):
+        pybase64.b64decode(vector, validate=True, canonical=True, threads=4)
+    with pytest.raises(ValueError, match="threads"):
+        pybase64.b64decode(vector, threads=0)
+    with pytest.raises(ValueError, match="threads"):
+        pybase64.b64encode(vector, threads=0)
+
+
+@utils.param_simd
+@param_altchars
+def test_enc_many(altchars_id: int, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    vectors = test_vectors_bin[altchars_id]
+    altchars = altchars_lut[altchars_id]
+    for padded in (True, False):
+        for wrapcol in (0, 76):
+            base = [
+                pybase64.b64encode(vector, altchars, padded=padded, wrapcol=wrapcol)
+                for vector in vectors
+            ]
+            test = pybase64.b64encode_many(iter(vectors), altchars, padded=padded, wrapcol=wrapcol)
+            assert test == base
+    assert pybase64.b64encode_many([]) == []
+
+
+@utils.param_simd
+@param_altchars
+@param_validate
+def test_dec_many(altchars_id: int, validate: bool, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    vectors = test_vectors_b64[altchars_id]
+    altchars = altchars_lut[altchars_id]
+    base = test_vectors_bin[altchars_id]
+    assert pybase64.b64decode_many(vectors, altchars, validate) == base
+    assert pybase64.b64decode_many([v.decode("ascii") for v in vectors], altchars, validate) == base
+    vectors = [vector + b"\n" for vector in vectors]
+    base = [pybase64.b64decode(vector, altchars, ignorechars=b"\n") for vector in vectors]
+    assert pybase64.b64decode_many(vectors, altchars, ignorechars=b"\n") == base
+    assert pybase64.b64decode_many([]) == []
+
+
+@utils.param_simd
+def test_many_invalid(simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    with pytest.raises(BinAsciiError, match=r"^item 1: "):
+        pybase64.b64decode_many([b"YWJj", b"YW!j"], validate=True)
+    with pytest.raises(BinAsciiError, match=r"^item 2: "):
+        pybase64.b64decode_many([b"YWJj", b"YWJj", b"YWJ"])
+    with pytest.raises(BinAsciiError, match=r"^item 0: "):
+        pybase64.b64decode_many([b"YW=j"], ignorechars=b"\n")
+    with pytest.raises(ValueError, match=r"^item 1: "):
+        pybase64.b64decode_many([b"YWJj", "é"])
+    with pytest.raises(TypeError, match=r"^item 1: "):
+        pybase64.b64decode_many([b"YWJj", 1])  # type: ignore[list-item]
+    with pytest.raises(TypeError, match=r"^item 0: "):
+        pybase64.b64encode_many(["abc"])  # type: ignore[list-item]
+    with pytest.raises(TypeError, match="iterable"):
+        pybase64.b64encode_many(1)  # type: ignore[arg-type]
+    with pytest.raises(TypeError, match="iterable"):
+        pybase64.b64decode_many(1)  # type: ignore[arg-type]
+    with pytest.raises(ValueError, match="altchars"):
+        pybase64.b64encode_many([], b"-")
+    with pytest.raises(ValueError, match="wrapcol"):
+        pybase64.b64encode_many([], wrapcol=-1)
+    with pytest.raises(ValueError, match="validate"):
+        pybase64.b64decode_many([], validate=False, ignorechars=b"\n")
+
+
+def _unpack(data: bytearray, offsets: array[int]) -> list[bytes]:
+    return [bytes(data[offsets[i] : offsets[i + 1]]) for i in range(len(offsets) - 1)]
+
+
+@utils.param_simd
+@param_altchars
+def test_enc_packed(altchars_id: int, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    vectors = test_vectors_bin[altchars_id]
+    altchars = altchars_lut[altchars_id]
+    offsets = array("q", [0])
+    for vector in vectors:
+        offsets.append(offsets[-1] + len(vector))
+    data = b"".join(vectors)
+    for padded in (True, False):
+        for wrapcol in (0, 76):
+            base = pybase64.b64encode_many(vectors, altchars, padded=padded, wrapcol=wrapcol)
+            test = pybase64.b64encode_packed(
+                data,
+                offsets,
+                altchars,
+                padded=padded,
+                wrapcol=wrapcol,
+            )
+            assert isinstance(test[0], bytearray)
+            assert test[1].typecode == "q"
+            assert _unpack(*test) == base
+    assert pybase64.b64encode_packed(b"", array("q", [0])) == (bytearray(), array("q", [0]))
+    assert pybase64.b64encode_packed(b"xabcx", array("q", [1, 4])) == (
+        bytearray(b"YWJj"),
+        array("q", [0, 4]),
+    )
+
+
+@utils.param_simd
+@param_altchars
+@param_validate
+def test_dec_packed(altchars_id: int, validate: bool, simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    vectors = test_vectors_b64[altchars_id]
+    altchars = altchars_lut[altchars_id]
+    base = test_vectors_bin[altchars_id]
+    test = pybase64.b64decode_packed(vectors, altchars, validate)
+    assert isinstance(test[0], bytearray)
+    assert test[1].typecode == "q"
+    assert _unpack(*test) == base
+    vectors = [vector + b"\n" for vector in vectors]
+    test = pybase64.b64decode_packed(iter(vectors), altchars, ignorechars=b"\n")
+    assert _unpack(*test) == base
+    assert pybase64.b64decode_packed([]) == (bytearray(), array("q", [0]))
+
+
+@utils.param_simd
+def test_packed_invalid(simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    with pytest.raises(BinAsciiError, match=r"^item 1: "):
+        pybase64.b64decode_packed([b"YWJj", b"YW!j"], validate=True)
+    with pytest.raises(TypeError, match="int64"):
+        pybase64.b64encode_packed(b"abc", array("i", [0, 3]))
+    with pytest.raises(TypeError, match="int64"):
+        pybase64.b64encode_packed(b"abc", b"\0" * 16)
+    with pytest.raises(ValueError, match="at least one"):
+        pybase64.b64encode_packed(b"abc", array("q"))
+    with pytest.raises(ValueError, match="non-negative"):
+        pybase64.b64encode_packed(b"abc", array("q", [-1, 3]))
+    with pytest.raises(ValueError, match=r"non-decreasing, offsets\[0\] > offsets\[1\]"):
+        pybase64.b64encode_packed(b"abc", array("q", [2, 1]))
+    with pytest.raises(ValueError, match=r"offsets\[1\] out of range"):
+        pybase64.b64encode_packed(b"abc", array("q", [0, 4]))
+    with pytest.raises(ValueError, match="altchars"):
+        pybase64.b64encode_packed(b"", array("q", [0]), b"-")
+
+
+@utils.param_simd
+def test_arguments_invalid(simd: int) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    # the arguments are loosely typed in order to exercise the argument parser
+    calls: list[tuple[Callable[..., object], tuple[Any, ...], dict[str, Any]]] = [
+        (pybase64.b64encode, (b"abc", None, b"x"), {}),
+        (pybase64.b64encode, (b"abc",), {"foo": 1}),
+        (pybase64.b64encode, (b"abc", None), {"altchars": None}),
+        (pybase64.b64encode, (), {}),
+        (pybase64.b64decode, (b"YWJj", None, False), {"validate": True}),
+        (pybase64.b64decode, (b"YWJj", None, False, True), {}),
+    ]
+    for func, args, kwargs in calls:
+        with pytest.raises(TypeError):
+            func(*args, **kwargs)
+    assert pybase64.b64decode(b"YWJj", None, validate=False, padded=True) == b"abc"
+    assert pybase64.b64encode(b"abc", wrapcol=0) == b"YWJj"
+
+
+@utils.param_simd
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 1000, 100000])
+def test_files(simd: int, size: int, tmp_path: Path) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    data = bytes(i % 251 for i in range(size))
+    src = tmp_path / "data"
+    src.write_bytes(data)
+    encoded = tmp_path / "encoded"
+    decoded = tmp_path / "decoded"
+    for altchars, padded, wrapcol in ((None, True, 0), (b"-_", False, 76)):
+        expected = pybase64.b64encode(data, altchars, padded=padded, wrapcol=wrapcol)
+        length = pybase64.encode_file(src, encoded, altchars, padded=padded, wrapcol=wrapcol)
+        assert length == len(expected)
+        assert encoded.read_bytes() == expected
+        length = pybase64.decode_file(encoded, decoded, altchars, padded=padded, ignorechars=b"\n")
+        assert length == size
+        assert decoded.read_bytes() == data
+
+
+@utils.param_simd
+def test_files_invalid(simd: int, tmp_path: Path) -> None:
+    utils.unused_args(simd)  # simd is a parameter in order to control the order of tests
+    src = tmp_path / "encoded"
+    src.write_bytes(b"YWJj" * 1000 + b"YW!j")
+    dst = tmp_path / "decoded"
+    with pytest.raises(BinAsciiError):
+        pybase64.decode_file(src, dst, validate=True)
+    assert not dst.exists()
+    with pytest.raises(FileNotFoundError):
+        pybase64.encode_file(tmp_path / "missing", dst)
+    assert not dst.exists()
+    # the source is kept when it is also the destination
+    link = tmp_path / "link"
+    os.link(src, link)
+    for same in (src, str(src), link):
+        with pytest.raises(ValueError, match="same file"):
+            pybase64.encode_file(src, same)
+        with pytest.raises(ValueError, match="same file"):
+            pybase64.decode_file(src, same)
+    assert src.read_bytes() == b"YWJj" * 1000 + b"YW!j"
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import binascii
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import pybase64
+
+from . import utils
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+requires_extension = pytest.mark.skipif(not utils.has_extension, reason="requires the C extension")
+
+
+def _counters(calls: int, bytes_in: int, bytes_out: int) -> dict[str, int]:
+    return {"calls": calls, "bytes_in": bytes_in, "bytes_out": bytes_out}
+
+
+@pytest.mark.skipif(utils.has_extension, reason="requires the fallback")
+def test_stats_fallback() -> None:
+    assert not pybase64.enable_stats()
+    pybase64.b64encode(b"abc")
+    assert pybase64.get_stats() == {}
+    pybase64.reset_stats()
+
+
+@requires_extension
+@pytest.mark.parametrize(
+    ("entry", "path", "call", "bytes_in", "bytes_out"),
+    [
+        ("b64encode", "fast", lambda: pybase64.b64encode(b"abcd"), 4, 8),
+        ("b64encode", "translate", lambda: pybase64.b64encode(b"abcd", b"-_"), 4, 8),
+        ("b64encode", "wrapcol", lambda: pybase64.b64encode(b"abcd", wrapcol=4), 4, 9),
+        ("b64encode_as_string", "fast", lambda: pybase64.b64encode_as_string(b"abc"), 3, 4),
+        ("b64encode_into", "fast", lambda: pybase64.b64encode_into(b"abc", bytearray(4)), 3, 4),
+        ("b64encode_into", "error", lambda: pybase64.b64encode_into(b"abc", bytearray(3)), 3, 0),
+        ("b64encode_many", "fast", lambda: pybase64.b64encode_many([b"a", b"bc"]), 3, 8),
+        (
+            "b64encode_packed",
+            "translate",
+            lambda: pybase64.b64encode_packed(b"abc", array("q", [0, 1, 3]), b"-_"),
+            3,
+            8,
+        ),
+        ("encodebytes", "fast", lambda: pybase64.encodebytes(b"abc"), 3, 5),
+        ("encodebytes", "wrapcol", lambda: pybase64.encodebytes(b"x" * 60), 60, 82),
+        ("b64decode", "fast", lambda: pybase64.b64decode(b"YWJj", validate=True), 4, 3),
+        ("b64decode", "translate", lambda: pybase64.b64decode(b"YWJj", b"-_", validate=True), 4, 3),
+        ("b64decode", "slow", lambda: pybase64.b64decode(b"YW\nJj"), 5, 3),
+        ("b64decode", "slow", lambda: pybase64.b64decode(b"YQ", validate=True, padded=False), 2, 1),
+        ("b64decode", "error", lambda: pybase64.b64decode(b"YWJ", validate=True), 3, 0),
+        ("b64decode_as_bytearray", "slow", lambda: pybase64.b64decode_as_bytearray(b"YWJj"), 4, 3),
+        ("b64decode_into", "slow", lambda: pybase64.b64decode_into("YWJj", bytearray(3)), 4, 3),
+        ("b64decode_many", "slow", lambda: pybase64.b64decode_many([b"YQ==", b"YWJj"]), 8, 4),
+        ("b64decode_packed", "error", lambda: pybase64.b64decode_packed([b"YQ", b"@"]), 3, 0),
+        ("Codec.encode", "translate", lambda: pybase64.Codec(b"-_").encode(b"abc"), 3, 4),
+        ("Codec.decode", "fast", lambda: pybase64.Codec(validate=True).decode(b"YWJj"), 4, 3),
+    ],
+)
+def test_stats(
+    stats: None,
+    entry: str,
+    path: str,
+    call: Callable[[], object],
+    bytes_in: int,
+    bytes_out: int,
+) -> None:
+    utils.unused_args(stats)
+    if path == "error":
+        with pytest.raises((ValueError, binascii.Error)):
+            call()
+    else:
+        call()
+    assert pybase64.get_stats() == {entry: {path: _counters(1, bytes_in, bytes_out)}}
+
+
+@requires_extension
+def test_stats_stream(stats: None) -> None:
+    utils.unused_args(stats)
+    encoder = pybase64.Encoder()
+    encoded = encoder.update(b"abcd") + encoder.finalize()
+    decoder = pybase64.Decoder(validate=True)
+    decoded = decoder.update(encoded[:5]) + decoder.update(encoded[5:]) + decoder.finalize()
+    assert decoded == b"abcd"
+    assert pybase64.get_stats() == {
+        "Encoder": {"fast": _counters(2, 4, 8)},
+        "Decoder": {"fast": _counters(3, 8, 4)},
+    }
+
+
+@requires_extension
+def test_stats_disabled(stats: None) -> None:
+    utils.unused_args(stats)
+    assert pybase64.enable_stats(enabled=False)
+    pybase64.b64encode(b"abc")
+    assert pybase64.get_stats() == {}
+    assert not pybase64.enable_stats()
+    pybase64.b64encode(b"abc")
+    pybase64.b64encode(b"abc")
+    assert pybase64.get_stats() == {"b64encode": {"fast": _counters(2, 6, 8)}}
+    pybase64.reset_stats()
+    assert pybase64.get_stats() == {}
+
+
+@requires_extension
+def test_stats_threads(stats: None) -> None:
+    utils.unused_args(stats)
+    data = pybase64.b64encode(b"x" * 65536)
+    pybase64.reset_stats()
+
+    def decode(_: int) -> None:
+        for _ in range(100):
+            pybase64.b64decode(data, validate=True)
+
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(decode, range(4)))
+    expected = _counters(400, 400 * len(data), 400 * 65536)
+    assert pybase64.get_stats() == {"b64decode": {"fast": expected}}